@@ -0,0 +1,78 @@
+import threading
+from collections import OrderedDict
+
+# Thread-safe LRU cache
+class LRUCache:
+    """
+    Keeps the most recently used results, evicting the least recently used one when full.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get_many(self, keys):
+        """
+        Looks several keys up.
+
+        Args:
+            keys (list): Cache keys.
+
+        Returns:
+            dict: The cached values of the keys that were found.
+        """
+        found = {}
+        with self.lock:
+            for key in keys:
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+                    found[key] = self.entries[key]
+            self.counters['hits'] += len(found)
+            self.counters['misses'] += len(keys) - len(found)
+        return found
+
+    def put_many(self, values):
+        """
+        Stores several values, evicting the least recently used ones beyond max_size.
+
+        Args:
+            values (dict): Values by cache key.
+        """
+        if self.max_size <= 0:
+            return
+
+        with self.lock:
+            for key, value in values.items():
+                self.entries[key] = value
+                self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.counters['evictions'] += 1
+
+    def delete_where(self, predicate):
+        """
+        Drops the entries whose key matches a predicate.
+
+        Args:
+            predicate (callable): Function of a key, True for the entries to drop.
+
+        Returns:
+            int: The number of dropped entries.
+        """
+        with self.lock:
+            keys = [key for key in self.entries if predicate(key)]
+            for key in keys:
+                del self.entries[key]
+            return len(keys)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.counters['hits'] + self.counters['misses']
+            return {
+                'size': len(self.entries),
+                'max_size': self.max_size,
+                **self.counters,
+                'hit_rate': round(self.counters['hits'] / lookups, 4) if lookups else None
+            }
@@ -0,0 +1,149 @@
+from config.review_tables import REVIEW_PLACE_COLUMNS, REVIEW_TABLES, SENTIMENTS
+from config.sql_engine import db_connection
+
+# Place type of every review table
+PLACE_TYPES = {table: place_type for place_type, table in REVIEW_TABLES.items()}
+
+# Function to count a new review in the stats of its place
+def record_review(cursor, place_type, place_id, rating):
+    """
+    Adds a pending review to the stats of its place, in the transaction that inserts the review.
+
+    Args:
+        cursor: Cursor of the transaction.
+        place_type (str): 'accommodations', 'tours' or 'culinaries'.
+        place_id (str): Id of the reviewed place.
+        rating (float or None): Rating of the review.
+    """
+    cursor.execute("""
+        INSERT INTO place_stats (place_id, place_type, review_count, rating_sum, rated_count, pending_count)
+        VALUES (%s, %s, 1, %s, %s, 1)
+        ON DUPLICATE KEY UPDATE
+            review_count = review_count + 1,
+            rating_sum = rating_sum + VALUES(rating_sum),
+            rated_count = rated_count + VALUES(rated_count),
+            pending_count = pending_count + 1
+    """, (place_id, place_type, rating or 0, 0 if rating is None else 1))
+
+# Function to move analyzed reviews out of the pending count of their places
+def record_sentiments(cursor, table, results):
+    """
+    Moves analyzed reviews from the pending count to the count of their sentiment.
+
+    Must run before the reviews themselves are updated, in the same transaction: only reviews
+    that are still pending are counted, so a review analyzed twice is counted once.
+
+    Args:
+        cursor: Cursor of the transaction.
+        table (str): Review table of the reviews, one of REVIEW_TABLES.
+        results (list): (review_id, sentiment) tuples.
+    """
+    column = REVIEW_PLACE_COLUMNS[PLACE_TYPES[table]]
+
+    # One executemany per sentiment
+    by_sentiment = {}
+    for review_id, sentiment in results:
+        by_sentiment.setdefault(sentiment, []).append((review_id,))
+
+    for sentiment, rows in by_sentiment.items():
+        cursor.executemany(f"""
+            UPDATE place_stats SET pending_count = pending_count - 1, {sentiment}_count = {sentiment}_count + 1
+            WHERE place_id = (SELECT {column} FROM {table} WHERE id = %s AND sentiment = 'pending')
+        """, rows)
+
+# Function to rebuild the stats of places from their reviews
+def rebuild_place_stats(cursor, place_type, place_ids=None):
+    """
+    Recomputes the stats of places from their review table, in the caller's transaction.
+
+    Args:
+        cursor: Cursor of the transaction.
+        place_type (str): 'accommodations', 'tours' or 'culinaries'.
+        place_ids (list, optional): Ids of the places to rebuild, every place of the type by default.
+
+    Returns:
+        int: The number of places with reviews.
+    """
+    column = REVIEW_PLACE_COLUMNS[place_type]
+    if place_ids is not None:
+        place_ids = list(dict.fromkeys(place_ids))
+        if not place_ids:
+            return 0
+        placeholders = ', '.join(['%s'] * len(place_ids))
+        cursor.execute(f"DELETE FROM place_stats WHERE place_type = %s AND place_id IN ({placeholders})", (place_type, *place_ids))
+        where = f"WHERE {column} IN ({placeholders})"
+        params = (place_type, *place_ids)
+    else:
+        cursor.execute("DELETE FROM place_stats WHERE place_type = %s", (place_type,))
+        where = ""
+        params = (place_type,)
+
+    counts = ', '.join(f"{sentiment}_count" for sentiment in SENTIMENTS)
+    sums = ', '.join(f"SUM(CASE WHEN sentiment = '{sentiment}' THEN 1 ELSE 0 END)" for sentiment in SENTIMENTS)
+    cursor.execute(f"""
+        INSERT INTO place_stats (place_id, place_type, review_count, rating_sum, rated_count, {counts})
+        SELECT {column}, %s, COUNT(*), COALESCE(SUM(rating), 0), COUNT(rating), {sums}
+        FROM {REVIEW_TABLES[place_type]}
+        {where}
+        GROUP BY {column}
+    """, params)
+    return cursor.rowcount
+
+# Function to rebuild the stats of every place of one or every type
+def reconcile_place_stats(place_type=None, place_ids=None):
+    """
+    Rebuilds the place stats in bulk from the review tables, e.g. after reviews were changed
+    outside of the API or to repair drift.
+
+    Args:
+        place_type (str, optional): 'accommodations', 'tours' or 'culinaries', every type by default.
+        place_ids (list, optional): Ids of the places to rebuild, every place by default.
+
+    Returns:
+        dict: The number of places with reviews, by place type.
+    """
+    place_types = [place_type] if place_type else list(REVIEW_TABLES)
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        rebuilt = {name: rebuild_place_stats(cursor, name, place_ids) for name in place_types}
+        conn.commit()
+    return rebuilt
+
+# Function to turn a place_stats row into review aggregates
+def stats_aggregates(row):
+    """
+    Formats the stats of a place.
+
+    Args:
+        row (tuple or None): (review_count, rating_sum, rated_count, *sentiment counts), None for places without reviews.
+
+    Returns:
+        dict: 'count', 'average_rating' (None without rated reviews) and 'sentiments' (count per sentiment).
+    """
+    if row is None:
+        return {'count': 0, 'average_rating': None, 'sentiments': dict.fromkeys(SENTIMENTS, 0)}
+
+    count, rating_sum, rated = row[0], float(row[1] or 0), row[2]
+    return {
+        'count': int(count),
+        'average_rating': round(rating_sum / rated, 2) if rated else None,
+        'sentiments': {sentiment: int(value) for sentiment, value in zip(SENTIMENTS, row[3:])}
+    }
+
+# Function to read the stats of a place
+def get_place_stats(place_id):
+    """
+    Reads the review count, average rating and sentiment histogram of a place with one primary key lookup.
+
+    Args:
+        place_id (str): Id of the place.
+
+    Returns:
+        dict: 'count', 'average_rating' and 'sentiments', zero counts for places without reviews.
+    """
+    counts = ', '.join(f"{sentiment}_count" for sentiment in SENTIMENTS)
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT review_count, rating_sum, rated_count, {counts} FROM place_stats WHERE place_id = %s", (place_id,))
+        row = cursor.fetchone()
+    return stats_aggregates(row)
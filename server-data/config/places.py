@@ -0,0 +1,365 @@
+import decimal
+import json
+import os
+import random
+import threading
+import time
+from dotenv import load_dotenv
+from config.lru_cache import LRUCache
+from config.sql_engine import db_connection
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Columns of every place table, in table order
+PLACE_COLUMNS = {
+    'accommodations': ('id', 'name', 'rating', 'price_wna', 'city'),
+    'tours': ('id', 'name', 'rating', 'category', 'price_wna', 'city', 'address', 'google_maps'),
+    'culinaries': ('id', 'name', 'rating', 'category', 'price_wna', 'city', 'address')
+}
+
+# Listing settings
+CHUNK_SIZE = int(os.getenv('PLACES_CHUNK_SIZE', 500))     # Rows read from the database at once
+MAX_LIMIT = int(os.getenv('PLACES_MAX_LIMIT', 1000))      # Largest page size
+DIRECTORY_REFRESH_SECONDS = float(os.getenv('PLACES_DIRECTORY_REFRESH_SECONDS', 300))  # Age of the id directory before it is read again
+RANDOM_COUNT = 10                                         # Number of places returned by /places/<category>/random
+DETAIL_CACHE_SIZE = int(os.getenv('PLACES_DETAIL_CACHE_SIZE', 5000))  # Place details kept in memory
+MAX_DETAIL_IDS = int(os.getenv('PLACES_MAX_DETAIL_IDS', 100))         # Largest number of ids in one detail request
+
+# Function to parse the listing options of /places/<category>/all
+def parse_listing(category, args):
+    """
+    Validates the query parameters of a place listing.
+
+    Args:
+        category (str): 'accommodations', 'tours' or 'culinaries'.
+        args (dict): Query parameters: 'after_id', 'limit', 'fields', 'city' and 'category'.
+
+    Returns:
+        tuple: (options, error), options is None when error is set.
+    """
+    columns = PLACE_COLUMNS[category]
+
+    # Rows are paged by id, so the id is always returned
+    fields = args.get('fields')
+    if fields:
+        requested = [field.strip() for field in fields.split(',') if field.strip()]
+        unknown = [field for field in requested if field not in columns]
+        if unknown:
+            return None, f"Unknown fields: {', '.join(unknown)}. Available fields: {', '.join(columns)}."
+        columns = ['id'] + [field for field in columns if field in requested and field != 'id']
+
+    limit = args.get('limit')
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            return None, "limit must be an integer."
+        if not 1 <= limit <= MAX_LIMIT:
+            return None, f"limit must be between 1 and {MAX_LIMIT}."
+
+    filters = {}
+    if args.get('city'):
+        filters['city'] = args['city']
+    if args.get('category'):
+        if 'category' not in PLACE_COLUMNS[category]:
+            return None, f"'{category}' cannot be filtered by category."
+        filters['category'] = args['category']
+
+    return {
+        'category': category,
+        'columns': list(columns),
+        'filters': filters,
+        'after_id': args.get('after_id') or None,
+        'limit': limit
+    }, None
+
+# Function to convert database values to JSON values
+def json_value(value):
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    return value
+
+# Function to read one chunk of places after an id
+def fetch_places(options, after_id, size):
+    """
+    Reads the next places in id order.
+
+    Args:
+        options (dict): Listing options from `parse_listing`.
+        after_id (str or None): Id of the last place already read, None to start from the first place.
+        size (int): Largest number of places to read.
+
+    Returns:
+        list: The places as dictionaries of the selected columns.
+    """
+    conditions = []
+    params = []
+    if after_id is not None:
+        conditions.append("id > %s")
+        params.append(after_id)
+    for column, value in options['filters'].items():
+        conditions.append(f"{column} = %s")
+        params.append(value)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = f"SELECT {', '.join(options['columns'])} FROM {options['category']} {where} ORDER BY id LIMIT %s"
+    params.append(size)
+
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, tuple(params))
+        rows = cursor.fetchall()
+
+    return [{column: json_value(value) for column, value in zip(options['columns'], row)} for row in rows]
+
+# Function to stream a listing as a JSON document
+def stream_places(options, first_chunk):
+    """
+    Generates the JSON document of a listing, one chunk of places at a time.
+
+    Only one chunk is held in memory, and every chunk is read with its own short query, so no
+    database connection is held while the client reads the response.
+
+    Args:
+        options (dict): Listing options from `parse_listing`.
+        first_chunk (list): The first chunk, already read to answer 404 on empty listings.
+
+    Yields:
+        str: Parts of the '{"items": [...], "next_after_id": ...}' document.
+    """
+    limit = options['limit']
+    chunk = first_chunk
+    sent = 0
+    last_id = None
+
+    yield '{"items": ['
+    while chunk:
+        for place in chunk:
+            yield (', ' if sent else '') + json.dumps(place, sort_keys=True, default=str)
+            sent += 1
+        last_id = chunk[-1]['id']
+
+        # A short chunk is the end of the table
+        remaining = CHUNK_SIZE if limit is None else min(CHUNK_SIZE, limit - sent)
+        if len(chunk) < CHUNK_SIZE or remaining <= 0:
+            break
+        chunk = fetch_places(options, last_id, remaining)
+
+    # The next page starts after the last place of a full page
+    next_after_id = last_id if limit is not None and sent == limit else None
+    yield '], "next_after_id": ' + json.dumps(next_after_id) + '}'
+
+# Function to read places by id
+def fetch_places_by_id(category, ids, columns=None):
+    """
+    Reads places by primary key.
+
+    Args:
+        category (str): 'accommodations', 'tours' or 'culinaries'.
+        ids (list): Ids of the places to read.
+        columns (list, optional): Columns to read, every column by default.
+
+    Returns:
+        list: The places found, as dictionaries, in the order of `ids`.
+    """
+    if not ids:
+        return []
+
+    columns = list(columns or PLACE_COLUMNS[category])
+    placeholders = ', '.join(['%s'] * len(ids))
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT {', '.join(columns)} FROM {category} WHERE id IN ({placeholders})", tuple(ids))
+        rows = cursor.fetchall()
+
+    places = {}
+    for row in rows:
+        place = {column: json_value(value) for column, value in zip(columns, row)}
+        places[place['id']] = place
+    return [places[place_id] for place_id in ids if place_id in places]
+
+# In-memory directory of place ids
+class PlaceDirectory:
+    """
+    Keeps the ids of every place, overall and by city, to sample places without reading the tables.
+
+    The ids of a category are read with one query over the primary key and the city, and read
+    again once they are older than DIRECTORY_REFRESH_SECONDS, or right away after `invalidate`.
+    Requests keep sampling from the previous ids while they are read again.
+    """
+
+    def __init__(self, refresh_seconds=DIRECTORY_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def load(self, category):
+        """
+        Reads the ids of a category.
+
+        Args:
+            category (str): 'accommodations', 'tours' or 'culinaries'.
+
+        Returns:
+            dict: The sorted 'ids', their set of 'members', the ids 'by_city' (lower-cased city to ids) and 'loaded_at'.
+        """
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT id, city FROM {category} ORDER BY id")
+            rows = cursor.fetchall()
+
+        by_city = {}
+        for place_id, city in rows:
+            by_city.setdefault((city or '').strip().lower(), []).append(place_id)
+
+        ids = [row[0] for row in rows]
+        return {'ids': ids, 'members': set(ids), 'by_city': by_city, 'loaded_at': time.monotonic()}
+
+    def get(self, category):
+        entry = self.entries.get(category)
+        if entry is not None and time.monotonic() - entry['loaded_at'] <= self.refresh_seconds:
+            return entry
+
+        # Old ids are read again by one request while the others keep using them, missing ids are waited for
+        if not self.lock.acquire(blocking=entry is None):
+            return entry
+        try:
+            current = self.entries.get(category)
+            if current is None or current is entry:
+                current = self.load(category)
+                self.entries[category] = current
+            return current
+        finally:
+            self.lock.release()
+
+    def invalidate(self, category=None):
+        """
+        Drops the ids of a category, or of every category, so the next request reads them again.
+
+        Args:
+            category (str, optional): Category to drop, every category by default.
+        """
+        if category is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(category, None)
+
+    def category_of(self, place_id):
+        """
+        Finds the category of a place.
+
+        Args:
+            place_id (str): Id of the place.
+
+        Returns:
+            str or None: 'accommodations', 'tours' or 'culinaries', None for unknown ids.
+        """
+        for category in PLACE_COLUMNS:
+            if place_id in self.get(category)['members']:
+                return category
+
+        # Places added since the ids were read are looked up by primary key
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            for category in PLACE_COLUMNS:
+                cursor.execute(f"SELECT 1 FROM {category} WHERE id = %s", (place_id,))
+                if cursor.fetchone():
+                    self.invalidate(category)
+                    return category
+        return None
+
+    def sample(self, category, count, city=None, seed=None):
+        """
+        Picks random place ids.
+
+        Args:
+            category (str): 'accommodations', 'tours' or 'culinaries'.
+            count (int): Number of ids to pick, fewer if the category has fewer places.
+            city (str, optional): Only pick places of this city.
+            seed (int, optional): Seed for a reproducible pick, as long as the places do not change.
+
+        Returns:
+            list: The picked ids.
+        """
+        entry = self.get(category)
+        ids = entry['by_city'].get(city.strip().lower(), []) if city else entry['ids']
+        rng = random.Random(seed) if seed is not None else random
+        return rng.sample(ids, min(count, len(ids)))
+
+# Read-through cache of place details
+class PlaceDetails:
+    """
+    Serves place details from a bounded LRU cache keyed by (category, id).
+
+    Places missing from the cache are read in one query by primary key and cached. Place
+    details rarely change, so entries stay until they are evicted or invalidated; code that
+    changes a place must call `invalidate`. Unknown ids are not cached, so new places show up
+    right away.
+    """
+
+    def __init__(self, cache_size=DETAIL_CACHE_SIZE):
+        self.cache = LRUCache(cache_size)
+
+    def get_many(self, category, ids):
+        """
+        Returns the details of several places.
+
+        Args:
+            category (str): 'accommodations', 'tours' or 'culinaries'.
+            ids (list): Ids of the places.
+
+        Returns:
+            list: The details of the places found, in the order of `ids`. Callers must not modify them.
+        """
+        keys = [(category, place_id) for place_id in ids]
+        found = self.cache.get_many(keys)
+
+        missing = [place_id for place_id in dict.fromkeys(ids) if (category, place_id) not in found]
+        if missing:
+            places = {(category, place['id']): place for place in fetch_places_by_id(category, missing)}
+            self.cache.put_many(places)
+            found.update(places)
+
+        return [found[key] for key in keys if key in found]
+
+    def get(self, category, place_id):
+        # Details of one place, None if it does not exist
+        places = self.get_many(category, [place_id])
+        return places[0] if places else None
+
+    def invalidate(self, category=None, ids=None):
+        """
+        Drops cached details, so they are read again on the next request.
+
+        Args:
+            category (str, optional): Only drop the details of this category.
+            ids (list, optional): Only drop the details of these places.
+
+        Returns:
+            int: The number of dropped entries.
+        """
+        ids = set(ids) if ids is not None else None
+        return self.cache.delete_where(lambda key: (category is None or key[0] == category) and (ids is None or key[1] in ids))
+
+    def stats(self):
+        return self.cache.stats()
+
+# Function to drop everything cached about places
+def invalidate_places(category=None, ids=None):
+    """
+    Invalidation hook for code that inserts, updates or deletes places.
+
+    Args:
+        category (str, optional): Category of the changed places, every category by default.
+        ids (list, optional): Ids of the changed places, every place of the category by default.
+
+    Returns:
+        int: The number of dropped place details.
+    """
+    place_directory.invalidate(category)
+    return place_details.invalidate(category, ids)
+
+# Directory and detail cache shared by the API handlers
+place_directory = PlaceDirectory()
+place_details = PlaceDetails()
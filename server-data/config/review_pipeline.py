@@ -0,0 +1,336 @@
+import os
+import queue
+import threading
+import time
+from dotenv import load_dotenv
+from config.place_stats import PLACE_TYPES, rebuild_place_stats, record_sentiments
+from config.review_tables import REVIEW_TABLES
+from config.sentiment import sentiment_service
+from config.sql_engine import db_connection
+from config.translation import TRANSLATOR
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Pipeline settings
+WORKERS = int(os.getenv('REVIEW_WORKERS', 2))                   # Worker threads
+BATCH_SIZE = int(os.getenv('REVIEW_BATCH_SIZE', 16))            # Largest number of reviews per batch
+BATCH_WAIT = float(os.getenv('REVIEW_BATCH_WAIT', 0.5))         # Seconds spent filling a batch
+MAX_ATTEMPTS = int(os.getenv('REVIEW_MAX_ATTEMPTS', 3))         # Translation attempts before keeping the original text
+RETRY_SECONDS = float(os.getenv('REVIEW_RETRY_SECONDS', 5))     # Delay before the first translation retry, doubled after each attempt
+RESCORE_CHUNK_SIZE = int(os.getenv('RESCORE_CHUNK_SIZE', 1000))  # Rows read and updated at once when re-scoring reviews
+
+# Background translation and sentiment analysis of submitted reviews
+class ReviewPipeline:
+    """
+    Translates and analyzes reviews off the request path.
+
+    Reviews are inserted with the 'pending' sentiment and submitted to a queue. Worker threads
+    take them in batches, translate and score every batch with the sentiment service and update
+    the rows and the sentiment counts of their places. When the translation fails, the batch is retried later; after MAX_ATTEMPTS
+    the review keeps its original text, so an outage of the translation service never loses a
+    review. Reviews left pending by a restart are queued again when the pipeline starts.
+    """
+
+    def __init__(self, service=sentiment_service, workers=WORKERS, batch_size=BATCH_SIZE, batch_wait=BATCH_WAIT):
+        self.service = service
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.threads = []
+        self.backlog = 0
+        self.in_progress = 0
+        self.retrying = 0
+        self.counters = {'submitted': 0, 'processed': 0, 'batches': 0, 'retries': 0, 'untranslated': 0, 'errors': 0}
+
+    def submit(self, table, review_id, text, attempts=0):
+        """
+        Queues a pending review for translation and sentiment analysis.
+
+        Args:
+            table (str): Review table of the row, one of REVIEW_TABLES.
+            review_id (str): ID of the review row.
+            text (str): Review text as submitted by the user.
+            attempts (int, optional): Failed translation attempts so far.
+        """
+        with self.lock:
+            if attempts == 0:
+                self.counters['submitted'] += 1
+                self.backlog += 1
+        self.queue.put((table, review_id, text, attempts))
+
+    def recover(self):
+        """
+        Queues the reviews that are still pending in the database, e.g. after a restart.
+
+        Returns:
+            int: The number of queued reviews.
+        """
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            pending = []
+            for table in REVIEW_TABLES.values():
+                cursor.execute(f"SELECT id, reviews FROM {table} WHERE sentiment = 'pending'")
+                pending.extend((table, review_id, text) for review_id, text in cursor.fetchall())
+
+        for table, review_id, text in pending:
+            self.submit(table, review_id, text or '')
+        return len(pending)
+
+    def start(self):
+        """
+        Starts the worker threads once and queues the reviews left pending.
+        """
+        if self.threads:
+            return
+
+        # Fail at startup rather than in the workers when the backend is misconfigured
+        self.service.get_translator()
+
+        try:
+            recovered = self.recover()
+            if recovered:
+                print(f"Queued {recovered} pending reviews")
+        except Exception as e:
+            print("Failed to queue pending reviews:", e)
+
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'review-pipeline-{i}', daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def _next_batch(self):
+        # Wait for one review, then fill the batch for at most batch_wait seconds
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            with self.lock:
+                self.in_progress += len(batch)
+            try:
+                self.process(batch)
+            except Exception as e:
+                print("Failed to process reviews:", e)
+                with self.lock:
+                    self.counters['errors'] += 1
+            finally:
+                with self.lock:
+                    self.in_progress -= len(batch)
+
+    def _retry_later(self, items, delay):
+        # Queue the reviews again once the delay is over, without blocking a worker
+        def retry():
+            with self.lock:
+                self.retrying -= len(items)
+            for table, review_id, text, attempts in items:
+                self.submit(table, review_id, text, attempts)
+
+        with self.lock:
+            self.retrying += len(items)
+            self.counters['retries'] += len(items)
+        timer = threading.Timer(delay, retry)
+        timer.daemon = True
+        timer.start()
+
+    def process(self, batch):
+        """
+        Translates a batch of reviews, analyzes their sentiment and updates their rows.
+
+        Args:
+            batch (list): (table, review_id, text, attempts) tuples.
+        """
+        texts = [item[2] for item in batch]
+        try:
+            translated = self.service.translate(texts)
+        except Exception as e:
+            print("Review translation failed:", e)
+            # A batch can mix first tries and retries, each waits the backoff of its own attempt
+            retry = {}
+            for table, review_id, text, attempts in batch:
+                if attempts + 1 < MAX_ATTEMPTS:
+                    retry.setdefault(attempts + 1, []).append((table, review_id, text, attempts + 1))
+            for attempts, items in retry.items():
+                self._retry_later(items, RETRY_SECONDS * 2 ** (attempts - 1))
+
+            # Reviews out of attempts keep their original text
+            batch = [item for item in batch if item[3] + 1 >= MAX_ATTEMPTS]
+            translated = [item[2] for item in batch]
+            with self.lock:
+                self.counters['untranslated'] += len(batch)
+
+        if not batch:
+            return
+
+        try:
+            # One executemany per review table
+            updates = {}
+            for (table, review_id, _, _), (text, _, sentiment) in zip(batch, self.service.analyze(translated, translate=False)):
+                updates.setdefault(table, []).append((text, sentiment, review_id))
+
+            with db_connection() as conn:
+                cursor = conn.cursor()
+                for table, rows in updates.items():
+                    # Place stats first, they only count the reviews that are still pending
+                    record_sentiments(cursor, table, [(review_id, sentiment) for _, sentiment, review_id in rows])
+                    cursor.executemany(f"UPDATE {table} SET reviews = %s, sentiment = %s WHERE id = %s", rows)
+                conn.commit()
+
+            with self.lock:
+                self.counters['processed'] += len(batch)
+                self.counters['batches'] += 1
+        finally:
+            # Reviews that failed here stay pending in the database until the next start
+            with self.lock:
+                self.backlog -= len(batch)
+
+    def stats(self):
+        """
+        Reports the backlog and counters of the pipeline.
+
+        Returns:
+            dict: The backlog (submitted reviews not analyzed yet), how much of it is queued, in
+                  progress or waiting for a retry, the counters, the translator and the number of workers.
+        """
+        with self.lock:
+            return {
+                'backlog': self.backlog,
+                'queued': self.queue.qsize(),
+                'in_progress': self.in_progress,
+                'retrying': self.retrying,
+                **self.counters,
+                'translator': type(self.service.translator).__name__ if self.service.translator else TRANSLATOR,
+                'workers': len(self.threads)
+            }
+
+# Background re-scoring of the stored reviews
+class ReviewRescorer:
+    """
+    Re-scores the stored reviews, for example after the sentiment rules changed.
+
+    Each review table is read in primary key order with keyset pagination, one chunk at a time.
+    Every chunk is scored in one batch by the sentiment service, which scores repeated texts once,
+    and only the rows whose sentiment or text changed are updated. Pending reviews are left to the
+    pipeline. The place stats of every re-scored table are rebuilt at the end. One job runs at a
+    time, in a background thread.
+    """
+
+    def __init__(self, service=sentiment_service):
+        self.service = service
+        self.lock = threading.Lock()
+        self.thread = None
+        self.status = {'running': False}
+
+    def start(self, tables, chunk_size=RESCORE_CHUNK_SIZE, translate=False):
+        """
+        Starts re-scoring review tables in the background.
+
+        Args:
+            tables (list): Review tables to re-score, from REVIEW_TABLES.
+            chunk_size (int, optional): Rows read and updated at once.
+            translate (bool, optional): Whether to translate the reviews again before scoring them.
+
+        Returns:
+            bool: False if a job is already running.
+        """
+        with self.lock:
+            if self.status['running']:
+                return False
+
+            self.status = {
+                'running': True,
+                'tables': list(tables),
+                'chunk_size': chunk_size,
+                'translate': translate,
+                'table': None,
+                'scanned': 0,
+                'updated': 0,
+                'started_at': time.time(),
+                'finished_at': None,
+                'error': None
+            }
+            self.thread = threading.Thread(target=self._run, args=(list(tables), chunk_size, translate), name='review-rescorer', daemon=True)
+            self.thread.start()
+            return True
+
+    def _run(self, tables, chunk_size, translate):
+        try:
+            for table in tables:
+                with self.lock:
+                    self.status['table'] = table
+                self.rescore_table(table, chunk_size, translate)
+
+                # Sentiments changed outside of the pipeline, so the counts are rebuilt in bulk
+                with db_connection() as conn:
+                    cursor = conn.cursor()
+                    rebuild_place_stats(cursor, PLACE_TYPES[table])
+                    conn.commit()
+        except Exception as e:
+            print("Failed to re-score reviews:", e)
+            with self.lock:
+                self.status['error'] = str(e)
+        finally:
+            with self.lock:
+                self.status['running'] = False
+                self.status['finished_at'] = time.time()
+
+    def rescore_table(self, table, chunk_size, translate):
+        """
+        Re-scores one review table, chunk by chunk.
+
+        Args:
+            table (str): Review table to re-score.
+            chunk_size (int): Rows read and updated at once.
+            translate (bool): Whether to translate the reviews again before scoring them.
+        """
+        last_id = ''
+        while True:
+            with db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"""
+                    SELECT id, reviews, sentiment FROM {table}
+                    WHERE id > %s AND sentiment <> 'pending' AND reviews IS NOT NULL
+                    ORDER BY id LIMIT %s
+                """, (last_id, chunk_size))
+                rows = cursor.fetchall()
+
+            if not rows:
+                return
+            last_id = rows[-1][0]
+
+            results = self.service.analyze([row[1] for row in rows], translate)
+            changed = [
+                (text, sentiment, review_id)
+                for (review_id, old_text, old_sentiment), (text, _, sentiment) in zip(rows, results)
+                if sentiment != old_sentiment or text != old_text
+            ]
+
+            if changed:
+                with db_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.executemany(f"UPDATE {table} SET reviews = %s, sentiment = %s WHERE id = %s", changed)
+                    conn.commit()
+
+            with self.lock:
+                self.status['scanned'] += len(rows)
+                self.status['updated'] += len(changed)
+
+    def stats(self):
+        with self.lock:
+            return dict(self.status)
+
+# Pipeline and rescorer shared by the API handlers
+review_pipeline = ReviewPipeline()
+review_rescorer = ReviewRescorer()
@@ -0,0 +1,23 @@
+# Review table of every place type
+REVIEW_TABLES = {
+    'accommodations': 'accommodations_reviews',
+    'tours': 'tours_reviews',
+    'culinaries': 'culinary_reviews'
+}
+
+# Place column of every review table, by place type
+REVIEW_PLACE_COLUMNS = {
+    'accommodations': 'accommodations_id',
+    'tours': 'tours_id',
+    'culinaries': 'culinaries_id'
+}
+
+# Type shown with the reviews of every place type
+REVIEW_TYPES = {
+    'accommodations': 'accommodation',
+    'tours': 'tour',
+    'culinaries': 'culinary'
+}
+
+# Sentiments a review can have, 'pending' until the review pipeline has analyzed it
+SENTIMENTS = ('positive', 'negative', 'neutral', 'pending')
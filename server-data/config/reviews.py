@@ -0,0 +1,90 @@
+import os
+from dotenv import load_dotenv
+from config.places import json_value
+from config.review_tables import REVIEW_PLACE_COLUMNS, REVIEW_TABLES, REVIEW_TYPES
+from config.sql_engine import db_connection
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Orderings of a review page, by sort name and direction
+REVIEW_SORTS = {
+    ('recent', 'desc'): "r.created_at DESC, r.id DESC",
+    ('recent', 'asc'): "r.created_at ASC, r.id ASC",
+    ('rating', 'desc'): "r.rating DESC, r.created_at DESC, r.id DESC",
+    ('rating', 'asc'): "r.rating ASC, r.created_at DESC, r.id DESC"
+}
+
+# Paging settings
+PAGE_SIZE = int(os.getenv('REVIEWS_PAGE_SIZE', 20))     # Reviews per page by default
+MAX_PAGE_SIZE = int(os.getenv('REVIEWS_MAX_PAGE_SIZE', 100))  # Largest page size
+
+# Function to parse the paging options of /places/reviews/<place_id>
+def parse_review_page(args):
+    """
+    Validates the paging and sorting parameters of a review listing.
+
+    Args:
+        args (dict): Query parameters: 'place_type', 'sort', 'order', 'page' and 'limit'.
+
+    Returns:
+        tuple: (options, error), options is None when error is set.
+    """
+    place_type = args.get('place_type')
+    if place_type is not None and place_type not in REVIEW_TABLES:
+        return None, "Invalid place type"
+
+    sort = args.get('sort', 'recent')
+    order = args.get('order', 'desc')
+    if (sort, order) not in REVIEW_SORTS:
+        return None, "sort must be 'recent' or 'rating' and order must be 'desc' or 'asc'"
+
+    try:
+        page = int(args.get('page', 1))
+        limit = int(args.get('limit', PAGE_SIZE))
+    except ValueError:
+        return None, "page and limit must be integers"
+    if page < 1:
+        return None, "page must be at least 1"
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return None, f"limit must be between 1 and {MAX_PAGE_SIZE}"
+
+    return {'place_type': place_type, 'sort': sort, 'order': order, 'page': page, 'limit': limit}, None
+
+# Function to read one page of reviews of a place
+def fetch_reviews(place_type, place_id, sort='recent', order='desc', limit=PAGE_SIZE, offset=0):
+    """
+    Reads one page of reviews of a place with a single query on its review table.
+
+    Args:
+        place_type (str): 'accommodations', 'tours' or 'culinaries'.
+        place_id (str): Id of the place.
+        sort (str, optional): 'recent' or 'rating'.
+        order (str, optional): 'desc' or 'asc'.
+        limit (int, optional): Largest number of reviews.
+        offset (int, optional): Number of reviews to skip.
+
+    Returns:
+        list: The reviews, with the username of their author.
+    """
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT r.id, u.username, r.rating, r.reviews, r.sentiment, r.created_at
+            FROM {REVIEW_TABLES[place_type]} r
+            JOIN users u ON r.user_id = u.id
+            WHERE r.{REVIEW_PLACE_COLUMNS[place_type]} = %s
+            ORDER BY {REVIEW_SORTS[(sort, order)]}
+            LIMIT %s OFFSET %s
+        """, (place_id, limit, offset))
+        rows = cursor.fetchall()
+
+    return [{
+        "review_id": row[0],
+        "username": row[1],   # Show username instead of user_id
+        "rating": json_value(row[2]),
+        "reviews": row[3],
+        "sentiment": row[4],
+        "created_at": row[5].strftime('%Y-%m-%d %H:%M:%S') if hasattr(row[5], 'strftime') else row[5],
+        "type": REVIEW_TYPES[place_type]
+    } for row in rows]
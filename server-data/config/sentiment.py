@@ -0,0 +1,117 @@
+import hashlib
+import os
+import threading
+from dotenv import load_dotenv
+from textblob import TextBlob
+from config.lru_cache import LRUCache
+from config.translation import get_translator
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Number of translations and of polarities kept in memory
+CACHE_SIZE = int(os.getenv('SENTIMENT_CACHE_SIZE', 10000))
+
+# Largest number of texts accepted by the sentiment API in one request
+MAX_BATCH_TEXTS = int(os.getenv('SENTIMENT_MAX_TEXTS', 1000))
+
+# Function to turn a polarity into a sentiment label
+def sentiment_label(polarity):
+    if polarity > 0.1:
+        return 'positive'
+    elif polarity < -0.1:
+        return 'negative'
+    else:
+        return 'neutral'
+
+# Function to hash a text into a cache key
+def content_key(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+# Batched translation and sentiment scoring
+class SentimentService:
+    """
+    Translates and scores batches of review texts.
+
+    Every batch is deduplicated by content hash, so a text repeated in a batch or seen in an
+    earlier batch is translated and scored once. Only the texts missing from the caches are
+    sent to the translation backend, in a single call per batch.
+    """
+
+    def __init__(self, translator=None, cache_size=CACHE_SIZE):
+        self.translator = translator
+        self.translations = LRUCache(cache_size)
+        self.polarities = LRUCache(cache_size)
+        self.lock = threading.Lock()
+
+    def get_translator(self):
+        # Create the configured backend on first use
+        with self.lock:
+            if self.translator is None:
+                self.translator = get_translator()
+            return self.translator
+
+    def _cached_batch(self, texts, cache, compute):
+        # Map every distinct text to its key, then compute the results missing from the cache
+        keys = [content_key(text) for text in texts]
+        unique = dict(zip(keys, texts))
+        results = cache.get_many(list(unique))
+
+        missing = [key for key in unique if key not in results]
+        if missing:
+            computed = dict(zip(missing, compute([unique[key] for key in missing])))
+            cache.put_many(computed)
+            results.update(computed)
+
+        return [results[key] for key in keys]
+
+    def translate(self, texts):
+        """
+        Translates a batch of texts to English.
+
+        Args:
+            texts (list): Texts in any language.
+
+        Returns:
+            list: The English texts, in the same order.
+        """
+        return self._cached_batch(texts, self.translations, lambda missing: self.get_translator().translate(missing))
+
+    def polarity(self, texts):
+        """
+        Computes the TextBlob polarity of a batch of texts.
+
+        Args:
+            texts (list): English texts.
+
+        Returns:
+            list: Polarities between -1 and 1, in the same order.
+        """
+        return self._cached_batch(texts, self.polarities, lambda missing: [TextBlob(text).sentiment.polarity for text in missing])
+
+    def analyze(self, texts, translate=True):
+        """
+        Translates (optionally) and scores a batch of texts.
+
+        Args:
+            texts (list): Review texts.
+            translate (bool, optional): Whether to translate the texts to English before scoring them.
+
+        Returns:
+            list: (translated text, polarity, sentiment) tuples, in the same order.
+        """
+        translated = self.translate(texts) if translate else list(texts)
+        polarities = self.polarity(translated)
+        return [(text, polarity, sentiment_label(polarity)) for text, polarity in zip(translated, polarities)]
+
+    def stats(self):
+        """
+        Reports the translation and polarity caches.
+
+        Returns:
+            dict: The size, hits, misses, evictions and hit rate of each cache.
+        """
+        return {'translations': self.translations.stats(), 'polarities': self.polarities.stats()}
+
+# Service shared by the review pipeline and the API handlers
+sentiment_service = SentimentService()
@@ -1,5 +1,6 @@
 import os
 import sqlalchemy as sa
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -17,8 +18,26 @@ Config = {
 # Construct the SQLAlchemy connection string
 engineURL = f"mysql+mysqlconnector://{Config['username']}:{Config['password']}@{Config['host']}:{Config['port']}/{Config['database']}"
 
-# Create the SQLAlchemy engine
-engine = sa.create_engine(engineURL)
+# Connection pool settings
+Pool = {
+    'size': int(os.getenv('DB_POOL_SIZE', 5)),                  # Connections kept open
+    'max_overflow': int(os.getenv('DB_POOL_MAX_OVERFLOW', 10)),  # Extra connections opened under load
+    'timeout': float(os.getenv('DB_POOL_TIMEOUT', 30)),          # Seconds to wait for a free connection
+    'recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),          # Seconds before a connection is reopened
+    'pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')  # Check connections before use
+}
+
+# Create the SQLAlchemy engine, its pool is shared by the API handlers and the review pipeline workers through db_connection
+engine = sa.create_engine(
+    engineURL,
+    pool_size=Pool['size'],
+    max_overflow=Pool['max_overflow'],
+    pool_timeout=Pool['timeout'],
+    pool_recycle=Pool['recycle'],
+    pool_pre_ping=Pool['pre_ping'],
+    # Buffered cursors, so a connection with unread rows can still be rolled back and reused
+    connect_args={'buffered': True}
+)
 
 # Test the connection to the MySQL database
 def test_connection():
@@ -31,3 +50,42 @@ def test_connection():
 # You can also export the engine to be used in other parts of the app
 def get_engine():
     return engine
+
+# Borrow a pooled MySQL connection
+@contextmanager
+def db_connection():
+    """
+    Context manager that borrows a DB-API connection from the engine pool.
+
+    The connection is returned to the pool when the block exits, even on errors. Uncommitted
+    changes are rolled back when it is returned, so call `commit()` before leaving the block.
+
+    Yields:
+        Connection: A mysql.connector connection, used with `cursor()` and `commit()`.
+    """
+    connection = engine.raw_connection()
+    try:
+        yield connection
+    finally:
+        connection.close()
+
+# Report the pool utilization
+def pool_stats():
+    """
+    Reports how many pooled connections are open and in use.
+
+    Returns:
+        dict: The pool size and overflow limit, the open, checked out and idle connections, and the
+              share of the largest number of connections in use.
+    """
+    pool = engine.pool
+    capacity = Pool['size'] + Pool['max_overflow']
+    checked_out = pool.checkedout()
+    return {
+        'size': Pool['size'],
+        'max_overflow': Pool['max_overflow'],
+        'open': pool.size() + pool.overflow(),
+        'checked_out': checked_out,
+        'checked_in': pool.checkedin(),
+        'utilization': round(checked_out / capacity, 4) if capacity else None
+    }
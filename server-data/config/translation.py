@@ -0,0 +1,63 @@
+import os
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Translation backend used for reviews: 'google' or the local 'identity' stand-in
+TRANSLATOR = os.getenv('REVIEW_TRANSLATOR', 'google')
+
+# Google Translate backend
+class GoogleTranslator:
+    """
+    Translates texts to English with googletrans, reusing one client for every batch.
+    """
+
+    def __init__(self):
+        # Imported here so the local backend works without googletrans installed
+        from googletrans import Translator
+        self.client = Translator()
+
+    def translate(self, texts):
+        """
+        Translates a batch of texts to English.
+
+        Args:
+            texts (list): Texts in any language.
+
+        Returns:
+            list: The English texts, in the same order.
+        """
+        translated = self.client.translate(list(texts), src='auto', dest='en')
+        return [result.text for result in translated]
+
+# Local stand-in backend
+class IdentityTranslator:
+    """
+    Keeps texts as they are, for development and deployments without a translation service.
+    """
+
+    def translate(self, texts):
+        return list(texts)
+
+# Available translation backends
+TRANSLATORS = {
+    'google': GoogleTranslator,
+    'identity': IdentityTranslator
+}
+
+# Create the configured translation backend
+def get_translator(name=None):
+    """
+    Creates a translation backend.
+
+    Args:
+        name (str, optional): Backend name, REVIEW_TRANSLATOR by default.
+
+    Returns:
+        object: A backend with a `translate(texts)` method.
+    """
+    name = name or TRANSLATOR
+    if name not in TRANSLATORS:
+        raise ValueError(f"Unknown translator '{name}', expected one of: {', '.join(TRANSLATORS)}")
+    return TRANSLATORS[name]()
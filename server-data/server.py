@@ -1,6 +1,4 @@
 # Import the required libraries
-import mysql.connector
-import pandas as pd
 import datetime
 import requests
 import random
@@ -10,11 +8,15 @@ import uuid
 import re
 import os
 
-from config.sql_engine import Config, test_connection, get_engine, engine
-from flask import Flask, request, jsonify
-from googletrans import Translator
+from config.sql_engine import Config, test_connection, db_connection, pool_stats
+from config.review_pipeline import RESCORE_CHUNK_SIZE, review_pipeline, review_rescorer
+from config.review_tables import REVIEW_PLACE_COLUMNS, REVIEW_TABLES, REVIEW_TYPES, SENTIMENTS
+from config.sentiment import MAX_BATCH_TEXTS, sentiment_service
+from config.places import CHUNK_SIZE, MAX_DETAIL_IDS, PLACE_COLUMNS, RANDOM_COUNT, fetch_places, invalidate_places, parse_listing, place_details, place_directory, stream_places
+from config.place_stats import get_place_stats, reconcile_place_stats, rebuild_place_stats, record_review
+from config.reviews import fetch_reviews, parse_review_page
+from flask import Flask, Response, request, jsonify, stream_with_context
 from dotenv import load_dotenv
-from textblob import TextBlob
 
 
 # Load environment variables
@@ -35,20 +37,6 @@ app.config.from_mapping({
 # Test database connection at startup (optional)
 test_connection()
 
-# MySQL database connection setup using the engine from config.sql_engine
-def get_db_connection():
-    engine = get_engine()  # Get the engine from config
-    return engine.connect()
-
-# MySQL database connection setup
-def get_db_connection():
-    return mysql.connector.connect(
-        host=app.config['MYSQL_HOST'],
-        user=app.config['MYSQL_USER'],
-        password=app.config['MYSQL_PASSWORD'],
-        database=app.config['MYSQL_DATABASE']
-    )
-
 # Helper function for username validation
 def validate_username(username):
     return bool(re.match(r'^[A-Za-z0-9._]+$', username))
@@ -82,26 +70,23 @@ def register():
     if not email or not phone_number:
         return jsonify({'error': 'Email and phone number are required.'}), 400
 
-    # Check if user already exists
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE username = %s OR email = %s", (username, email))
-    existing_user = cursor.fetchone()
-    conn.close()
+    with db_connection() as conn:
+        cursor = conn.cursor()
+
+        # Check if user already exists
+        cursor.execute("SELECT * FROM users WHERE username = %s OR email = %s", (username, email))
+        existing_user = cursor.fetchone()
 
-    if existing_user:
-        return jsonify({'error': 'Username or email already exists.'}), 400
+        if existing_user:
+            return jsonify({'error': 'Username or email already exists.'}), 400
 
-    # Generate random user ID
-    user_id = generate_random_id()
+        # Generate random user ID
+        user_id = generate_random_id()
 
-    # Store the plain-text password (not recommended for production)
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO users (id, username, email, password, phone_number) VALUES (%s, %s, %s, %s, %s)",
-                   (user_id, username, email, password, phone_number))
-    conn.commit()
-    conn.close()
+        # Store the plain-text password (not recommended for production)
+        cursor.execute("INSERT INTO users (id, username, email, password, phone_number) VALUES (%s, %s, %s, %s, %s)",
+                       (user_id, username, email, password, phone_number))
+        conn.commit()
 
     return jsonify({'message': 'User registered successfully!'}), 201
 
@@ -117,19 +102,17 @@ def login():
         return jsonify({'error': 'Username and password are required'}), 400
 
     # Check the database for the user
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
-    user = cursor.fetchone()
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
+        user = cursor.fetchone()
 
     # If user not found or password doesn't match
     if not user or user[3] != password:  # Assuming password is stored in the 4th column (index 3)
-        conn.close()
         return jsonify({'error': 'Invalid username or password'}), 401
 
     # Return success and user_id (assuming user[0] is user_id)
     user_id = user[0]
-    conn.close()
     return jsonify({'message': 'Login successful', 'user_id': user_id}), 200
 
 # API endpoint to update user info (email, phone, password)
@@ -147,41 +130,38 @@ def update_user():
     if not username or not current_password:
         return jsonify({'error': 'Username and current password are required.'}), 400
 
-    # Find user by username
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
-    user = cursor.fetchone()
+    with db_connection() as conn:
+        cursor = conn.cursor()
+
+        # Find user by username
+        cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
+        user = cursor.fetchone()
 
-    if not user or user[3] != current_password:  # user[3] is the password field (plain-text comparison)
-        conn.close()
-        return jsonify({'error': 'Invalid credentials.'}), 401
+        if not user or user[3] != current_password:  # user[3] is the password field (plain-text comparison)
+            return jsonify({'error': 'Invalid credentials.'}), 401
 
-    # Check for duplicate email and phone number if provided
-    if new_email:
-        cursor.execute("SELECT * FROM users WHERE email = %s", (new_email,))
-        if cursor.fetchone():
-            conn.close()
-            return jsonify({'error': 'Email address already in use.'}), 400
+        # Check for duplicate email and phone number if provided
+        if new_email:
+            cursor.execute("SELECT * FROM users WHERE email = %s", (new_email,))
+            if cursor.fetchone():
+                return jsonify({'error': 'Email address already in use.'}), 400
 
-    if new_phone:
-        cursor.execute("SELECT * FROM users WHERE phone_number = %s", (new_phone,))
-        if cursor.fetchone():
-            conn.close()
-            return jsonify({'error': 'Phone number already in use.'}), 400
+        if new_phone:
+            cursor.execute("SELECT * FROM users WHERE phone_number = %s", (new_phone,))
+            if cursor.fetchone():
+                return jsonify({'error': 'Phone number already in use.'}), 400
 
-    # Update user information if the new data is provided
-    if new_password:
-        cursor.execute("UPDATE users SET password = %s WHERE username = %s", (new_password, username))
+        # Update user information if the new data is provided
+        if new_password:
+            cursor.execute("UPDATE users SET password = %s WHERE username = %s", (new_password, username))
 
-    if new_email:
-        cursor.execute("UPDATE users SET email = %s WHERE username = %s", (new_email, username))
+        if new_email:
+            cursor.execute("UPDATE users SET email = %s WHERE username = %s", (new_email, username))
 
-    if new_phone:
-        cursor.execute("UPDATE users SET phone_number = %s WHERE username = %s", (new_phone, username))
+        if new_phone:
+            cursor.execute("UPDATE users SET phone_number = %s WHERE username = %s", (new_phone, username))
 
-    conn.commit()
-    conn.close()
+        conn.commit()
 
     return jsonify({'message': 'User information updated successfully.'}), 200
 
@@ -197,33 +177,36 @@ def delete_user():
     if not username or not password:
         return jsonify({'error': 'Username and password are required.'}), 400
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    with db_connection() as conn:
+        cursor = conn.cursor()
 
-    # Step 1: Find user by username
-    cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
-    user = cursor.fetchone()
+        # Step 1: Find user by username
+        cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
+        user = cursor.fetchone()
 
-    if not user or user[3] != password:  # user[3] is the password field (plain-text comparison)
-        cursor.close()
-        conn.close()
-        return jsonify({'error': 'Invalid credentials.'}), 401
+        if not user or user[3] != password:  # user[3] is the password field (plain-text comparison)
+            return jsonify({'error': 'Invalid credentials.'}), 401
 
-    user_id = user[0]  # Assuming user[0] is the user_id
+        user_id = user[0]  # Assuming user[0] is the user_id
 
-    # Step 2: Delete related data from dependent tables
-    cursor.execute("DELETE FROM itineraries WHERE user_id = %s", (user_id,))
-    cursor.execute("DELETE FROM accommodations_reviews WHERE user_id = %s", (user_id,))
-    cursor.execute("DELETE FROM tours_reviews WHERE user_id = %s", (user_id,))
-    cursor.execute("DELETE FROM culinary_reviews WHERE user_id = %s", (user_id,))
-    cursor.execute("DELETE FROM expenses WHERE user_id = %s", (user_id,))
+        # Step 2: Find the places reviewed by the user, their stats are rebuilt without the deleted reviews
+        reviewed = {}
+        for place_type, table in REVIEW_TABLES.items():
+            cursor.execute(f"SELECT DISTINCT {REVIEW_PLACE_COLUMNS[place_type]} FROM {table} WHERE user_id = %s", (user_id,))
+            reviewed[place_type] = [row[0] for row in cursor.fetchall()]
 
-    # Step 3: Delete the user from the users table
-    cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
-    conn.commit()
+        # Step 3: Delete related data from dependent tables
+        cursor.execute("DELETE FROM itineraries WHERE user_id = %s", (user_id,))
+        cursor.execute("DELETE FROM accommodations_reviews WHERE user_id = %s", (user_id,))
+        cursor.execute("DELETE FROM tours_reviews WHERE user_id = %s", (user_id,))
+        cursor.execute("DELETE FROM culinary_reviews WHERE user_id = %s", (user_id,))
+        cursor.execute("DELETE FROM expenses WHERE user_id = %s", (user_id,))
+        for place_type, place_ids in reviewed.items():
+            rebuild_place_stats(cursor, place_type, place_ids)
 
-    cursor.close()
-    conn.close()
+        # Step 4: Delete the user from the users table
+        cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
+        conn.commit()
 
     return jsonify({'message': 'User account and all related data deleted successfully. Thankyou for using EzTrip!, Sorry we have to see you go :('}), 200
 
@@ -243,12 +226,11 @@ def generate_and_save_itinerary():
     if not user_id or not budget:
         return jsonify({'error': 'User ID and budget are required'}), 400
 
-    # Check if the user exists in the database
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
-    user = cursor.fetchone()
-    conn.close()
+    # Check if the user exists in the database, the connection goes back to the pool before the model call
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
+        user = cursor.fetchone()
 
     if not user:
         return jsonify({'error': 'User not found'}), 404
@@ -274,16 +256,15 @@ def generate_and_save_itinerary():
         itinerary_id = str(uuid.uuid4())
 
         # Save generated itinerary to the database
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        with db_connection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute(""" 
-            INSERT INTO itineraries (id, user_id, itinerary_data, total_cost, remaining_budget, budget)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, (itinerary_id, user_id, json.dumps(itinerary_data), total_cost, remaining_budget, budget))
+            cursor.execute(""" 
+                INSERT INTO itineraries (id, user_id, itinerary_data, total_cost, remaining_budget, budget)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, (itinerary_id, user_id, json.dumps(itinerary_data), total_cost, remaining_budget, budget))
 
-        conn.commit()
-        conn.close()
+            conn.commit()
 
         return jsonify({
             'message': 'Itinerary saved successfully',
@@ -299,13 +280,11 @@ def generate_and_save_itinerary():
 @app.route('/features/itineraries/user/<user_id>', methods=['GET'])
 def get_user_itineraries(user_id):
     try:
-        # Connect to the database
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
         # Query to get all itineraries for the specific user_id
-        cursor.execute("SELECT id, itinerary_data, total_cost, remaining_budget, budget, created_at FROM itineraries WHERE user_id = %s", (user_id,))
-        itineraries = cursor.fetchall()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, itinerary_data, total_cost, remaining_budget, budget, created_at FROM itineraries WHERE user_id = %s", (user_id,))
+            itineraries = cursor.fetchall()
 
         if not itineraries:
             return jsonify({'message': 'No itineraries found for this user'}), 404
@@ -323,8 +302,6 @@ def get_user_itineraries(user_id):
             }
             itineraries_list.append(itinerary_dict)
 
-        conn.close()
-
         return jsonify({'itineraries': itineraries_list}), 200
 
     except Exception as e:
@@ -337,21 +314,17 @@ def delete_itinerary(id):
         # Convert the UUID object to string if needed (for database operations)
         id_str = str(id)
 
-        # Connect to the database
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
         # Delete the itinerary from the database
-        cursor.execute("DELETE FROM itineraries WHERE id = %s", (id_str,))
-        conn.commit()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM itineraries WHERE id = %s", (id_str,))
+            deleted = cursor.rowcount
+            conn.commit()
 
         # Check if any row was deleted
-        if cursor.rowcount == 0:
-            conn.close()
+        if deleted == 0:
             return jsonify({'error': 'Itinerary not found'}), 404
 
-        conn.close()
-
         return jsonify({'message': 'Itinerary deleted successfully'}), 200
 
     except Exception as e:
@@ -361,24 +334,6 @@ def delete_itinerary(id):
 
 """ START OF REVIEWS API ENDPOINTS """
 
-# Function to analyze sentiment
-def analyze_sentiment(text):
-    blob = TextBlob(text)
-    polarity = blob.sentiment.polarity
-
-    if polarity > 0.1:
-        return 'positive'
-    elif polarity < -0.1:
-        return 'negative'
-    else:
-        return 'neutral'
-
-# Function to translate review to English (if needed)
-def translate_to_english(text):
-    translator = Translator()
-    translated = translator.translate(text, src='auto', dest='en')
-    return translated.text
-
 # POST /reviews (Submit Review)
 @app.route('/places/reviews', methods=['POST'])
 def submit_review():
@@ -389,124 +344,212 @@ def submit_review():
     rating = data['rating']
     reviews = data['reviews']
 
-    # Step 1: Check if the user_id exists in the users table
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
-    user = cursor.fetchone()
-    
-    if not user:
-        cursor.close()
-        conn.close()
-        return jsonify({"error": "User does not exist"}), 400
-    
-    # Step 2: Translate review to English (if necessary)
-    translated_review = translate_to_english(reviews)
-    
-    # Step 3: Analyze sentiment of the translated review
-    sentiment = analyze_sentiment(translated_review)
+    with db_connection() as conn:
+        cursor = conn.cursor()
 
-    # Step 4: Proceed with review submission
-    review_id = str(uuid.uuid4())
-    if place_type == 'accommodations':
-        cursor.execute("""
-            INSERT INTO accommodations_reviews (id, user_id, accommodations_id, rating, reviews, sentiment)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, (review_id, user_id, place_id, rating, translated_review, sentiment))
-    elif place_type == 'tours':
-        cursor.execute("""
-            INSERT INTO tours_reviews (id, user_id, tours_id, rating, reviews, sentiment)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, (review_id, user_id, place_id, rating, translated_review, sentiment))
-    elif place_type == 'culinaries':
-        cursor.execute("""
-            INSERT INTO culinary_reviews (id, user_id, culinaries_id, rating, reviews, sentiment)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, (review_id, user_id, place_id, rating, translated_review, sentiment))
-    else:
-        cursor.close()
-        conn.close()
-        return jsonify({"error": "Invalid place type"}), 400
-    
-    conn.commit()
-    cursor.close()
-    conn.close()
-    
-    return jsonify({"message": "Review submitted successfully", "review_id": review_id}), 201
+        # Step 1: Check if the user_id exists in the users table
+        cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
+        user = cursor.fetchone()
+
+        if not user:
+            return jsonify({"error": "User does not exist"}), 400
+
+        # Step 2: Store the review as submitted, translation and sentiment analysis run in the background
+        review_id = str(uuid.uuid4())
+        if place_type == 'accommodations':
+            cursor.execute("""
+                INSERT INTO accommodations_reviews (id, user_id, accommodations_id, rating, reviews, sentiment)
+                VALUES (%s, %s, %s, %s, %s, 'pending')
+            """, (review_id, user_id, place_id, rating, reviews))
+        elif place_type == 'tours':
+            cursor.execute("""
+                INSERT INTO tours_reviews (id, user_id, tours_id, rating, reviews, sentiment)
+                VALUES (%s, %s, %s, %s, %s, 'pending')
+            """, (review_id, user_id, place_id, rating, reviews))
+        elif place_type == 'culinaries':
+            cursor.execute("""
+                INSERT INTO culinary_reviews (id, user_id, culinaries_id, rating, reviews, sentiment)
+                VALUES (%s, %s, %s, %s, %s, 'pending')
+            """, (review_id, user_id, place_id, rating, reviews))
+        else:
+            return jsonify({"error": "Invalid place type"}), 400
+
+        # Count the review in the stats of the place, in the same transaction
+        record_review(cursor, place_type, place_id, rating)
+        conn.commit()
+
+    # Step 3: Queue the review, its sentiment stays 'pending' until a worker has analyzed it
+    review_pipeline.submit(REVIEW_TABLES[place_type], review_id, reviews)
+
+    return jsonify({"message": "Review submitted successfully", "review_id": review_id, "sentiment": "pending"}), 201
 
 # GET /reviews/reviews/{place_id} (Get Reviews for a Place)
 @app.route('/places/reviews/<place_id>', methods=['GET'])
 def get_reviews(place_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    # Fetching reviews for accommodations
-    cursor.execute("""
-        SELECT ar.id, u.username, ar.rating, ar.reviews, ar.sentiment 
-        FROM accommodations_reviews ar
-        JOIN users u ON ar.user_id = u.id
-        WHERE ar.accommodations_id = %s
-    """, (place_id,))
-    accommodation_reviews = cursor.fetchall()
-
-    # Fetching reviews for tours
-    cursor.execute("""
-        SELECT tr.id, u.username, tr.rating, tr.reviews, tr.sentiment 
-        FROM tours_reviews tr
-        JOIN users u ON tr.user_id = u.id
-        WHERE tr.tours_id = %s
-    """, (place_id,))
-    tour_reviews = cursor.fetchall()
-
-    # Fetching reviews for culinaries
-    cursor.execute("""
-        SELECT cr.id, u.username, cr.rating, cr.reviews, cr.sentiment 
-        FROM culinary_reviews cr
-        JOIN users u ON cr.user_id = u.id
-        WHERE cr.culinaries_id = %s
-    """, (place_id,))
-    culinary_reviews = cursor.fetchall()
-
-    cursor.close()
-    conn.close()
-
-    review_list = []
-    
-    # Combine the results from all three places
-    for review in accommodation_reviews:
-        review_list.append({
-            "review_id": review[0],
-            "username": review[1],   # Show username instead of user_id
-            "rating": review[2],
-            "reviews": review[3],
-            "sentiment": review[4],
-            "type": "accommodation"
-        })
+    """
+    API endpoint to retrieve one page of reviews of a place, with the review aggregates of the place.
 
-    for review in tour_reviews:
-        review_list.append({
-            "review_id": review[0],
-            "username": review[1],   # Show username instead of user_id
-            "rating": review[2],
-            "reviews": review[3],
-            "sentiment": review[4],
-            "type": "tour"
-        })
+    Args:
+        place_id (str): Id of the place.
 
-    for review in culinary_reviews:
-        review_list.append({
-            "review_id": review[0],
-            "username": review[1],   # Show username instead of user_id
-            "rating": review[2],
-            "reviews": review[3],
-            "sentiment": review[4],
-            "type": "culinary"
-        })
-    
-    return jsonify(review_list)
+    Query Parameters (all optional):
+        place_type (str): 'accommodations', 'tours' or 'culinaries', looked up from the id by default.
+        sort (str): 'recent' (default) or 'rating'.
+        order (str): 'desc' (default) or 'asc'.
+        page (int): Page number, starting at 1.
+        limit (int): Reviews per page, REVIEWS_PAGE_SIZE by default.
+
+    Returns:
+        JSON: The reviews of the page, the review count, average rating and sentiment histogram of the place.
+    """
+    options, error = parse_review_page(request.args)
+    if error:
+        return jsonify({"error": error}), 400
+
+    # An id belongs to one category, so only its review table is read
+    place_type = options['place_type'] or place_directory.category_of(place_id)
+    if place_type is None:
+        return jsonify({
+            "reviews": [],
+            "aggregates": {"count": 0, "average_rating": None, "sentiments": dict.fromkeys(SENTIMENTS, 0)},
+            "type": None,
+            "page": options['page'],
+            "limit": options['limit']
+        }), 200
+
+    reviews = fetch_reviews(place_type, place_id, options['sort'], options['order'], options['limit'], (options['page'] - 1) * options['limit'])
+    aggregates = get_place_stats(place_id)
+
+    return jsonify({
+        "reviews": reviews,
+        "aggregates": aggregates,
+        "type": REVIEW_TYPES[place_type],
+        "page": options['page'],
+        "limit": options['limit']
+    }), 200
+
+# POST /places/reviews/rescore (Re-score Stored Reviews)
+@app.route('/places/reviews/rescore', methods=['POST'])
+def rescore_reviews():
+    """
+    API endpoint to re-score the stored reviews in the background, chunk by chunk.
+
+    Args (JSON body, all optional):
+        place_type (str): 'accommodations', 'tours' or 'culinaries', every review table by default.
+        chunk_size (int): Rows read and updated at once.
+        translate (bool): Whether to translate the reviews again before scoring them, false by default.
+
+    Returns:
+        JSON: The status of the started job, or an error if a job is already running.
+    """
+    data = request.get_json(silent=True) or {}
+    place_type = data.get('place_type')
+    chunk_size = data.get('chunk_size', RESCORE_CHUNK_SIZE)
+    translate = data.get('translate', False)
+
+    if place_type is not None and place_type not in REVIEW_TABLES:
+        return jsonify({"error": "Invalid place type"}), 400
+    if not isinstance(chunk_size, int) or isinstance(chunk_size, bool) or chunk_size <= 0:
+        return jsonify({"error": "chunk_size must be a positive integer"}), 400
+    if not isinstance(translate, bool):
+        return jsonify({"error": "translate must be true or false"}), 400
+
+    tables = [REVIEW_TABLES[place_type]] if place_type else list(REVIEW_TABLES.values())
+    if not review_rescorer.start(tables, chunk_size, translate):
+        return jsonify({"error": "A re-scoring job is already running", "status": review_rescorer.stats()}), 409
+
+    return jsonify({"message": "Re-scoring started", "status": review_rescorer.stats()}), 202
+
+# GET /places/reviews/rescore (Re-scoring Progress)
+@app.route('/places/reviews/rescore', methods=['GET'])
+def rescore_status():
+    """
+    API endpoint to report the progress of the last re-scoring job.
+
+    Returns:
+        JSON: The tables, rows scanned and updated, start and end times and error of the job.
+    """
+    return jsonify({"status": review_rescorer.stats()}), 200
+
+# GET /places/stats/{place_id} (Review Stats of a Place)
+@app.route('/places/stats/<place_id>', methods=['GET'])
+def get_stats(place_id):
+    """
+    API endpoint to retrieve the review count, average rating and sentiment histogram of a place.
+
+    Args:
+        place_id (str): Id of the place.
+
+    Returns:
+        JSON: The stats of the place, zero counts for places without reviews.
+    """
+    return jsonify({"place_id": place_id, **get_place_stats(place_id)}), 200
+
+# POST /places/stats/reconcile (Rebuild Place Stats)
+@app.route('/places/stats/reconcile', methods=['POST'])
+def reconcile_stats():
+    """
+    API endpoint to rebuild the place stats from the review tables.
+
+    Args (JSON body, all optional):
+        place_type (str): 'accommodations', 'tours' or 'culinaries', every type by default.
+
+    Returns:
+        JSON: The number of places with reviews, by place type.
+    """
+    data = request.get_json(silent=True) or {}
+    place_type = data.get('place_type')
+
+    if place_type is not None and place_type not in REVIEW_TABLES:
+        return jsonify({"error": "Invalid place type"}), 400
+
+    try:
+        return jsonify({"message": "Place stats rebuilt", "places": reconcile_place_stats(place_type)}), 200
+    except Exception as e:
+        app.logger.error(f"Error in /places/stats/reconcile endpoint: {e}", exc_info=True)
+        return jsonify({"error": "Failed to rebuild the place stats."}), 500
 
 """ END OF REVIEWS API ENDPOINTS """
 
+""" START OF SENTIMENT API ENDPOINTS """
+
+# POST /sentiment/analyze (Score a Batch of Texts)
+@app.route('/sentiment/analyze', methods=['POST'])
+def analyze_texts():
+    """
+    API endpoint to translate and score a batch of review texts. Repeated texts are scored once.
+
+    Args (JSON body):
+        texts (list): Review texts, at most SENTIMENT_MAX_TEXTS.
+        translate (bool, optional): Whether to translate the texts to English first, true by default.
+
+    Returns:
+        JSON: The translated text, polarity and sentiment of every text, in the same order.
+    """
+    data = request.get_json(silent=True) or {}
+    texts = data.get('texts')
+    translate = data.get('translate', True)
+
+    if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+        return jsonify({"error": "texts must be a list of strings"}), 400
+    if len(texts) > MAX_BATCH_TEXTS:
+        return jsonify({"error": f"At most {MAX_BATCH_TEXTS} texts can be analyzed at once"}), 400
+    if not isinstance(translate, bool):
+        return jsonify({"error": "translate must be true or false"}), 400
+
+    try:
+        results = sentiment_service.analyze(texts, translate)
+    except Exception as e:
+        app.logger.error(f"Error in /sentiment/analyze endpoint: {e}", exc_info=True)
+        return jsonify({"error": "Failed to analyze the texts."}), 502
+
+    return jsonify({"results": [
+        {"text": text, "translated": translated, "polarity": polarity, "sentiment": sentiment}
+        for text, (translated, polarity, sentiment) in zip(texts, results)
+    ]}), 200
+
+""" END OF SENTIMENT API ENDPOINTS """
+
 """ START OF EXPENSES API ENDPOINTS """
 
 @app.route('/user/expenses', methods=['POST'])
@@ -517,43 +560,37 @@ def add_expense():
     amount = data['amount']
     description = data.get('description', '')  # Optional
 
-    # Step 1: Check if the user_id exists in the users table
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
-    user = cursor.fetchone()
-    
-    if not user:
-        cursor.close()
-        conn.close()
-        return jsonify({"error": "User does not exist"}), 400
-
-    # Step 2: Insert the expense into the expenses table
-    expense_id = str(uuid.uuid4())
-    created_at = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    updated_at = created_at  # Use the same timestamp for both created_at and updated_at
-
-    cursor.execute("""
-        INSERT INTO expenses (expense_id, user_id, category, amount, description, created_at, updated_at)
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
-    """, (expense_id, user_id, category, amount, description, created_at, updated_at))
-    
-    conn.commit()
-    cursor.close()
-    conn.close()
+    with db_connection() as conn:
+        cursor = conn.cursor()
+
+        # Step 1: Check if the user_id exists in the users table
+        cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
+        user = cursor.fetchone()
+
+        if not user:
+            return jsonify({"error": "User does not exist"}), 400
+
+        # Step 2: Insert the expense into the expenses table
+        expense_id = str(uuid.uuid4())
+        created_at = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        updated_at = created_at  # Use the same timestamp for both created_at and updated_at
+
+        cursor.execute("""
+            INSERT INTO expenses (expense_id, user_id, category, amount, description, created_at, updated_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, (expense_id, user_id, category, amount, description, created_at, updated_at))
+
+        conn.commit()
 
     return jsonify({"message": "Expense added successfully", "expense_id": expense_id}), 201
 
 # GET /expenses/<user_id> (Get All Expenses for a User)
 @app.route('/user/expenses/<user_id>', methods=['GET'])
 def get_expenses(user_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM expenses WHERE user_id = %s", (user_id,))
-    
-    expenses = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM expenses WHERE user_id = %s", (user_id,))
+        expenses = cursor.fetchall()
 
     expense_list = []
     for expense in expenses:
@@ -571,18 +608,15 @@ def get_expenses(user_id):
 # GET /user/expenses/total/<user_id> (Get Total Expenses by Category)
 @app.route('/user/expenses/total/<user_id>', methods=['GET'])
 def get_expenses_total(user_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT category, SUM(amount) as total_amount
-        FROM expenses
-        WHERE user_id = %s
-        GROUP BY category
-    """, (user_id,))
-    
-    totals = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT category, SUM(amount) as total_amount
+            FROM expenses
+            WHERE user_id = %s
+            GROUP BY category
+        """, (user_id,))
+        totals = cursor.fetchall()
 
     total_expenses = []
     for total in totals:
@@ -600,52 +634,46 @@ def update_expense(expense_id):
     amount = data.get('amount', None)
     description = data.get('description', None)
 
-    # Step 1: Check if the expense_id exists in the expenses table
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM expenses WHERE expense_id = %s", (expense_id,))
-    expense = cursor.fetchone()
+    with db_connection() as conn:
+        cursor = conn.cursor()
+
+        # Step 1: Check if the expense_id exists in the expenses table
+        cursor.execute("SELECT * FROM expenses WHERE expense_id = %s", (expense_id,))
+        expense = cursor.fetchone()
 
-    if not expense:
-        cursor.close()
-        conn.close()
-        return jsonify({"error": "Expense not found"}), 404
+        if not expense:
+            return jsonify({"error": "Expense not found"}), 404
 
-    # Step 2: Update the expense in the expenses table
-    updated_at = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        # Step 2: Update the expense in the expenses table
+        updated_at = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
-    if category is not None:
-        cursor.execute("UPDATE expenses SET category = %s, updated_at = %s WHERE expense_id = %s", (category, updated_at, expense_id))
-    if amount is not None:
-        cursor.execute("UPDATE expenses SET amount = %s, updated_at = %s WHERE expense_id = %s", (amount, updated_at, expense_id))
-    if description is not None:
-        cursor.execute("UPDATE expenses SET description = %s, updated_at = %s WHERE expense_id = %s", (description, updated_at, expense_id))
+        if category is not None:
+            cursor.execute("UPDATE expenses SET category = %s, updated_at = %s WHERE expense_id = %s", (category, updated_at, expense_id))
+        if amount is not None:
+            cursor.execute("UPDATE expenses SET amount = %s, updated_at = %s WHERE expense_id = %s", (amount, updated_at, expense_id))
+        if description is not None:
+            cursor.execute("UPDATE expenses SET description = %s, updated_at = %s WHERE expense_id = %s", (description, updated_at, expense_id))
 
-    conn.commit()
-    cursor.close()
-    conn.close()
+        conn.commit()
 
     return jsonify({"message": "Expense updated successfully"})
 
 # DELETE /expenses/<expense_id> (Delete an Expense)
 @app.route('/expenses/<expense_id>', methods=['DELETE'])
 def delete_expense(expense_id):
-    # Step 1: Check if the expense_id exists in the expenses table
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM expenses WHERE expense_id = %s", (expense_id,))
-    expense = cursor.fetchone()
-
-    if not expense:
-        cursor.close()
-        conn.close()
-        return jsonify({"error": "Expense not found"}), 404
-
-    # Step 2: Delete the expense from the expenses table
-    cursor.execute("DELETE FROM expenses WHERE expense_id = %s", (expense_id,))
-    conn.commit()
-    cursor.close()
-    conn.close()
+    with db_connection() as conn:
+        cursor = conn.cursor()
+
+        # Step 1: Check if the expense_id exists in the expenses table
+        cursor.execute("SELECT * FROM expenses WHERE expense_id = %s", (expense_id,))
+        expense = cursor.fetchone()
+
+        if not expense:
+            return jsonify({"error": "Expense not found"}), 404
+
+        # Step 2: Delete the expense from the expenses table
+        cursor.execute("DELETE FROM expenses WHERE expense_id = %s", (expense_id,))
+        conn.commit()
 
     return jsonify({"message": "Expense deleted successfully"})
 
@@ -659,33 +687,39 @@ def get_all_category_items(category):
     """
     API endpoint to retrieve all items based on category (accommodations, tours, or culinaries).
 
+    Items are ordered by id and streamed in chunks. Pages are requested with `limit`, and the
+    next page starts after the `next_after_id` of the previous one.
+
     Args:
         category (str): Category for which all items should be fetched. Options: 'accommodations', 'tours', 'culinaries'.
 
+    Query Parameters (all optional):
+        after_id (str): Return the items after this id.
+        limit (int): Largest number of items to return, every item by default.
+        fields (str): Comma-separated columns to return, the id is always returned.
+        city (str): Only return the items of this city.
+        category (str): Only return the items of this category (tours and culinaries only).
+
     Returns:
-        JSON: A dictionary containing all items for the specified category.
+        JSON: A dictionary containing the items for the specified category and the id to continue after.
     """
     try:
-        # Define the query to fetch all items from the specified category
-        if category == 'accommodations':
-            query = "SELECT * FROM accommodations;"
-        elif category == 'tours':
-            query = "SELECT * FROM tours;"
-        elif category == 'culinaries':
-            query = "SELECT * FROM culinaries;"
-        else:
+        # Validate the category and the listing options
+        if category not in PLACE_COLUMNS:
             return jsonify({"error": "Invalid category provided."}), 400
 
-        # Query the database to get all items for the specified category
-        items_df = pd.read_sql(query, engine)
+        options, error = parse_listing(category, request.args)
+        if error:
+            return jsonify({"error": error}), 400
 
-        if items_df.empty:
-            return jsonify({"message": f"No items found in category '{category}'."}), 404
+        # Read the first chunk before streaming, so an empty category still answers 404
+        first_size = CHUNK_SIZE if options['limit'] is None else min(CHUNK_SIZE, options['limit'])
+        first_chunk = fetch_places(options, options['after_id'], first_size)
 
-        # Convert the DataFrame to a dictionary
-        items = items_df.to_dict(orient='records')
+        if not first_chunk and options['after_id'] is None:
+            return jsonify({"message": f"No items found in category '{category}'."}), 404
 
-        return jsonify({"items": items}), 200
+        return Response(stream_with_context(stream_places(options, first_chunk)), mimetype='application/json')
 
     except Exception as e:
         # Log and handle any unexpected errors
@@ -698,31 +732,36 @@ def get_random_category_items(category):
     """
     API endpoint to retrieve 10 random items based on category (accommodations, tours, or culinaries).
 
+    The ids are sampled from an in-memory directory of the category, and only the sampled rows are read.
+
     Args:
         category (str): Category for which random items should be fetched. Options: 'accommodations', 'tours', 'culinaries'.
 
+    Query Parameters (all optional):
+        city (str): Only return items of this city.
+        seed (int): Seed for a reproducible selection.
+
     Returns:
         JSON: A dictionary containing the random items for the specified category.
     """
     try:
-        # Define the query to fetch all items from the specified category
-        if category == 'accommodations':
-            query = "SELECT * FROM accommodations;"
-        elif category == 'tours':
-            query = "SELECT * FROM tours;"
-        elif category == 'culinaries':
-            query = "SELECT * FROM culinaries;"
-        else:
+        # Validate the category and the options
+        if category not in PLACE_COLUMNS:
             return jsonify({"error": "Invalid category provided."}), 400
 
-        # Query the database to get all items for the specified category
-        items_df = pd.read_sql(query, engine)
+        seed = request.args.get('seed')
+        if seed is not None:
+            try:
+                seed = int(seed)
+            except ValueError:
+                return jsonify({"error": "seed must be an integer."}), 400
 
-        if items_df.empty:
-            return jsonify({"message": f"No items found in category '{category}'."}), 404
+        # Select 10 random ids, then read only those items
+        ids = place_directory.sample(category, RANDOM_COUNT, request.args.get('city'), seed)
+        random_items = place_details.get_many(category, ids)
 
-        # Select 10 random items using Python's random.sample() method
-        random_items = random.sample(items_df.to_dict(orient='records'), 10) if len(items_df) >= 10 else items_df.to_dict(orient='records')
+        if not random_items:
+            return jsonify({"message": f"No items found in category '{category}'."}), 404
 
         return jsonify({"items": random_items}), 200
 
@@ -746,24 +785,15 @@ def get_place_detail(category, id):
     """
     try:
         # Validate the category
-        if category == 'accommodations':
-            query = f"SELECT * FROM accommodations WHERE id = '{id}';"
-        elif category == 'tours':
-            query = f"SELECT * FROM tours WHERE id = '{id}';"
-        elif category == 'culinaries':
-            query = f"SELECT * FROM culinaries WHERE id = '{id}';"
-        else:
+        if category not in PLACE_COLUMNS:
             return jsonify({"error": "Invalid category provided."}), 400
 
-        # Query the database to get the detailed information of the place
-        place_df = pd.read_sql(query, engine)
+        # Get the detailed information of the place, from the cache when possible
+        place_detail = place_details.get(category, str(id))
 
-        if place_df.empty:
+        if place_detail is None:
             return jsonify({"message": f"No details found for the {category} with ID {id}."}), 404
 
-        # Convert the DataFrame to a dictionary (JSON format)
-        place_detail = place_df.to_dict(orient='records')[0]  # Extract the first record as there's only one UUID
-
         return jsonify({"place_detail": place_detail}), 200
 
     except Exception as e:
@@ -771,7 +801,100 @@ def get_place_detail(category, id):
         app.logger.error(f"Error in /places/detail/{category}/{id} endpoint: {e}", exc_info=True)
         return jsonify({"error": "Internal server error."}), 500
 
+# API endpoint to show the details of several places of a category
+@app.route('/places/detail/<category>', methods=['GET'])
+def get_place_details(category):
+    """
+    API endpoint to retrieve the details of several places of a category in one call, e.g. to show a recommendation list.
+
+    Args:
+        category (str): Category of the places ('accommodations', 'tours', 'culinaries').
+
+    Query Parameters:
+        ids (str): Comma-separated UUIDs of the places, at most PLACES_MAX_DETAIL_IDS.
+
+    Returns:
+        JSON: The details of the places found, in the order of `ids`, and the ids that were not found.
+    """
+    try:
+        # Validate the category and the ids
+        if category not in PLACE_COLUMNS:
+            return jsonify({"error": "Invalid category provided."}), 400
+
+        try:
+            ids = [str(uuid.UUID(place_id.strip())) for place_id in request.args.get('ids', '').split(',') if place_id.strip()]
+        except ValueError:
+            return jsonify({"error": "ids must be comma-separated UUIDs."}), 400
+
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return jsonify({"error": "ids is required."}), 400
+        if len(ids) > MAX_DETAIL_IDS:
+            return jsonify({"error": f"At most {MAX_DETAIL_IDS} ids can be requested at once."}), 400
+
+        # Get the details of the places, the cached ones without a query
+        details = place_details.get_many(category, ids)
+        found = {place['id'] for place in details}
+
+        return jsonify({"place_details": details, "missing": [place_id for place_id in ids if place_id not in found]}), 200
+
+    except Exception as e:
+        # Log and handle any unexpected errors
+        app.logger.error(f"Error in /places/detail/{category} endpoint: {e}", exc_info=True)
+        return jsonify({"error": "Internal server error."}), 500
+
+# API endpoint to drop cached places after they changed in the database
+@app.route('/places/cache/invalidate', methods=['POST'])
+def invalidate_place_cache():
+    """
+    API endpoint to drop the cached details and ids of changed places, e.g. after a catalog import.
+
+    Args (JSON body, all optional):
+        category (str): Category of the changed places, every category by default.
+        ids (list): Ids of the changed places, every place of the category by default.
+
+    Returns:
+        JSON: The number of dropped place details.
+    """
+    data = request.get_json(silent=True) or {}
+    category = data.get('category')
+    ids = data.get('ids')
+
+    if category is not None and category not in PLACE_COLUMNS:
+        return jsonify({"error": "Invalid category provided."}), 400
+    if ids is not None and (not isinstance(ids, list) or not all(isinstance(place_id, str) for place_id in ids)):
+        return jsonify({"error": "ids must be a list of strings."}), 400
+
+    return jsonify({"message": "Place cache invalidated", "invalidated": invalidate_places(category, ids)}), 200
+
 """ END OF GET DATA ENDPOINTS """
 
+""" START OF MONITORING API ENDPOINTS """
+
+# API endpoint for the connection pool utilization
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    API endpoint to report the utilization of the database connection pool, the review backlog and the caches.
+
+    Returns:
+        JSON: A dictionary containing the pool size, open, checked out and idle connections, the
+              backlog and counters of the review pipeline, and the hit rates of the sentiment and place caches.
+    """
+    return jsonify({
+        "db_pool": pool_stats(),
+        "review_pipeline": review_pipeline.stats(),
+        "sentiment_cache": sentiment_service.stats(),
+        "place_cache": place_details.stats()
+    }), 200
+
+""" END OF MONITORING API ENDPOINTS """
+
+# Start translating and analyzing the submitted reviews in the background, once per serving process:
+# under any WSGI server when the app is imported, and with the debug reloader of app.run below only
+# in its child process that serves the requests, not in the parent that watches the files
+if __name__ != '__main__' or os.getenv('WERKZEUG_RUN_MAIN') == 'true':
+    review_pipeline.start()
+
 if __name__ == '__main__':
     app.run(host=os.getenv('SERVER_HOST'), port=os.getenv('SERVER_PORT'), debug=True)
\ No newline at end of file
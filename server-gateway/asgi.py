@@ -0,0 +1,164 @@
+# Import the required libraries
+import asyncio
+import math
+import httpx
+from quart import Quart, request, jsonify
+from dotenv import load_dotenv
+from config.async_upstream import AsyncUpstreamClient
+from config.async_proxy import async_proxy
+from config.proxy import upstream_error
+from config.policies import client_address
+from config.routes import load_routes
+from config.upstream import CircuitOpenError, UpstreamPool
+
+# Load environment variables from the .env file
+load_dotenv()
+
+# Create a Quart application, the asyncio counterpart of the Flask gateway in server.py
+app = Quart(__name__)
+
+# Load the upstream replicas and routes of the gateway from the route table (routes.json)
+replicas, router = load_routes()
+
+# Non-blocking clients of every upstream replica, opened when the server starts
+pools = {name: UpstreamPool(name, [AsyncUpstreamClient(name, url) for url in urls]) for name, urls in replicas.items()}
+
+# Recommendation domains of the composite endpoint, with their model server path
+COMPOSITE_DOMAINS = {
+    'tours': '/tours',
+    'culinaries': '/culinaries',
+    'accommodations': '/accommodations'
+}
+
+@app.before_serving
+async def open_upstreams():
+    for pool in pools.values():
+        for client in pool.clients:
+            await client.start()
+
+@app.after_serving
+async def close_upstreams():
+    for pool in pools.values():
+        for client in pool.clients:
+            await client.close()
+
+""" START OF GATEWAY APIs """
+
+# Forward every route of the route table to its upstream
+@app.route('/api/<path:path>', methods=router.methods)
+async def gateway(path):
+    """
+    API endpoint that sends the request to the least busy replica of the upstream of its route and returns its response.
+
+    The body, query string and content headers of the request are forwarded as they are, and the
+    status, headers and body of the upstream response are streamed back chunk by chunk, still
+    compressed if they were, without parsing them, and GET responses of a route with a cache
+    policy are served from the cache, by the same `async_proxy` as the Flask gateway's `proxy`.
+    """
+    # Find the route of the request, 404 or 405 if there is none
+    route, values = router.match(request.method, request.path)
+
+    # Reject the request if the client went over the rate limit of the route
+    retry_after = route.throttle(client_address(request.remote_addr, request.headers.get('X-Forwarded-For')))
+    if retry_after:
+        return jsonify({"error": f"Too many requests, retry in {math.ceil(retry_after)} seconds."}), 429, {'Retry-After': str(math.ceil(retry_after))}
+
+    try:
+        # Forward the request to the least busy replica of the upstream
+        return await async_proxy(pools[route.upstream], request.method, route.target_path(values), timeout=route.timeout, cache=route.cache, transform=route.transform)
+    except (CircuitOpenError, httpx.TransportError) as e:
+        body, status = upstream_error(e)
+        return jsonify(body), status
+
+""" END OF GATEWAY APIs """
+
+""" START OF COMPOSITE APIs """
+
+# Function to call one part of a composite request
+async def fetch_part(upstream, method, path, **kwargs):
+    """
+    Calls an upstream for one part of a composite response.
+
+    Returns:
+        tuple: (status code, JSON body), status 502 or 503 with an 'error' body when the upstream could not be reached.
+    """
+    pool = pools[upstream]
+    client = pool.acquire()
+    try:
+        response = await client.request(method, path, **kwargs)
+    except CircuitOpenError as e:
+        return 503, {"error": str(e)}
+    except httpx.TransportError as e:
+        return 502, {"error": f"Failed to reach the {upstream} server: {str(e) or type(e).__name__}"}
+    finally:
+        pool.release(client)
+
+    try:
+        return response.status_code, response.json()
+    except ValueError:
+        return 502, {"error": f"The {upstream} server returned an invalid response."}
+
+# Recommendations of several domains and place details in one request
+@app.route('/api/composite/recommendations', methods=['POST'])
+async def composite_recommendations():
+    """
+    API endpoint that sends several recommendation and place detail requests concurrently and merges their results.
+
+    Args (JSON body, every part optional, at least one required):
+        tours, culinaries, accommodations (dict): Body of the matching /api/model/recommendations endpoint.
+        details (dict): Place ids to read, by category (tours, culinaries or accommodations), e.g. {"tours": ["<uuid>", ...]}.
+
+    Returns:
+        JSON: The body of every part under its name, e.g. "tours" or "details" -> "tours", and the
+              status and error of the parts that failed under "errors". The status is 502 if every part failed.
+    """
+    data = await request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request must be a JSON object."}), 400
+
+    details = data.get('details') or {}
+    if not isinstance(details, dict) or not all(isinstance(ids, list) for ids in details.values()):
+        return jsonify({"error": "details must map categories to lists of ids."}), 400
+    if not set(details) <= set(COMPOSITE_DOMAINS):
+        return jsonify({"error": f"details categories must be {', '.join(COMPOSITE_DOMAINS)}."}), 400
+
+    # Every part is sent at once, the response waits for the slowest one
+    parts = {}
+    for domain, path in COMPOSITE_DOMAINS.items():
+        if data.get(domain) is not None:
+            parts[domain] = fetch_part('model', 'POST', path, json=data[domain])
+    for category, ids in details.items():
+        parts[f'details.{category}'] = fetch_part('data', 'GET', f'/places/detail/{category}', params={'ids': ','.join(map(str, ids))})
+
+    if not parts:
+        return jsonify({"error": f"At least one of {', '.join(COMPOSITE_DOMAINS)} or details is required."}), 400
+
+    results = dict(zip(parts, await asyncio.gather(*parts.values())))
+
+    merged = {"errors": {}}
+    for name, (status, body) in results.items():
+        if status >= 400:
+            merged["errors"][name] = {"status": status, **(body if isinstance(body, dict) else {"error": body})}
+            continue
+        if name.startswith('details.'):
+            merged.setdefault("details", {})[name.split('.', 1)[1]] = body
+        else:
+            merged[name] = body
+
+    failed = len(merged["errors"]) == len(results)
+    return jsonify(merged), 502 if failed else 200
+
+""" END OF COMPOSITE APIs """
+
+""" START OF MONITORING APIs """
+
+# Upstream replicas traffic, circuit states and latency histograms, and route cache and rate limit counters
+@app.route('/metrics', methods=['GET'])
+async def metrics():
+    return jsonify({"upstreams": {name: pool.stats() for name, pool in pools.items()}, "routes": router.stats()}), 200
+
+""" END OF MONITORING APIs """
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=3000)
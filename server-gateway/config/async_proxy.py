@@ -0,0 +1,100 @@
+import httpx
+from quart import Response, request
+from config.proxy import CacheWriter, cached_response, request_headers, response_headers, transform_body
+from config.upstream import CONNECT_TIMEOUT
+
+# Body of a response streamed from an upstream by the async gateway
+class AsyncUpstreamBody:
+    """
+    The asyncio counterpart of `UpstreamBody`, for Quart, which awaits `aclose` instead.
+
+    Args:
+        chunks (async iterator): Chunks of the body.
+        on_close (coroutine function): Called without arguments.
+    """
+
+    def __init__(self, chunks, on_close):
+        self.chunks = chunks
+        self.on_close = on_close
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.chunks.__anext__()
+
+    async def aclose(self):
+        on_close, self.on_close = self.on_close, None
+        if on_close is not None:
+            await on_close()
+
+# Function to forward the current request and return the upstream response
+async def async_proxy(pool, method, path, timeout=None, cache=None, transform=None):
+    """
+    The asyncio counterpart of `proxy`, for the Quart gateway, with the same streaming, cache and transformations.
+
+    Args:
+        pool (UpstreamPool): Replicas of the upstream, with `AsyncUpstreamClient` clients.
+        method (str): HTTP method.
+        path (str): Path on the upstream, the query string of the request is added.
+        timeout (float, optional): Read timeout in seconds, the client's by default.
+        cache (ResponseCache, optional): Cache of the route.
+        transform (callable, optional): Transformation of the route, see `transform_body`.
+
+    Returns:
+        Response: The response of the gateway.
+
+    Raises:
+        httpx.TransportError: If the upstream could not be reached in time, see `upstream_error`.
+    """
+    query = request.query_string.decode() or None
+    headers = request_headers(request.headers)
+
+    key, cached = cached_response(cache, method, path, query, headers)
+    if cached is not None:
+        status, cached_headers, content = cached
+        return Response(content, status=status, headers=cached_headers + [('X-Cache', 'HIT')])
+
+    client = pool.acquire()
+    try:
+        response = await client.request(
+            method,
+            path,
+            timeout=httpx.Timeout(timeout, connect=CONNECT_TIMEOUT) if timeout else httpx.USE_CLIENT_DEFAULT,
+            params=query,
+            content=await request.get_data(),
+            headers=headers,
+            stream=True
+        )
+    except BaseException:
+        pool.release(client)
+        raise
+
+    storable = key is not None and cache.storable(response.status_code, response.headers)
+    if transform is not None:
+        try:
+            status, transformed_headers, content = transform_body(transform, response.status_code, await response.aread())
+        finally:
+            await response.aclose()
+            pool.release(client)
+        if storable and status == 200:
+            cache.set(key, (status, transformed_headers, content))
+        return Response(content, status=status, headers=transformed_headers + ([('X-Cache', 'MISS')] if key is not None else []))
+
+    forwarded = response_headers(response.headers)
+    writer = CacheWriter(cache, key, response.status_code, forwarded) if storable else None
+
+    async def chunks():
+        async for chunk in response.aiter_raw():
+            yield chunk
+            if writer is not None:
+                writer.add(chunk)
+        if writer is not None:
+            writer.finish()
+
+    async def close():
+        # The connection goes back to the pool once the body was read, or is closed if the client left early
+        await response.aclose()
+        pool.release(client)
+
+    return Response(AsyncUpstreamBody(chunks(), close), status=response.status_code, headers=forwarded + ([('X-Cache', 'MISS')] if key is not None else []))
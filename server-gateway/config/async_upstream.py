@@ -0,0 +1,104 @@
+import asyncio
+import time
+import httpx
+from config.upstream import (
+    CONNECT_TIMEOUT, IDEMPOTENT_METHODS, POOL_SIZE, READ_TIMEOUT, RETRIES, RETRY_BACKOFF, UNAVAILABLE_STATUSES,
+    CircuitBreaker, CircuitOpenError, LatencyHistogram
+)
+
+# Non-blocking HTTP client of one upstream service
+class AsyncUpstreamClient:
+    """
+    Sends the requests of the async gateway to one upstream service.
+
+    The asyncio counterpart of `UpstreamClient`, with the same settings, retry policy, circuit
+    breaker and latency histogram, on an httpx connection pool. Waiting for an upstream never
+    blocks the event loop, so the gateway keeps serving other requests meanwhile. The client must
+    be opened with `start` inside the event loop that uses it and closed with `close`.
+    """
+
+    def __init__(self, name, base_url, pool_size=POOL_SIZE, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT, retries=RETRIES, retry_backoff=RETRY_BACKOFF, breaker=None):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.pool_size = pool_size
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = LatencyHistogram()
+        self.counters = {'requests': 0, 'errors': 0, 'unavailable': 0}
+        self.client = None
+
+    async def start(self):
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=self.pool_size)
+        )
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def _send(self, method, path, stream=False, **kwargs):
+        # Send once per allowed attempt, retrying like the urllib3 policy of UpstreamClient
+        idempotent = method in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            try:
+                response = await self.client.send(self.client.build_request(method, path, **kwargs), stream=stream)
+                if not (idempotent and response.status_code in UNAVAILABLE_STATUSES and attempt < self.retries):
+                    return response
+                await response.aclose()
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                # Only requests the upstream never saw are sent again, never after a read error or timeout
+                if attempt >= self.retries:
+                    raise
+            await asyncio.sleep(self.retry_backoff * 2 ** attempt if attempt else 0)
+            attempt += 1
+
+    async def request(self, method, path, **kwargs):
+        """
+        Sends a request to the upstream.
+
+        Args:
+            method (str): HTTP method.
+            path (str): Path on the upstream, starting with '/'.
+            **kwargs: Passed to `httpx.AsyncClient.build_request`, e.g. 'json', 'params' or 'content',
+                      and 'stream' to return before the body is read, the caller must then close the response.
+
+        Returns:
+            Response: The upstream response, whatever its status.
+
+        Raises:
+            CircuitOpenError: If the circuit of the upstream is open.
+            httpx.TransportError: If the upstream could not be reached in time.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} upstream is unavailable, retrying in at most {self.breaker.reset_seconds:g} seconds")
+
+        started = time.perf_counter()
+        try:
+            response = await self._send(method, path, **kwargs)
+        except httpx.TransportError:
+            self.breaker.record(False)
+            self.counters['requests'] += 1
+            self.counters['errors'] += 1
+            raise
+        except BaseException:
+            # A request cancelled because its client left says nothing about the upstream, but must not leave a trial unresolved
+            self.breaker.abandon()
+            raise
+        finally:
+            self.latency.observe((time.perf_counter() - started) * 1000)
+
+        unavailable = response.status_code in UNAVAILABLE_STATUSES
+        self.breaker.record(not unavailable)
+        self.counters['requests'] += 1
+        if unavailable:
+            self.counters['unavailable'] += 1
+        return response
+
+    def stats(self):
+        return {'base_url': self.base_url, **self.counters, 'circuit': self.breaker.stats(), 'latency': self.latency.stats()}
@@ -0,0 +1,137 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Route policy settings
+CACHE_MAX_ENTRIES = int(os.getenv('GATEWAY_CACHE_MAX_ENTRIES', 1024))        # Responses kept by the cache of one route
+CACHE_MAX_BYTES = int(os.getenv('GATEWAY_CACHE_MAX_BYTES', 1024 * 1024))     # Largest body kept by the cache, in bytes
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv('GATEWAY_RATE_LIMIT_MAX_CLIENTS', 10000))  # Clients tracked by the rate limit of one route
+TRUSTED_PROXIES = int(os.getenv('GATEWAY_TRUSTED_PROXIES', 0))                 # Proxies in front of the gateway that append to X-Forwarded-For
+
+# Cache of the responses of one route
+class ResponseCache:
+    """
+    Keeps the successful responses of a route for `ttl` seconds, as the raw bytes sent by the upstream.
+
+    Entries are evicted least recently used first once there are more than `max_entries`. Only
+    200 responses without cookies and not marked 'no-store' or 'private' are kept, and only when
+    their body is at most `max_bytes`.
+    """
+
+    def __init__(self, ttl, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.counters = {'hits': 0, 'misses': 0, 'stored': 0}
+
+    def get(self, key):
+        # The cached (status, headers, body) of the key, None if missing or expired
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.entries.move_to_end(key)
+                self.counters['hits'] += 1
+                return entry[1]
+            if entry is not None:
+                del self.entries[key]
+            self.counters['misses'] += 1
+            return None
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            self.counters['stored'] += 1
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def storable(self, status, headers):
+        # Whether a response with this status and headers may be kept
+        cache_control = headers.get('Cache-Control', '').lower()
+        return status == 200 and 'Set-Cookie' not in headers and 'no-store' not in cache_control and 'private' not in cache_control
+
+    def stats(self):
+        with self.lock:
+            return {'ttl': self.ttl, 'entries': len(self.entries), **self.counters}
+
+# Function to find the client of a request
+def client_address(remote_addr, forwarded_for, trusted_proxies=TRUSTED_PROXIES):
+    """
+    Finds the address of the client of a request, the key of its rate limits.
+
+    Behind a load balancer every request comes from the balancer's address. Each of the
+    `trusted_proxies` proxies in front of the gateway appends the address it got the request from
+    to X-Forwarded-For, so the client is the entry the farthest trusted proxy added, like
+    werkzeug's ProxyFix(x_for=trusted_proxies). Entries before it can be forged by the client.
+
+    Args:
+        remote_addr (str): Address of the peer of the connection.
+        forwarded_for (str): X-Forwarded-For header of the request, None without one.
+        trusted_proxies (int, optional): Number of trusted proxies, GATEWAY_TRUSTED_PROXIES by default.
+
+    Returns:
+        str: The client address, the peer address without trusted proxies or enough X-Forwarded-For entries.
+    """
+    if trusted_proxies and forwarded_for:
+        hops = [hop.strip() for hop in forwarded_for.split(',')]
+        if len(hops) >= trusted_proxies:
+            return hops[-trusted_proxies]
+    return remote_addr
+
+# Rate limit of one route
+class RateLimiter:
+    """
+    Lets each client send at most `requests` requests per `seconds` to a route, with a token bucket.
+
+    A client starts with `requests` tokens, spends one per request and gets them back at a steady
+    rate, so bursts up to the limit are allowed. Once more than `max_clients` are tracked, the
+    clients that sent no request for the longest time are forgotten, as if their bucket was full.
+    """
+
+    def __init__(self, requests, seconds, max_clients=RATE_LIMIT_MAX_CLIENTS):
+        self.capacity = requests
+        self.seconds = seconds
+        self.rate = requests / seconds
+        self.max_clients = max_clients
+        self.lock = threading.Lock()
+        self.buckets = OrderedDict()
+        self.rejected = 0
+
+    def take(self, client):
+        """
+        Spends a token of a client.
+
+        Args:
+            client (str): Key of the client, e.g. its address.
+
+        Returns:
+            float: 0 if the request is allowed, else the seconds until it would be.
+        """
+        with self.lock:
+            now = time.monotonic()
+            tokens, updated = self.buckets.get(client, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                self.buckets[client] = (tokens - 1, now)
+                retry_after = 0
+            else:
+                self.buckets[client] = (tokens, now)
+                self.rejected += 1
+                retry_after = (1 - tokens) / self.rate
+
+            # Buckets are kept least recently updated first
+            self.buckets.move_to_end(client)
+            while len(self.buckets) > self.max_clients:
+                self.buckets.popitem(last=False)
+            return retry_after
+
+    def stats(self):
+        with self.lock:
+            return {'requests': self.capacity, 'seconds': self.seconds, 'clients': len(self.buckets), 'rejected': self.rejected}
@@ -0,0 +1,229 @@
+import json
+import os
+from dotenv import load_dotenv
+from flask import Response, request
+from config.upstream import CONNECT_TIMEOUT, CircuitOpenError
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Bytes read from an upstream response at once
+CHUNK_SIZE = int(os.getenv('GATEWAY_CHUNK_SIZE', 64 * 1024))
+
+# Headers of a connection, never forwarded to the other side
+HOP_BY_HOP_HEADERS = frozenset([
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization', 'te', 'trailer', 'trailers', 'transfer-encoding', 'upgrade'
+])
+
+# Response headers set by the gateway's own server
+SERVER_HEADERS = frozenset(['date', 'server'])
+
+# Request headers forwarded to the upstreams
+FORWARDED_REQUEST_HEADERS = ('Content-Type', 'Accept', 'Accept-Encoding')
+
+# Function to pick the request headers sent to an upstream
+def request_headers(headers):
+    """
+    Picks the headers of an incoming request that are forwarded to the upstream.
+
+    The client's Accept-Encoding is forwarded, or 'identity' without one, so a compressed upstream
+    body can be passed through as it is.
+
+    Args:
+        headers (Headers): Headers of the incoming request.
+
+    Returns:
+        dict: The forwarded headers.
+    """
+    forwarded = {header: headers[header] for header in FORWARDED_REQUEST_HEADERS if header in headers}
+    forwarded.setdefault('Accept-Encoding', 'identity')
+    return forwarded
+
+# Function to pick the response headers returned to the client
+def response_headers(headers):
+    return [(header, value) for header, value in headers.items() if header.lower() not in HOP_BY_HOP_HEADERS and header.lower() not in SERVER_HEADERS]
+
+# Function to build the error of a request whose upstream could not be reached
+def upstream_error(e):
+    """
+    Builds the error body and status of a request that failed before the upstream answered, the same in both gateway modes.
+
+    Args:
+        e (Exception): `requests.exceptions.RequestException` or `httpx.TransportError`, or a `CircuitOpenError`.
+
+    Returns:
+        tuple: (dict, int) The error body, and 503 while the circuit of the upstream is open, 502 otherwise.
+    """
+    return {"error": f"Failed to forward the request: {str(e) or type(e).__name__}"}, 503 if isinstance(e, CircuitOpenError) else 502
+
+# Headers of a response built by the gateway from a transformed upstream body
+JSON_HEADERS = [('Content-Type', 'application/json')]
+
+# Function to apply the transformation of a route to an upstream body
+def transform_body(transform, status, content):
+    """
+    Parses an upstream JSON body and applies the transformation of its route.
+
+    Args:
+        transform (callable): Takes the parsed body and returns the JSON value to send.
+        status (int): Status of the upstream response, kept in the transformed response.
+        content (bytes): Decoded upstream body.
+
+    Returns:
+        tuple: (status, headers, body) of the response, 502 with an 'error' body if the upstream body is not JSON.
+    """
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return 502, JSON_HEADERS, json.dumps({"error": "The upstream returned an invalid JSON response."}).encode()
+    return status, JSON_HEADERS, json.dumps(transform(data)).encode()
+
+# Function to build the cache key of a request
+def cache_key(path, query, headers):
+    # The body may be compressed, so the forwarded Accept-Encoding is part of the key
+    return (path, query, headers.get('Accept-Encoding'))
+
+# Function to look the current request up in the cache of its route
+def cached_response(cache, method, path, query, headers):
+    """
+    Returns:
+        tuple: (cache key, or None if the request is not cacheable, and (status, headers, body) if cached, else None).
+    """
+    if cache is None or method != 'GET':
+        return None, None
+    key = cache_key(path, query, headers)
+    return key, cache.get(key)
+
+# Copy of an upstream body kept for the cache while it is sent
+class CacheWriter:
+    """
+    Collects the chunks of a cacheable response as they are sent, and stores the response once
+    the whole body went through, unless it grew larger than the cache keeps.
+    """
+
+    def __init__(self, cache, key, status, headers):
+        self.cache = cache
+        self.key = key
+        self.status = status
+        self.headers = headers
+        self.chunks = []
+        self.size = 0
+
+    def add(self, chunk):
+        if self.chunks is None:
+            return
+        self.size += len(chunk)
+        if self.size <= self.cache.max_bytes:
+            self.chunks.append(chunk)
+        else:
+            self.chunks = None
+
+    def finish(self):
+        if self.chunks is not None:
+            self.cache.set(self.key, (self.status, self.headers, b''.join(self.chunks)))
+
+# Body of a response streamed from an upstream
+class UpstreamBody:
+    """
+    Iterates the chunks of an upstream body, and calls `on_close` once the server is done with it.
+
+    The server calls `close` on the body of every response, even one that was never read because
+    the client left first, which a generator's `finally` would miss. That is where the upstream
+    connection and the replica of the request are given back.
+
+    Args:
+        chunks (iterator): Chunks of the body.
+        on_close (callable): Called without arguments.
+    """
+
+    def __init__(self, chunks, on_close):
+        self.chunks = chunks
+        self.on_close = on_close
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self.chunks)
+
+    def close(self):
+        on_close, self.on_close = self.on_close, None
+        if on_close is not None:
+            on_close()
+
+# Function to forward the current request and return the upstream response
+def proxy(pool, method, path, timeout=None, cache=None, transform=None):
+    """
+    Forwards the current request to a replica of an upstream and streams the response back to the client.
+
+    The upstream body is passed through chunk by chunk as raw bytes, still compressed if it was,
+    with its status and headers, so the gateway never holds or parses the whole body. Only with a
+    transform is the body read whole, parsed as JSON and the transformed value sent instead. With
+    a cache, a GET is answered from it when possible, and a cacheable response is kept once it
+    was fully sent, with an X-Cache header telling which happened.
+
+    Args:
+        pool (UpstreamPool): Replicas of the upstream.
+        method (str): HTTP method.
+        path (str): Path on the upstream, the query string of the request is added.
+        timeout (float, optional): Read timeout in seconds, the client's by default.
+        cache (ResponseCache, optional): Cache of the route.
+        transform (callable, optional): Transformation of the route, see `transform_body`.
+
+    Returns:
+        Response: The response of the gateway.
+
+    Raises:
+        requests.exceptions.RequestException: If the upstream could not be reached in time, see `upstream_error`.
+    """
+    query = request.query_string.decode() or None
+    headers = request_headers(request.headers)
+
+    key, cached = cached_response(cache, method, path, query, headers)
+    if cached is not None:
+        status, cached_headers, content = cached
+        return Response(content, status=status, headers=cached_headers + [('X-Cache', 'HIT')])
+
+    client = pool.acquire()
+    try:
+        response = client.request(
+            method,
+            path,
+            timeout=(CONNECT_TIMEOUT, timeout) if timeout else None,
+            params=query,
+            data=request.get_data(),
+            headers=headers,
+            stream=True
+        )
+    except BaseException:
+        pool.release(client)
+        raise
+
+    storable = key is not None and cache.storable(response.status_code, response.headers)
+    if transform is not None:
+        try:
+            status, transformed_headers, content = transform_body(transform, response.status_code, response.content)
+        finally:
+            response.close()
+            pool.release(client)
+        if storable and status == 200:
+            cache.set(key, (status, transformed_headers, content))
+        return Response(content, status=status, headers=transformed_headers + ([('X-Cache', 'MISS')] if key is not None else []))
+
+    forwarded = response_headers(response.headers)
+    writer = CacheWriter(cache, key, response.status_code, forwarded) if storable else None
+
+    def chunks():
+        for chunk in response.raw.stream(CHUNK_SIZE, decode_content=False):
+            yield chunk
+            if writer is not None:
+                writer.add(chunk)
+        if writer is not None:
+            writer.finish()
+
+    def close():
+        # The connection goes back to the pool once the body was read, or is closed if the client left early
+        response.close()
+        pool.release(client)
+
+    return Response(UpstreamBody(chunks(), close), status=response.status_code, headers=forwarded + ([('X-Cache', 'MISS')] if key is not None else []))
@@ -0,0 +1,215 @@
+import importlib
+import json
+import os
+import re
+from dotenv import load_dotenv
+from werkzeug.exceptions import MethodNotAllowed, NotFound
+from config.policies import RateLimiter, ResponseCache
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Route table of the gateway
+ROUTES_FILE = os.getenv('GATEWAY_ROUTES', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'routes.json'))
+
+# Variable segment of a route path, '<name>' or '<converter:name>'
+VARIABLE = re.compile(r'<(?:(\w+):)?(\w+)>')
+
+# Checks of the variable segments, in the order they are tried, each returns the value or None
+UUID = re.compile(r'[A-Fa-f0-9]{8}-[A-Fa-f0-9]{4}-[A-Fa-f0-9]{4}-[A-Fa-f0-9]{4}-[A-Fa-f0-9]{12}')
+CONVERTERS = {
+    'uuid': lambda segment: segment.lower() if UUID.fullmatch(segment) else None,
+    'string': lambda segment: segment or None,
+    'path': None  # Matches the rest of the path
+}
+
+# Function to load the transformation function of a route
+def load_transform(name):
+    """
+    Imports the function named by the 'transform' of a route.
+
+    Args:
+        name (str): 'module:function', e.g. 'transforms:count_items', a module importable from the gateway directory.
+
+    Returns:
+        callable: The function.
+    """
+    module, _, function = name.partition(':')
+    try:
+        return getattr(importlib.import_module(module), function)
+    except (ImportError, AttributeError, ValueError) as e:
+        raise ValueError(f"Transform {name} cannot be loaded, expected 'module:function': {e}")
+
+# One route of the route table
+class Route:
+    """
+    Forwards the requests of a gateway path to a path of an upstream service.
+
+    Args:
+        spec (dict): Entry of the route table, with 'path', 'methods', 'upstream', 'target', and
+                     optionally 'timeout' in seconds, 'cache' {'ttl'}, 'rate_limit' {'requests', 'seconds'}
+                     and 'transform', a 'module:function' taking the parsed JSON body and returning the one to send.
+    """
+
+    def __init__(self, spec):
+        self.path = spec['path']
+        self.methods = {method.upper() for method in spec['methods']}
+        if 'GET' in self.methods:
+            self.methods.add('HEAD')
+        self.upstream = spec['upstream']
+        self.target = spec['target']
+        self.timeout = spec.get('timeout')
+        self.cache = ResponseCache(spec['cache']['ttl']) if spec.get('cache') else None
+        self.rate_limit = RateLimiter(spec['rate_limit']['requests'], spec['rate_limit']['seconds']) if spec.get('rate_limit') else None
+        self.transform = load_transform(spec['transform']) if spec.get('transform') else None
+        self.variables = [match.group(2) for match in VARIABLE.finditer(self.path)]
+
+        try:
+            self.target.format(**{name: '' for name in self.variables})
+        except (KeyError, IndexError) as e:
+            raise ValueError(f"Target {self.target} of route {self.path} uses an unknown variable: {e}")
+
+    def target_path(self, values):
+        # Path on the upstream for the matched variable values
+        return self.target.format(**values)
+
+    def throttle(self, client):
+        # Seconds the client must wait before calling the route, 0 if it may now
+        return self.rate_limit.take(client) if self.rate_limit is not None else 0
+
+    def stats(self):
+        stats = {}
+        if self.cache is not None:
+            stats['cache'] = self.cache.stats()
+        if self.rate_limit is not None:
+            stats['rate_limit'] = self.rate_limit.stats()
+        return stats
+
+# Node of the router's tree, one per path segment
+class RouteNode:
+    def __init__(self):
+        self.static = {}
+        self.variables = {}
+        self.routes = {}
+
+# Router of the gateway paths
+class Router:
+    """
+    Finds the route of a request path in a tree of the route paths, one level per segment.
+
+    Matching walks the segments of the path once, so it does not slow down as routes are added.
+    A static segment is preferred over a variable one, and a variable is only tried when the
+    static branch does not lead to a route for the method, like the Flask routing it replaces.
+    """
+
+    def __init__(self, routes):
+        self.root = RouteNode()
+        self.routes = []
+        for route in routes:
+            self.add(route)
+
+    @property
+    def methods(self):
+        return sorted({method for route in self.routes for method in route.methods})
+
+    def add(self, route):
+        node = self.root
+        segments = route.path.lstrip('/').split('/')
+        for index, segment in enumerate(segments):
+            variable = VARIABLE.fullmatch(segment)
+            if variable is None:
+                node = node.static.setdefault(segment, RouteNode())
+                continue
+            converter = variable.group(1) or 'string'
+            if converter not in CONVERTERS:
+                raise ValueError(f"Unknown converter {converter} in route {route.path}")
+            if converter == 'path' and index != len(segments) - 1:
+                raise ValueError(f"A path variable must be the last segment of route {route.path}")
+            node = node.variables.setdefault(converter, RouteNode())
+
+        for method in route.methods:
+            if method in node.routes:
+                raise ValueError(f"Route {method} {route.path} is defined twice")
+            node.routes[method] = route
+        self.routes.append(route)
+
+    def _walk(self, node, segments, index, values):
+        # Yields the nodes with routes matching the segments, and their variable values, best match first
+        if index == len(segments):
+            if node.routes:
+                yield node, values
+            return
+
+        segment = segments[index]
+        if segment in node.static:
+            yield from self._walk(node.static[segment], segments, index + 1, values)
+        for converter, check in CONVERTERS.items():
+            child = node.variables.get(converter)
+            if child is None:
+                continue
+            if check is None:
+                rest = '/'.join(segments[index:])
+                if rest and child.routes:
+                    yield child, values + [rest]
+                continue
+            value = check(segment)
+            if value is not None:
+                yield from self._walk(child, segments, index + 1, values + [value])
+
+    def match(self, method, path):
+        """
+        Finds the route of a request.
+
+        Args:
+            method (str): HTTP method of the request.
+            path (str): Path of the request, starting with '/'.
+
+        Returns:
+            tuple: (Route, dict of the variable values).
+
+        Raises:
+            NotFound: If no route matches the path.
+            MethodNotAllowed: If routes match the path, but none for the method.
+        """
+        allowed = set()
+        for node, values in self._walk(self.root, path.lstrip('/').split('/'), 0, []):
+            route = node.routes.get(method)
+            if route is not None:
+                return route, dict(zip(route.variables, values))
+            allowed.update(node.routes)
+        if allowed:
+            raise MethodNotAllowed(valid_methods=sorted(allowed))
+        raise NotFound()
+
+    def stats(self):
+        return {f"{','.join(sorted(route.methods))} {route.path}": route.stats() for route in self.routes if route.stats()}
+
+# Function to load the route table
+def load_routes(path=ROUTES_FILE):
+    """
+    Loads the upstream services and routes of the gateway.
+
+    The replicas of an upstream are read from the environment variable named by its 'replicas_env',
+    a comma separated list of base URLs, and from its 'replicas' list otherwise.
+
+    Args:
+        path (str): Path of the route table, GATEWAY_ROUTES or routes.json by default.
+
+    Returns:
+        tuple: (dict of the replica base URLs by upstream name, Router).
+    """
+    with open(path) as f:
+        table = json.load(f)
+
+    upstreams = {}
+    for name, spec in table['upstreams'].items():
+        replicas = os.getenv(spec.get('replicas_env', ''), '')
+        upstreams[name] = [url.strip() for url in replicas.split(',') if url.strip()] or spec['replicas']
+        if not upstreams[name]:
+            raise ValueError(f"Upstream {name} has no replicas")
+
+    routes = [Route(spec) for spec in table['routes']]
+    for route in routes:
+        if route.upstream not in upstreams:
+            raise ValueError(f"Route {route.path} uses the unknown upstream {route.upstream}")
+    return upstreams, Router(routes)
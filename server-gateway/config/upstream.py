@@ -0,0 +1,298 @@
+import bisect
+import os
+import random
+import threading
+import time
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Upstream client settings
+POOL_SIZE = int(os.getenv('UPSTREAM_POOL_SIZE', 20))                    # Keep-alive connections per upstream
+CONNECT_TIMEOUT = float(os.getenv('UPSTREAM_CONNECT_TIMEOUT', 2))       # Seconds to open a connection
+READ_TIMEOUT = float(os.getenv('UPSTREAM_READ_TIMEOUT', 30))            # Seconds to wait for response data
+RETRIES = int(os.getenv('UPSTREAM_RETRIES', 2))                         # Retries of idempotent requests
+RETRY_BACKOFF = float(os.getenv('UPSTREAM_RETRY_BACKOFF', 0.2))         # Backoff factor between retries, in seconds
+BREAKER_FAILURES = int(os.getenv('UPSTREAM_BREAKER_FAILURES', 5))       # Consecutive failures that open the circuit
+BREAKER_RESET_SECONDS = float(os.getenv('UPSTREAM_BREAKER_RESET_SECONDS', 30))  # Seconds before an open circuit lets a request through
+
+# Methods that can be sent again without changing the result
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+# Statuses of an upstream that is down or overloaded, retried and counted as failures
+UNAVAILABLE_STATUSES = (502, 503, 504)
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+# Error raised instead of calling an upstream whose circuit is open
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    pass
+
+# Circuit breaker of one upstream
+class CircuitBreaker:
+    """
+    Stops calling an upstream after BREAKER_FAILURES consecutive failures.
+
+    While the circuit is open, requests fail right away instead of waiting for the timeouts of an
+    upstream that is down. After BREAKER_RESET_SECONDS one request is let through: the circuit
+    closes if it succeeds and opens again if it fails. A trial that has not ended after another
+    BREAKER_RESET_SECONDS, e.g. because its caller was cancelled, no longer blocks the next one.
+    """
+
+    def __init__(self, failures=BREAKER_FAILURES, reset_seconds=BREAKER_RESET_SECONDS):
+        self.failure_threshold = failures
+        self.reset_seconds = reset_seconds
+        self.lock = threading.Lock()
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+
+    def _trial_due(self):
+        # Whether an open circuit, or a half-open one whose trial never ended, may send a trial request
+        return self.state != 'closed' and time.monotonic() - self.opened_at >= self.reset_seconds
+
+    def allow(self):
+        # Whether a request may be sent, an open circuit lets one trial request through once it is old enough
+        with self.lock:
+            if self.state == 'closed':
+                return True
+            if self._trial_due():
+                self.state = 'half_open'
+                self.opened_at = time.monotonic()
+                return True
+            self.rejected += 1
+            return False
+
+    def available(self):
+        # Whether allow() would let a request through, without counting a rejection or starting a trial
+        with self.lock:
+            return self.state == 'closed' or self._trial_due()
+
+    def record(self, success):
+        with self.lock:
+            if success:
+                self.state = 'closed'
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+    def abandon(self):
+        # Resolves a trial request that ended without a result, e.g. cancelled when its client left,
+        # by opening the circuit again; requests abandoned while it is closed are not failures
+        with self.lock:
+            if self.state == 'half_open':
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        with self.lock:
+            return {'state': self.state, 'consecutive_failures': self.failures, 'rejected': self.rejected}
+
+# Latency histogram of one upstream
+class LatencyHistogram:
+    """
+    Counts request latencies in fixed buckets, like a Prometheus histogram.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, milliseconds):
+        with self.lock:
+            self.counts[bisect.bisect_left(self.buckets, milliseconds)] += 1
+            self.total += milliseconds
+            self.count += 1
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th quantile, None without observations
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def stats(self):
+        """
+        Reports the histogram.
+
+        Returns:
+            dict: The cumulative count of every bucket ('le' upper bounds in ms), the count, the
+                  mean and the p50, p95 and p99 bucket bounds.
+        """
+        with self.lock:
+            cumulative = []
+            seen = 0
+            for bound, count in zip([str(bound) for bound in self.buckets] + ['+Inf'], self.counts):
+                seen += count
+                cumulative.append({'le': bound, 'count': seen})
+            return {
+                'count': self.count,
+                'mean_ms': round(self.total / self.count, 3) if self.count else None,
+                'p50_ms': self.quantile(0.5),
+                'p95_ms': self.quantile(0.95),
+                'p99_ms': self.quantile(0.99),
+                'buckets': cumulative
+            }
+
+# Pooled HTTP client of one upstream service
+class UpstreamClient:
+    """
+    Sends the requests of the gateway to one upstream service.
+
+    Requests share a session with a pool of POOL_SIZE keep-alive connections, so a forwarded call
+    does not open a new TCP connection. Every request has connect and read timeouts. Requests are
+    retried up to RETRIES times with exponential backoff when the connection could not be opened,
+    since the upstream never saw them, and idempotent requests also on 502, 503 and 504 responses.
+    Read errors and timeouts are not retried: the upstream is already busy with the request, and
+    sending it again would hold the gateway worker for several read timeouts. A circuit breaker
+    fails requests right away while the upstream is down.
+    """
+
+    def __init__(self, name, base_url, pool_size=POOL_SIZE, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT, retries=RETRIES, retry_backoff=RETRY_BACKOFF, breaker=None):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = LatencyHistogram()
+        self.lock = threading.Lock()
+        self.counters = {'requests': 0, 'errors': 0, 'unavailable': 0}
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            status=retries,
+            backoff_factor=retry_backoff,
+            allowed_methods=IDEMPOTENT_METHODS,
+            status_forcelist=UNAVAILABLE_STATUSES,
+            raise_on_status=False
+        )
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def request(self, method, path, timeout=None, **kwargs):
+        """
+        Sends a request to the upstream.
+
+        Args:
+            method (str): HTTP method.
+            path (str): Path on the upstream, starting with '/'.
+            timeout (tuple, optional): (connect, read) timeouts in seconds, the client timeouts by default.
+            **kwargs: Passed to `requests.Session.request`, e.g. 'json', 'params' or 'stream'.
+
+        Returns:
+            Response: The upstream response, whatever its status.
+
+        Raises:
+            CircuitOpenError: If the circuit of the upstream is open.
+            requests.exceptions.RequestException: If the upstream could not be reached in time.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} upstream is unavailable, retrying in at most {self.breaker.reset_seconds:g} seconds")
+
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=timeout or self.timeout, **kwargs)
+        except requests.exceptions.RequestException:
+            self.breaker.record(False)
+            with self.lock:
+                self.counters['requests'] += 1
+                self.counters['errors'] += 1
+            raise
+        finally:
+            self.latency.observe((time.perf_counter() - started) * 1000)
+
+        unavailable = response.status_code in UNAVAILABLE_STATUSES
+        self.breaker.record(not unavailable)
+        with self.lock:
+            self.counters['requests'] += 1
+            if unavailable:
+                self.counters['unavailable'] += 1
+        return response
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request('PUT', path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request('DELETE', path, **kwargs)
+
+    def stats(self):
+        """
+        Reports the traffic of the upstream.
+
+        Returns:
+            dict: The base URL, the request, error and unavailable counters, the circuit state and the latency histogram.
+        """
+        with self.lock:
+            counters = dict(self.counters)
+        return {'base_url': self.base_url, **counters, 'circuit': self.breaker.stats(), 'latency': self.latency.stats()}
+
+# Replicas of one upstream service
+class UpstreamPool:
+    """
+    Spreads the requests of one upstream service over its replicas.
+
+    Each request goes to the replica with the fewest outstanding requests, among the replicas
+    whose circuit would let it through, ties broken at random. A slow or overloaded replica keeps
+    its requests longer and so gets fewer new ones. When every circuit is open, a replica is still
+    picked so the request fails right away with its CircuitOpenError. The clients are
+    `UpstreamClient` or `AsyncUpstreamClient` instances.
+
+    Args:
+        name (str): Name of the upstream.
+        clients (list): One client per replica.
+    """
+
+    def __init__(self, name, clients):
+        self.name = name
+        self.clients = clients
+        self.lock = threading.Lock()
+        self.outstanding = {client: 0 for client in clients}
+
+    def acquire(self):
+        """
+        Picks the replica of a request, which must be given back with `release` once its response was read.
+
+        Returns:
+            UpstreamClient: Client of the replica.
+        """
+        with self.lock:
+            candidates = [client for client in self.clients if client.breaker.available()] or self.clients
+            least = min(self.outstanding[client] for client in candidates)
+            client = random.choice([client for client in candidates if self.outstanding[client] == least])
+            self.outstanding[client] += 1
+            return client
+
+    def release(self, client):
+        with self.lock:
+            self.outstanding[client] -= 1
+
+    def stats(self):
+        with self.lock:
+            outstanding = dict(self.outstanding)
+        return {'replicas': [{**client.stats(), 'outstanding': outstanding[client]} for client in self.clients]}
@@ -0,0 +1,207 @@
+# Import required libraries
+import numpy as np
+import os
+
+from dotenv import load_dotenv
+import config.preprocessing_accommodation
+import config.preprocessing_culinary
+import config.preprocessing_tour
+
+# Load env
+load_dotenv()
+
+# Largest number of queries accepted in one batch and largest top_n of a query
+MAX_BATCH_QUERIES = int(os.getenv('MAX_BATCH_QUERIES', 50))
+MAX_TOP_N = 50
+
+# Batch domains, with the module serving them, the catalog they need, the key of their
+# results (the same key as the single query endpoints) and their filter fields
+DOMAINS = {
+    "tours": {
+        "module": config.preprocessing_tour,
+        "catalog": "tour_catalog",
+        "result_key": "tours",
+        "visited": config.preprocessing_tour.visited_tour_recommendations,
+        "fields": ['max_price', 'min_rating', 'category', 'city'],
+    },
+    "culinaries": {
+        "module": config.preprocessing_culinary,
+        "catalog": "culinary_catalog",
+        "result_key": "culinaries",
+        "visited": config.preprocessing_culinary.visited_culinary_recommendations,
+        "fields": ['max_price', 'min_rating', 'category', 'city'],
+    },
+    "accommodations": {
+        "module": config.preprocessing_accommodation,
+        "catalog": "accommodation_catalog",
+        "result_key": "accomodations",
+        "visited": config.preprocessing_accommodation.visited_accommodation_recommendations,
+        "fields": ['max_price', 'min_rating', 'city'],
+    },
+}
+
+# Function to name the queries of a batch
+def query_ids(queries):
+
+    """
+    Return the id of every query, its position in the batch when it has none.
+
+    Args:
+    - queries (list): Batch queries
+
+    Returns:
+    - ids (list): Query ids as strings, in query order
+    """
+
+    return [str(query.get("id", position)) if isinstance(query, dict) else str(position) for position, query in enumerate(queries)]
+
+# Function to validate one query of a batch
+def validate_query(query):
+
+    """
+    Check the shape of one batch query.
+
+    Args:
+    - query (dict): Query with a 'domain', a 'top_n' and either 'filters' or a 'visited' place name
+
+    Returns:
+    - error (str or None): Why the query is invalid, None if it is valid
+    """
+
+    if not isinstance(query, dict):
+        return "Query must be a JSON object."
+    if query.get("domain") not in DOMAINS:
+        return f"'domain' must be one of {', '.join(DOMAINS)}."
+
+    top_n = query.get("top_n", 5)
+    if not isinstance(top_n, int) or isinstance(top_n, bool) or not 1 <= top_n <= MAX_TOP_N:
+        return f"'top_n' must be an integer between 1 and {MAX_TOP_N}."
+
+    if "visited" in query:
+        if not isinstance(query["visited"], str):
+            return "'visited' must be a place name."
+        if not isinstance(query.get("city_filter", ""), (str, type(None))):
+            return "'city_filter' must be a city name."
+        if not isinstance(query.get("max_price", 0), (int, float, type(None))):
+            return "'max_price' must be a number."
+        return None
+
+    filters = query.get("filters")
+    if not isinstance(filters, dict):
+        return "Query must have either 'filters' or 'visited'."
+
+    fields = DOMAINS[query["domain"]]["fields"]
+    if not all(key in filters for key in fields):
+        return f"Missing one or more required fields: {', '.join(repr(key) for key in fields)}"
+    if not all(isinstance(filters[key], (int, float)) for key in ('max_price', 'min_rating')):
+        return "'max_price' and 'min_rating' must be numbers."
+    if not all(isinstance(filters[key], str) for key in fields if key in ('category', 'city')):
+        return "'category' and 'city' must be strings."
+    return None
+
+# Function to answer the filter queries of one domain together
+def filter_results(catalog, queries, columns, has_category):
+
+    """
+    Rank the filter queries of one domain against one catalog snapshot.
+
+    The price and rating thresholds of every query are normalized with a single vectorized call,
+    every query is ranked from the precomputed scores, and the response rows of the whole
+    batch are read from the catalog with a single DataFrame lookup.
+
+    Args:
+    - catalog (CatalogSnapshot): Snapshot shared by every query of the batch
+    - queries (list): Valid filter queries of the domain
+    - columns (list): Columns of the response rows
+    - has_category (bool): Whether the queries filter on category
+
+    Returns:
+    - results (list): Response rows of every query, in query order
+    """
+
+    # Normalize the thresholds of every query at once
+    thresholds = catalog.input_encoder.scale_values(
+        [[query["filters"]["max_price"], query["filters"]["min_rating"]] for query in queries]
+    )
+
+    ranked = [
+        catalog.top_rows(
+            query["filters"]["city"],
+            query["filters"]["category"] if has_category else None,
+            max_price_scaled,
+            min_rating_scaled,
+            query.get("top_n", 5),
+        )
+        for query, (max_price_scaled, min_rating_scaled) in zip(queries, thresholds)
+    ]
+
+    # Read the rows of the whole batch in one lookup, then split them back per query
+    records = catalog.rows(np.concatenate(ranked), columns).to_dict(orient='records')
+    ends = np.cumsum([len(rows) for rows in ranked])
+    return [records[end - len(rows):end] for rows, end in zip(ranked, ends)]
+
+# Function to answer a batch of recommendation queries
+def recommend_batch(queries):
+
+    """
+    Answer a batch of heterogeneous recommendation queries in one pass.
+
+    Every domain is answered from one catalog snapshot, so all the queries of a batch see the
+    same data even if a catalog refresh happens meanwhile. Filter queries of the same domain
+    are ranked together by `filter_results`; visited queries reuse the precomputed neighbours.
+
+    Args:
+    - queries (list): Queries, each a dict with an optional 'id', a 'domain', an optional
+      'top_n' and either 'filters' (the body of the single query endpoint) or 'visited'
+      (a place name) with optional 'city_filter' and 'max_price'
+
+    Returns:
+    - results (dict): Query id (its position if it has none) mapped to the response of the
+      query, with its HTTP-like 'status'
+    """
+
+    ids = query_ids(queries)
+    results = dict.fromkeys(ids)
+    filter_queries = {domain: [] for domain in DOMAINS}
+
+    for query_id, query in zip(ids, queries):
+        error = validate_query(query)
+        if error:
+            results[query_id] = {"status": 400, "error": error}
+        elif "visited" not in query:
+            filter_queries[query["domain"]].append((query_id, query))
+
+    # Take one snapshot per domain for the whole batch
+    catalogs = {domain: getattr(spec["module"], spec["catalog"]) for domain, spec in DOMAINS.items()}
+
+    for domain, pending in filter_queries.items():
+        if not pending:
+            continue
+
+        spec = DOMAINS[domain]
+        found = filter_results(catalogs[domain], [query for _, query in pending], spec["module"].RECOMMENDATION_COLUMNS, "category" in spec["fields"])
+        for (query_id, _), records in zip(pending, found):
+            if records:
+                results[query_id] = {"status": 200, spec["result_key"]: records}
+            else:
+                results[query_id] = {"status": 404, "message": "No recommendations found."}
+
+    for query_id, query in zip(ids, queries):
+        if results[query_id] is not None:
+            continue
+
+        spec = DOMAINS[query["domain"]]
+        records = spec["visited"](query["visited"], query.get("city_filter"), query.get("max_price"), query.get("top_n", 5), catalog=catalogs[query["domain"]])
+
+        # Some visited functions return the error together with a status code
+        if isinstance(records, tuple):
+            records = records[0]
+
+        if isinstance(records, dict) and "error" in records:
+            results[query_id] = {"status": 404, **records}
+        elif records:
+            results[query_id] = {"status": 200, spec["result_key"]: records}
+        else:
+            results[query_id] = {"status": 404, "message": "No recommendations found."}
+
+    return results
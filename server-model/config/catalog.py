@@ -0,0 +1,129 @@
+# Import required libraries
+import itertools
+import time
+import numpy as np
+
+from config.filter_index import FilterIndex
+from config.input_encoder import InputEncoder
+from config.score_store import top_k_rows
+from config.similarity_index import NeighbourIndex
+
+# Catalog versions increase every time a snapshot is built, across all catalogs
+catalog_versions = itertools.count(1)
+
+# Function to make an array read-only
+def freeze(array):
+
+    """
+    Mark a NumPy array as read-only so it can be shared between request threads.
+
+    Args:
+    - array (ndarray): Array to freeze
+
+    Returns:
+    - array (ndarray): The same array with the writeable flag cleared
+    """
+
+    array.flags.writeable = False
+    return array
+
+class CatalogSnapshot:
+
+    """
+    Immutable, preprocessed view of one catalog table shared by every request thread.
+
+    Request handlers only read from a snapshot; per-request values such as filter masks,
+    similarity scores and rankings live in local arrays. Refreshing a catalog means building
+    a new snapshot and swapping the module reference, never mutating the current one.
+
+    Attributes:
+    - version (int): Catalog version, a newer snapshot always has a higher version
+    - built_at (float): Unix time the snapshot was built
+    - data (DataFrame): Catalog rows in their original scale, used for the response payload
+    - features (ndarray): Model input matrix (encoded categories, encoded city, scaled price and rating)
+    - scores (ndarray): Precomputed model score of every row
+    - price (ndarray): 'price_wna' column in its original scale
+    - rating (ndarray): 'rating' column in its original scale
+    - price_scaled (ndarray): Normalized 'price_wna' column
+    - rating_scaled (ndarray): Normalized 'rating' column
+    - name (ndarray): 'name' column
+    - city (ndarray): 'city' column
+    - city_lower (ndarray): Lower-cased 'city' column for case-insensitive filters
+    - category (ndarray or None): 'category' column, None for catalogs without categories
+    - name_to_row (dict): Place name to the row of its first occurrence
+    - neighbours (NeighbourIndex): Cached top-K cosine similarity neighbours of every row
+    - filters (FilterIndex): (city, category) buckets sorted by normalized price
+    - scaler (MinMaxScaler): Scaler fitted on price and rating
+    - encoder_city (OneHotEncoder): Encoder fitted on city
+    - encoder_category (OneHotEncoder or None): Encoder fitted on category
+    - input_encoder (InputEncoder): Compiled scaler and encoders used to encode user input
+    """
+
+    def __init__(self, data, features, scores, scaler, encoder_city, encoder_category=None):
+        self.version = next(catalog_versions)
+        self.built_at = time.time()
+        self.data = data
+        self.features = freeze(np.asarray(features, dtype=np.float64))
+        self.scores = scores
+        self.price = freeze(data['price_wna'].to_numpy(dtype=np.float64))
+        self.rating = freeze(data['rating'].to_numpy(dtype=np.float64))
+        self.price_scaled = self.features[:, -2]
+        self.rating_scaled = self.features[:, -1]
+        self.name = freeze(data['name'].to_numpy(dtype=object))
+        self.city = freeze(data['city'].to_numpy(dtype=object))
+        self.city_lower = freeze(data['city'].str.lower().to_numpy(dtype=object))
+        self.category = freeze(data['category'].to_numpy(dtype=object)) if 'category' in data.columns else None
+        self.name_to_row = {}
+        for row, name in enumerate(self.name):
+            self.name_to_row.setdefault(name, row)
+        self.neighbours = NeighbourIndex(self.features)
+        self.filters = FilterIndex(self.city, self.price_scaled, self.rating_scaled, self.category)
+        self.scaler = scaler
+        self.encoder_city = encoder_city
+        self.encoder_category = encoder_category
+        self.input_encoder = InputEncoder(scaler, encoder_city, encoder_category)
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        # Refuse writes once the snapshot is published to request threads
+        if getattr(self, '_frozen', False):
+            raise AttributeError("CatalogSnapshot is read-only, build a new snapshot instead.")
+        object.__setattr__(self, name, value)
+
+    def __len__(self):
+        return len(self.data)
+
+    def top_rows(self, city, category, max_price_scaled, min_rating_scaled, top_n):
+
+        """
+        Rank the places matching the request filters by their precomputed score.
+
+        Args:
+        - city (str): City to filter on
+        - category (str or None): Category to filter on, None for catalogs without categories
+        - max_price_scaled (float): Highest accepted normalized price
+        - min_rating_scaled (float): Lowest accepted normalized rating
+        - top_n (int): Number of rows to return
+
+        Returns:
+        - rows (ndarray): At most `top_n` row indexes sorted by descending score
+        """
+
+        candidate_rows = self.filters.candidates(city, category, max_price_scaled, min_rating_scaled)
+        return top_k_rows(self.scores, candidate_rows, top_n)
+
+    def rows(self, rows, columns):
+
+        """
+        Build a request-local DataFrame for the given rows in their original scale.
+
+        Args:
+        - rows (ndarray): Positional row indexes, in output order
+        - columns (list): Columns to return, missing columns are skipped
+
+        Returns:
+        - rows (DataFrame): New DataFrame that is safe to modify
+        """
+
+        selected_columns = [col for col in columns if col in self.data.columns]
+        return self.data.iloc[rows][selected_columns].copy()
@@ -0,0 +1,152 @@
+# Import required libraries
+import sqlalchemy as sa
+import threading
+import time
+import os
+
+from dotenv import load_dotenv
+from config.loader import loader
+from config.sql_engine import engine
+
+# Load env
+load_dotenv()
+
+# Seconds between two change checks, 0 disables polling (manual refreshes still work)
+REFRESH_SECONDS = float(os.getenv('CATALOG_REFRESH_SECONDS', 60))
+
+class CatalogRefresher:
+
+    """
+    Poll the catalog tables for changes and rebuild the affected catalogs off the request path.
+
+    Change detection costs one aggregate query per table: the row count and an XOR of the
+    CRC32 of every row, which changes on inserts, updates and deletes. When a table changes,
+    every catalog built from it is rebuilt in the refresher thread by its load function, which
+    swaps the new snapshot in with a single assignment. Requests that already hold the previous
+    snapshot keep using it until they finish.
+    """
+
+    def __init__(self):
+        self.tables = {}
+        self.order = {}
+        self.fingerprints = {}
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.force = False
+        self.stats = {"checks": 0, "refreshes": 0, "last_check": None, "last_refresh": None, "error": None}
+
+    def watch(self, table, columns, name, reload_function):
+
+        """
+        Rebuild a catalog whenever a table it is built from changes.
+
+        Args:
+        - table (str): Table to watch
+        - columns (list): Columns the catalog reads from the table
+        - name (str): Catalog name, used in logs
+        - reload_function (callable): Function rebuilding and swapping in the catalog
+        """
+
+        entry = self.tables.setdefault(table, {"columns": set(), "reloads": []})
+        entry["columns"].update(columns)
+        entry["reloads"].append((name, reload_function))
+
+        # Catalogs are rebuilt in the order they were first watched, so a catalog built from
+        # other catalogs must be watched after them
+        self.order.setdefault(name, len(self.order))
+
+    def fingerprint(self):
+
+        """
+        Compute the fingerprint of every watched table.
+
+        Returns:
+        - fingerprints (dict): Table name mapped to a (row count, checksum) tuple
+        """
+
+        fingerprints = {}
+        with engine.connect() as connection:
+            for table, entry in self.tables.items():
+                columns = ", ".join(sorted(entry["columns"]))
+                query = f"SELECT COUNT(*), COALESCE(BIT_XOR(CRC32(CONCAT_WS('|', {columns}))), 0) FROM {table}"
+                fingerprints[table] = tuple(connection.execute(sa.text(query)).one())
+        return fingerprints
+
+    def check(self, force=False):
+
+        """
+        Check the watched tables once and rebuild the catalogs of the tables that changed.
+
+        Args:
+        - force (bool): Rebuild every catalog even if no table changed
+
+        Returns:
+        - refreshed (list): Names of the rebuilt catalogs
+        """
+
+        current = self.fingerprint()
+        changed = [table for table in self.tables if force or self.fingerprints.get(table) != current[table]]
+
+        # A catalog built from several changed tables is rebuilt only once
+        reloads = {}
+        for table in changed:
+            for name, reload_function in self.tables[table]["reloads"]:
+                reloads.setdefault(name, reload_function)
+        reloads = dict(sorted(reloads.items(), key=lambda item: self.order[item[0]]))
+
+        for name, reload_function in reloads.items():
+            started = time.perf_counter()
+            reload_function()
+            print(f"Refreshed {name} in {round(time.perf_counter() - started, 3)} seconds")
+
+        # Only remember the new fingerprints once every rebuild succeeded, failures retry on the next check
+        self.fingerprints.update(current)
+
+        with self.lock:
+            self.stats["checks"] += 1
+            self.stats["last_check"] = time.time()
+            self.stats["error"] = None
+            if reloads:
+                self.stats["refreshes"] += 1
+                self.stats["last_refresh"] = time.time()
+        return list(reloads)
+
+    def request_refresh(self, force=True):
+        # Ask the refresher thread to check right away instead of waiting for the next poll
+        self.force = self.force or force
+        self.wakeup.set()
+
+    def start(self):
+        threading.Thread(target=self._run, name="catalog-refresh", daemon=True).start()
+
+    def _run(self):
+        if not self.tables:
+            return
+
+        # Take the baseline while the loader reads the catalogs, so later changes are not missed
+        while not self.fingerprints:
+            try:
+                self.fingerprints = self.fingerprint()
+            except Exception as e:
+                print(f"Failed to fingerprint the catalogs: {e}")
+                time.sleep(max(REFRESH_SECONDS, 1))
+
+        loader.wait_all()
+
+        while True:
+            self.wakeup.wait(REFRESH_SECONDS if REFRESH_SECONDS > 0 else None)
+            self.wakeup.clear()
+            force, self.force = self.force, False
+            try:
+                self.check(force)
+            except Exception as e:
+                print(f"Catalog refresh failed: {e}")
+                with self.lock:
+                    self.stats["error"] = str(e)
+
+    def status(self):
+        with self.lock:
+            return dict(self.stats)
+
+# Refresher shared by the server and the catalog modules
+refresher = CatalogRefresher()
@@ -0,0 +1,93 @@
+# Import required libraries
+import numpy as np
+
+from scipy.special import expit
+
+# Activations supported by the exported models
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0),
+    'sigmoid': expit,
+    'tanh': np.tanh,
+}
+
+class DenseModel:
+
+    """
+    NumPy forward pass of a stack of Dense layers exported from a Keras model.
+
+    The recommendation models are small multilayer perceptrons, so serving them does not
+    need TensorFlow: each layer is a float32 matrix product, a bias and an activation.
+    Dropout layers are not exported since they do nothing at inference time.
+    Models are exported from the `.h5` files by `export_models.py`.
+
+    Attributes:
+    - layers (list): (kernel, bias, activation) tuple of every Dense layer, in order
+    """
+
+    def __init__(self, layers):
+        self.layers = []
+        for kernel, bias, activation in layers:
+            if activation not in ACTIVATIONS:
+                raise ValueError(f"Unsupported activation '{activation}'.")
+
+            kernel = np.asarray(kernel, dtype=np.float32)
+            bias = np.asarray(bias, dtype=np.float32)
+            kernel.flags.writeable = False
+            bias.flags.writeable = False
+            self.layers.append((kernel, bias, activation))
+
+    @property
+    def input_shape(self):
+        # Same shape convention as a Keras model, the batch dimension is None
+        return (None, self.layers[0][0].shape[0])
+
+    @classmethod
+    def load(cls, path):
+
+        """
+        Load a model saved by `DenseModel.save`.
+
+        Args:
+        - path (str): Path of the `.npz` file
+
+        Returns:
+        - model (DenseModel): Loaded model
+        """
+
+        with np.load(path, allow_pickle=False) as weights:
+            activations = weights['activations']
+            return cls([(weights[f'kernel_{i}'], weights[f'bias_{i}'], str(activation)) for i, activation in enumerate(activations)])
+
+    def save(self, path):
+
+        """
+        Save the model weights to a `.npz` file.
+
+        Args:
+        - path (str): Path of the `.npz` file
+        """
+
+        weights = {'activations': np.array([activation for _, _, activation in self.layers])}
+        for i, (kernel, bias, _) in enumerate(self.layers):
+            weights[f'kernel_{i}'] = kernel
+            weights[f'bias_{i}'] = bias
+        np.savez(path, **weights)
+
+    def predict(self, X, verbose=0):
+
+        """
+        Run the forward pass, with the same call signature as `keras.Model.predict`.
+
+        Args:
+        - X (ndarray): Input matrix, one row per sample
+        - verbose (int): Ignored, kept for compatibility with Keras
+
+        Returns:
+        - predictions (ndarray): (samples, outputs) float32 matrix
+        """
+
+        outputs = np.asarray(X, dtype=np.float32)
+        for kernel, bias, activation in self.layers:
+            outputs = ACTIVATIONS[activation](outputs @ kernel + bias)
+        return outputs
@@ -0,0 +1,58 @@
+# Import required libraries
+import pandas as pd
+import numpy as np
+
+class FilterIndex:
+
+    """
+    Columnar index of catalog rows bucketed by (city, category) and sorted by price.
+
+    A `max_price` filter becomes a binary search inside one bucket and the rating filter
+    only runs over the affordable slice, so the cost of a request depends on the size of
+    the matching bucket rather than on the size of the whole catalog.
+
+    Attributes:
+    - buckets (dict): (city, category) key mapped to a (rows, prices, ratings) tuple of
+      price-sorted arrays. The category part of the key is None for catalogs without categories.
+    """
+
+    def __init__(self, city, price, rating, category=None):
+        keys = {'city': city} if category is None else {'city': city, 'category': category}
+        groups = pd.DataFrame(keys).groupby(list(keys), sort=False).indices
+
+        self.buckets = {}
+        for key, rows in groups.items():
+            # Sort each bucket by price, keeping catalog order for equal prices
+            rows = rows[np.argsort(price[rows], kind='stable')]
+            bucket = (rows, price[rows], rating[rows])
+            for array in bucket:
+                array.flags.writeable = False
+
+            if category is None:
+                key = (key[0] if isinstance(key, tuple) else key, None)
+            self.buckets[key] = bucket
+
+    def candidates(self, city, category, max_price, min_rating):
+
+        """
+        Return the rows of one bucket with price <= max_price and rating >= min_rating.
+
+        Args:
+        - city (str): City of the bucket
+        - category (str or None): Category of the bucket, None for catalogs without categories
+        - max_price (float): Highest accepted price, on the same scale the index was built with
+        - min_rating (float): Lowest accepted rating, on the same scale the index was built with
+
+        Returns:
+        - rows (ndarray): Matching row indexes, sorted by price
+        """
+
+        bucket = self.buckets.get((city, category))
+        if bucket is None:
+            return np.empty(0, dtype=np.intp)
+
+        rows, prices, ratings = bucket
+
+        # Binary search the price cut, then filter the rating on the affordable slice only
+        end = np.searchsorted(prices, max_price, side='right')
+        return rows[:end][ratings[:end] >= min_rating]
@@ -1,163 +1,463 @@
-import pandas as pd
-from config.sql_engine import engine
+import numpy as np
+import math
+import os
+from collections import namedtuple
+from dotenv import load_dotenv
+from config.catalog import catalog_versions
+from config.catalog_refresh import refresher
+from config.itinerary_index import ItineraryIndex, OBJECTIVES
+from config.loader import loader
+from config.result_cache import ResultCache
+import config.preprocessing_accommodation
+import config.preprocessing_culinary
+import config.preprocessing_tour
 
-# Load data from the database
-tours = pd.read_sql_query("SELECT name, price_wna, city FROM tours", engine)
-culinary = pd.read_sql_query("SELECT name, price_wna, city FROM culinaries", engine)
-accommodations = pd.read_sql_query("SELECT name, price_wna, city FROM accommodations", engine)
+# Load env
+load_dotenv()
 
-def generate_itineraries(user_budget, city=None):
+# The three indexes used to build itineraries, swapped as a whole when the data changes
+ItineraryCatalog = namedtuple('ItineraryCatalog', ['tours', 'culinary', 'accommodations', 'version'])
+
+# Itinerary catalog, loaded in the background by the loader
+itinerary_catalog = None
+
+# Default share of the budget of every category, and the itinerary modes
+DEFAULT_ALLOCATION = {"tours": 0.4, "culinary": 0.3, "accommodation": 0.3}
+MODES = ('greedy', 'knapsack')
+
+# Default and largest number of tours and culinary places chosen by the knapsack mode
+DEFAULT_MAX_ITEMS = 5
+MAX_ITEMS = 20
+
+# Budgets in the same bucket share one cached itinerary, 0 caches every budget separately
+BUDGET_BUCKET = float(os.getenv('ITINERARY_BUDGET_BUCKET', 0))
+
+# Cache of generated itineraries, keyed by catalog version, city, budget bucket and options
+itinerary_cache = ResultCache(int(os.getenv('ITINERARY_CACHE_SIZE', 1024)), float(os.getenv('ITINERARY_CACHE_TTL', 3600)))
+
+def load_itinerary_catalog():
+    """
+    Builds the tour, culinary and accommodation indexes used to build itineraries.
+
+    The indexes are built from the recommendation catalogs, so itineraries can rank places by
+    their model score and share the catalog refreshes.
+    """
+    global itinerary_catalog
+
+    # Build from the recommendation catalogs once they are loaded
+    for name in ('tour_catalog', 'culinary_catalog', 'accommodation_catalog'):
+        loader.wait(name)
+
+    itinerary_catalog = ItineraryCatalog(
+        ItineraryIndex(config.preprocessing_tour.tour_catalog),
+        ItineraryIndex(config.preprocessing_culinary.culinary_catalog),
+        ItineraryIndex(config.preprocessing_accommodation.accommodation_catalog),
+        next(catalog_versions),
+    )
+
+    # Itineraries of the previous catalog can never be hit again
+    itinerary_cache.clear()
+
+# Register the itinerary catalog with the background loader
+loader.register('itinerary_catalog', load_itinerary_catalog)
+
+# Rebuild the itinerary catalog whenever one of its tables changes, after the recommendation catalogs
+for table in ('tours', 'culinaries', 'accommodations'):
+    refresher.watch(table, ['name', 'price_wna', 'city', 'rating'], 'itinerary_catalog', load_itinerary_catalog)
+
+def parse_itinerary_options(user_input):
+    """
+    Reads and validates the optional itinerary parameters of a request.
+
+    Args:
+        user_input (dict): Request body, with optional 'mode' ('greedy' or 'knapsack'), 'objective'
+            ('rating' or 'score'), 'allocation' (share of the budget of 'tours', 'culinary' and
+            'accommodation'), 'max_tours' and 'max_culinary'.
+
+    Returns:
+        tuple: The options as keyword arguments of `generate_itineraries`, and an error message or None.
+    """
+    mode = user_input.get("mode", "greedy")
+    if mode not in MODES:
+        return None, f"'mode' must be one of {', '.join(MODES)}."
+
+    objective = user_input.get("objective", "rating")
+    if objective not in OBJECTIVES:
+        return None, f"'objective' must be one of {', '.join(OBJECTIVES)}."
+
+    allocation = user_input.get("allocation", DEFAULT_ALLOCATION)
+    if not isinstance(allocation, dict) or set(allocation) != set(DEFAULT_ALLOCATION):
+        return None, f"'allocation' must give the share of {', '.join(DEFAULT_ALLOCATION)}."
+    if not all(isinstance(share, (int, float)) and share >= 0 for share in allocation.values()) or sum(allocation.values()) > 1 + 1e-9:
+        return None, "'allocation' shares must be positive and add up to at most 1."
+
+    options = {"mode": mode, "objective": objective, "allocation": allocation}
+    for key in ("max_tours", "max_culinary"):
+        value = user_input.get(key, DEFAULT_MAX_ITEMS)
+        if not isinstance(value, int) or isinstance(value, bool) or not 1 <= value <= MAX_ITEMS:
+            return None, f"'{key}' must be an integer between 1 and {MAX_ITEMS}."
+        options[key] = value
+
+    return options, None
+
+def find_stay(index, accommodations, stay):
+    # Row of the accommodation of the previous night among the affordable ones, None if it is not affordable
+    if stay is None:
+        return None
+    rows = accommodations[index.name[accommodations] == stay]
+    return rows[0] if rows.size else None
+
+def itinerary_item(index, row):
+    # Entry of one place in the itinerary
+    return {"name": index.name[row], "price": float(index.price[row]), "city": index.city[row]}
+
+def greedy_itinerary(catalog, user_budget, city, budgets, exclude=None, stay=None):
+    """
+    Fills the itinerary in catalog order, like a traveller picking the first affordable places.
+
+    Up to 3 free tours are added first, then the first affordable tour, culinary place and
+    accommodation, then one more tour and culinary place at a time while the remaining budget
+    allows it. Places are never repeated. Each category is walked once with a cursor: a place
+    skipped because it was too expensive stays too expensive as the budget only decreases.
+
+    Args:
+        catalog (ItineraryCatalog): Indexes of the three categories.
+        user_budget (float): The total budget for the itinerary.
+        city (str or None): Lower-cased city, None for every city.
+        budgets (dict): Budget of every category.
+        exclude (dict, optional): Names of the tours ('tour') and culinary places ('culinary') already chosen.
+        stay (str, optional): Name of the accommodation of the previous night, kept if still affordable.
+
+    Returns:
+        dict: The itinerary, or an error.
+    """
+    exclude = exclude or {"tour": set(), "culinary": set()}
+
+    # Affordable places of every category, back in catalog order
+    tours = np.sort(catalog.tours.affordable(city, budgets["tours"]))
+    culinary = np.sort(catalog.culinary.affordable(city, budgets["culinary"]))
+    accommodations = np.sort(catalog.accommodations.affordable(city, budgets["accommodation"]))
+
+    print(f"Filtered data: Tours: {len(tours)}, Culinary: {len(culinary)}, Accommodations: {len(accommodations)}")
+
+    # Handle case when no valid options are found
+    if tours.size == 0 or culinary.size == 0 or accommodations.size == 0:
+        print("Not enough options found within the budget.")
+        return {"error": "Not enough options within the given budget and city"}
+
+    itinerary = {}
+    remaining_budget = float(user_budget)
+
+    # Handle free/zero-cost tours (e.g., beaches), numbered by their position among the affordable tours
+    free = [position for position in np.flatnonzero(catalog.tours.price[tours] == 0) if catalog.tours.name[tours[position]] not in exclude["tour"]]
+    for position in free[:3]:
+        itinerary[f"tour_free_{position + 1}"] = itinerary_item(catalog.tours, tours[position])
+
+    # Exclude free tours from further processing
+    paid_tours = tours[catalog.tours.price[tours] > 0]
+
+    # Select one place of every category first, then more tours and culinary places while the budget permits
+    cursors = {"tour": 0, "culinary": 0}
+    used = {kind: set(names) for kind, names in exclude.items()}
+    candidates = {"tour": (catalog.tours, paid_tours), "culinary": (catalog.culinary, culinary)}
+
+    def next_affordable(kind):
+        index, rows = candidates[kind]
+        while cursors[kind] < rows.size:
+            row = rows[cursors[kind]]
+            cursors[kind] += 1
+            if index.price[row] <= remaining_budget and index.name[row] not in used[kind]:
+                used[kind].add(index.name[row])
+                return row
+        return None
+
+    counts = {"tour": 0, "culinary": 0}
+
+    def add(kind, row):
+        nonlocal remaining_budget
+        index = candidates[kind][0]
+        counts[kind] += 1
+        itinerary[f"{kind}_{counts[kind]}"] = itinerary_item(index, row)
+        remaining_budget -= float(index.price[row])
+
+    tour = next_affordable("tour")
+    if tour is not None:
+        add("tour", tour)
+
+    # Every affordable culinary place may already be part of the trip
+    culinary_place = next_affordable("culinary")
+    if culinary_place is None:
+        print("Not enough options found within the budget.")
+        return {"error": "Not enough options within the given budget and city"}
+    add("culinary", culinary_place)
+
+    accommodation = find_stay(catalog.accommodations, accommodations, stay)
+    if accommodation is None:
+        accommodation = accommodations[0]
+    itinerary["accommodation"] = itinerary_item(catalog.accommodations, accommodation)
+    remaining_budget -= float(catalog.accommodations.price[accommodation])
+
+    print(f"Remaining budget after initial selections: {remaining_budget}")
+
+    while remaining_budget > 0:
+        added_item = False
+        for kind in ("tour", "culinary"):
+            row = next_affordable(kind)
+            if row is not None:
+                add(kind, row)
+                added_item = True
+
+        if not added_item:
+            print("No more items can be added within the remaining budget.")
+            break
+
+    itinerary["total_cost"] = user_budget - remaining_budget
+    itinerary["remaining_budget"] = remaining_budget
+    return itinerary
+
+def knapsack_itinerary(catalog, user_budget, city, budgets, objective, max_tours, max_culinary, exclude=None, stay=None):
+    """
+    Chooses the places with the highest total rating or model score within the budget of every category.
+
+    Args:
+        catalog (ItineraryCatalog): Indexes of the three categories.
+        user_budget (float): The total budget for the itinerary.
+        city (str or None): Lower-cased city, None for every city.
+        budgets (dict): Budget of every category.
+        objective (str): Value to maximize, 'rating' or 'score'.
+        max_tours (int): Largest number of tours.
+        max_culinary (int): Largest number of culinary places.
+        exclude (dict, optional): Names of the tours ('tour') and culinary places ('culinary') already chosen.
+        stay (str, optional): Name of the accommodation of the previous night, kept if still affordable.
+
+    Returns:
+        dict: The itinerary, or an error.
+    """
+    exclude = exclude or {"tour": set(), "culinary": set()}
+
+    tours = catalog.tours.pack(city, budgets["tours"], objective, max_tours, exclude["tour"])
+    culinary = catalog.culinary.pack(city, budgets["culinary"], objective, max_culinary, exclude["culinary"])
+    accommodations = catalog.accommodations.pack(city, budgets["accommodation"], objective, 1)
+    kept = find_stay(catalog.accommodations, catalog.accommodations.affordable(city, budgets["accommodation"]), stay)
+    if kept is not None:
+        accommodations = np.array([kept])
+
+    print(f"Packed data: Tours: {len(tours)}, Culinary: {len(culinary)}, Accommodations: {len(accommodations)}")
+
+    # Handle case when no valid options are found
+    if tours.size == 0 or culinary.size == 0 or accommodations.size == 0:
+        print("Not enough options found within the budget.")
+        return {"error": "Not enough options within the given budget and city"}
+
+    itinerary = {}
+    free_count = paid_count = 0
+    for row in tours:
+        if catalog.tours.price[row] == 0:
+            free_count += 1
+            itinerary[f"tour_free_{free_count}"] = itinerary_item(catalog.tours, row)
+        else:
+            paid_count += 1
+            itinerary[f"tour_{paid_count}"] = itinerary_item(catalog.tours, row)
+
+    for position, row in enumerate(culinary):
+        itinerary[f"culinary_{position + 1}"] = itinerary_item(catalog.culinary, row)
+    itinerary["accommodation"] = itinerary_item(catalog.accommodations, accommodations[0])
+
+    total_cost = float(
+        catalog.tours.price[tours].sum() + catalog.culinary.price[culinary].sum() + catalog.accommodations.price[accommodations].sum()
+    )
+    itinerary["total_cost"] = total_cost
+    itinerary["remaining_budget"] = user_budget - total_cost
+    return itinerary
+
+def quantize_budget(user_budget):
+    # Bottom of the budget bucket, budgets below one bucket are kept as they are
+    if BUDGET_BUCKET > 0 and user_budget >= BUDGET_BUCKET:
+        return math.floor(user_budget / BUDGET_BUCKET) * BUDGET_BUCKET
+    return user_budget
+
+def generate_itineraries(user_budget, city=None, mode="greedy", objective="rating", allocation=None, max_tours=DEFAULT_MAX_ITEMS, max_culinary=DEFAULT_MAX_ITEMS):
     """
     Generates an itinerary based on the user's budget, including tours, culinary experiences, and accommodation.
-    
+
+    Itineraries are deterministic for a catalog, so they are cached by catalog version, city, budget
+    bucket and options. With ITINERARY_BUDGET_BUCKET set, the itinerary is planned for the bottom of
+    the bucket of the budget, so it never exceeds the budget, and the remaining budget is reported
+    against the actual budget.
+
     Args:
         user_budget (float): The total budget for the itinerary.
         city (str, optional): The city where the itinerary should be generated. If None, no city filtering is applied.
+        mode (str, optional): 'greedy' picks the first affordable places in catalog order, 'knapsack' maximizes the objective.
+        objective (str, optional): Value maximized by the knapsack mode, 'rating' or the model 'score'.
+        allocation (dict, optional): Share of the budget of 'tours', 'culinary' and 'accommodation' (40/30/30 by default).
+        max_tours (int, optional): Largest number of tours chosen by the knapsack mode.
+        max_culinary (int, optional): Largest number of culinary places chosen by the knapsack mode.
 
     Returns:
-        dict: A dictionary containing the generated itinerary with selected tours, culinary experiences, and accommodations, 
+        dict: A dictionary containing the generated itinerary with selected tours, culinary experiences, and accommodations,
               along with the total cost and remaining budget.
     """
     if user_budget <= 0:
         return {"error": "Budget must be greater than 0."}
 
-    try:
-        print(f"Starting itinerary generation with budget: {user_budget}, city: {city}")
-
-        # Allocate budget: 40% for tours, 30% for culinary, 30% for accommodation
-        tour_budget = user_budget * 0.4
-        culinary_budget = user_budget * 0.3
-        accommodation_budget = user_budget * 0.3
-        print(f"Allocated budgets: Tour: {tour_budget}, Culinary: {culinary_budget}, Accommodation: {accommodation_budget}")
-
-        # Normalize and clean up the city input (if any)
-        if city:
-            city = city.strip().lower()  # Strip spaces and convert to lowercase for case-insensitive comparison
-            print(f"Filtered by city: {city}")
-
-            # Pre-filter data based on city (if given)
-            tours_filtered = tours[tours['city'].str.lower() == city]
-            culinary_filtered = culinary[culinary['city'].str.lower() == city]
-            accommodations_filtered = accommodations[accommodations['city'].str.lower() == city]
-        else:
-            # If no city is given, keep the entire dataset
-            tours_filtered = tours
-            culinary_filtered = culinary
-            accommodations_filtered = accommodations
-
-        # Filter data based on budget
-        tours_filtered = tours_filtered[tours_filtered['price_wna'] <= tour_budget].reset_index(drop=True)
-        culinary_filtered = culinary_filtered[culinary_filtered['price_wna'] <= culinary_budget].reset_index(drop=True)
-        accommodations_filtered = accommodations_filtered[accommodations_filtered['price_wna'] <= accommodation_budget].reset_index(drop=True)
-
-        print(f"Filtered data: Tours: {len(tours_filtered)}, Culinary: {len(culinary_filtered)}, Accommodations: {len(accommodations_filtered)}")
-
-        # Handle case when no valid options are found
-        if tours_filtered.empty or culinary_filtered.empty or accommodations_filtered.empty:
-            print("Not enough options found within the budget.")
-            return {"error": "Not enough options within the given budget and city"}
-
-        # Initialize itinerary dictionary and remaining budget
-        itinerary = {}
-        remaining_budget = user_budget
-        print(f"Initial remaining budget: {remaining_budget}")
-
-        # Handle free/zero-cost tours (e.g., beaches)
-        free_tours = tours_filtered[tours_filtered['price_wna'] == 0].head(3)  # Max 3 free tours
-        for idx, free_tour in free_tours.iterrows():
-            itinerary[f"tour_free_{idx+1}"] = {
-                "name": free_tour['name'],
-                "price": free_tour['price_wna'],
-                "city": free_tour['city'],
-            }
-
-        # Exclude free tours from further processing
-        tours_filtered = tours_filtered[tours_filtered['price_wna'] > 0]
-
-        # Select one item from each category if still within budget
-        if not tours_filtered.empty:
-            selected_tour = tours_filtered.iloc[0]
-            itinerary["tour_1"] = {
-                "name": selected_tour['name'],
-                "price": selected_tour['price_wna'],
-                "city": selected_tour['city'],
-            }
-            remaining_budget -= selected_tour['price_wna']
-        else:
-            selected_tour = None
-
-        if not culinary_filtered.empty:
-            selected_culinary = culinary_filtered.iloc[0]
-            itinerary["culinary_1"] = {
-                "name": selected_culinary['name'],
-                "price": selected_culinary['price_wna'],
-                "city": selected_culinary['city'],
-            }
-            remaining_budget -= selected_culinary['price_wna']
-        else:
-            selected_culinary = None
-
-        if not accommodations_filtered.empty:
-            selected_accommodation = accommodations_filtered.iloc[0]
-            itinerary["accommodation"] = {
-                "name": selected_accommodation['name'],
-                "price": selected_accommodation['price_wna'],
-                "city": selected_accommodation['city'],
-            }
-            remaining_budget -= selected_accommodation['price_wna']
-        else:
-            selected_accommodation = None
-
-        # Additional items only if budget permits
-        print(f"Remaining budget after initial selections: {remaining_budget}")
-
-        tour_index = 2
-        culinary_index = 2
-
-        while remaining_budget > 0:
-            added_item = False
-
-            # Add additional tours if affordable
-            affordable_tours = tours_filtered[tours_filtered['price_wna'] <= remaining_budget]
-            if not affordable_tours.empty:
-                additional_tour = affordable_tours.iloc[0]
-                itinerary[f"tour_{tour_index}"] = {
-                    "name": additional_tour['name'],
-                    "price": additional_tour['price_wna'],
-                    "city": additional_tour['city'],
-                }
-                remaining_budget -= additional_tour['price_wna']
-                print(f"Added tour: {additional_tour['name']}, Remaining budget: {remaining_budget}")
-                tour_index += 1
-                added_item = True
-                tours_filtered = tours_filtered[tours_filtered['name'] != additional_tour['name']]
-
-            # Add additional culinary if affordable
-            affordable_culinary = culinary_filtered[culinary_filtered['price_wna'] <= remaining_budget]
-            if not affordable_culinary.empty:
-                additional_culinary = affordable_culinary.iloc[0]
-                itinerary[f"culinary_{culinary_index}"] = {
-                    "name": additional_culinary['name'],
-                    "price": additional_culinary['price_wna'],
-                    "city": additional_culinary['city'],
-                }
-                remaining_budget -= additional_culinary['price_wna']
-                print(f"Added culinary: {additional_culinary['name']}, Remaining budget: {remaining_budget}")
-                culinary_index += 1
-                added_item = True
-                culinary_filtered = culinary_filtered[culinary_filtered['name'] != additional_culinary['name']]
+    # Use one catalog for the whole request, even if a refresh swaps it meanwhile
+    catalog = itinerary_catalog
+    allocation = allocation or DEFAULT_ALLOCATION
+
+    # Normalize and clean up the city input (if any)
+    if city:
+        city = city.strip().lower()  # Strip spaces and convert to lowercase for case-insensitive comparison
+    else:
+        city = None
 
-            if not added_item:
-                print("No more items can be added within the remaining budget.")
-                break
+    # The knapsack parameters do not change greedy itineraries
+    planned_budget = quantize_budget(user_budget)
+    if mode == "knapsack":
+        key = (catalog.version, city, planned_budget, mode, objective, tuple(sorted(allocation.items())), max_tours, max_culinary)
+    else:
+        key = (catalog.version, city, planned_budget, mode, tuple(sorted(allocation.items())))
 
-        # Log final itinerary
-        total_cost = user_budget - remaining_budget
-        itinerary["total_cost"] = total_cost
-        itinerary["remaining_budget"] = remaining_budget
-        print(f"Final itinerary: {itinerary}")
+    itinerary = itinerary_cache.get(key)
+    if itinerary is None:
+        try:
+            print(f"Starting itinerary generation with budget: {planned_budget}, city: {city}, mode: {mode}")
 
+            # Allocate budget: 40% for tours, 30% for culinary, 30% for accommodation by default
+            budgets = {category: planned_budget * share for category, share in allocation.items()}
+            print(f"Allocated budgets: Tour: {budgets['tours']}, Culinary: {budgets['culinary']}, Accommodation: {budgets['accommodation']}")
+
+            if mode == "knapsack":
+                itinerary = knapsack_itinerary(catalog, planned_budget, city, budgets, objective, max_tours, max_culinary)
+            else:
+                itinerary = greedy_itinerary(catalog, planned_budget, city, budgets)
+        except Exception as e:
+            print(f"Error during itinerary generation: {str(e)}")
+            return {"error": "Failed to generate itinerary due to internal error."}
+
+        itinerary_cache.put(key, itinerary)
+        print(f"Generated itinerary, total cost: {itinerary.get('total_cost')}")
+
+    if "error" in itinerary:
         return itinerary
+
+    # Cached itineraries are shared, report the remaining budget on a copy
+    return dict(itinerary, remaining_budget=user_budget - itinerary["total_cost"])
+
+# Largest trip length of the planner
+MAX_DAYS = 30
+
+def parse_plan_request(user_input):
+    """
+    Reads and validates a trip planning request.
+
+    Args:
+        user_input (dict): Request body with 'days', either 'budget' (split evenly between the days) or
+            'daily_budgets' (one budget per day), optionally either 'city' or 'cities' (one city per day),
+            and the optional itinerary parameters read by `parse_itinerary_options`.
+
+    Returns:
+        tuple: The plan as keyword arguments of `plan_trip`, and an error message or None.
+    """
+    days = user_input.get("days")
+    if not isinstance(days, int) or isinstance(days, bool) or not 1 <= days <= MAX_DAYS:
+        return None, f"'days' must be an integer between 1 and {MAX_DAYS}."
+
+    if "daily_budgets" in user_input:
+        daily_budgets = user_input["daily_budgets"]
+        if not isinstance(daily_budgets, list) or len(daily_budgets) != days:
+            return None, "'daily_budgets' must give one budget per day."
+    elif "budget" in user_input:
+        daily_budgets = [user_input["budget"] / days] if isinstance(user_input["budget"], (int, float)) and not isinstance(user_input["budget"], bool) else [None]
+        daily_budgets = daily_budgets * days
+    else:
+        return None, "Missing 'budget' or 'daily_budgets' field in the request."
+    if not all(isinstance(budget, (int, float)) and not isinstance(budget, bool) and budget > 0 for budget in daily_budgets):
+        return None, "Budgets must be numbers greater than 0."
+
+    cities = user_input.get("cities", [user_input.get("city")] * days)
+    if not isinstance(cities, list) or len(cities) != days:
+        return None, "'cities' must give one city per day."
+    if not all(city is None or isinstance(city, str) for city in cities):
+        return None, "Cities must be city names."
+
+    options, error = parse_itinerary_options(user_input)
+    if error:
+        return None, error
+
+    return {"daily_budgets": daily_budgets, "cities": cities, **options}, None
+
+def chosen_names(itinerary):
+    # Names of the tours and culinary places of a day, which later days must not repeat
+    names = {"tour": set(), "culinary": set()}
+    for key, item in itinerary.items():
+        kind = key.split("_")[0]
+        if kind in names:
+            names[kind].add(item["name"])
+    return names
+
+def plan_trip(daily_budgets, cities, mode="greedy", objective="rating", allocation=None, max_tours=DEFAULT_MAX_ITEMS, max_culinary=DEFAULT_MAX_ITEMS):
+    """
+    Plans a trip day by day, with a budget and a city for every day.
+
+    Every day is an itinerary built like `generate_itineraries`, from the same catalog for the
+    whole trip. Tours and culinary places are never repeated between days, and the accommodation
+    of the previous night is kept while the trip stays in the same city and it is affordable.
+
+    Args:
+        daily_budgets (list): Budget of every day.
+        cities (list): City of every day, None for any city.
+        mode (str, optional): 'greedy' or 'knapsack', see `generate_itineraries`.
+        objective (str, optional): Value maximized by the knapsack mode, 'rating' or the model 'score'.
+        allocation (dict, optional): Share of the daily budget of 'tours', 'culinary' and 'accommodation'.
+        max_tours (int, optional): Largest number of tours per day chosen by the knapsack mode.
+        max_culinary (int, optional): Largest number of culinary places per day chosen by the knapsack mode.
+
+    Returns:
+        dict: The plan with the itinerary (or the error) of every day, the total cost and the remaining budget.
+    """
+    # Use one catalog for the whole trip, even if a refresh swaps it meanwhile
+    catalog = itinerary_catalog
+    allocation = allocation or DEFAULT_ALLOCATION
+
+    try:
+        print(f"Starting trip planning for {len(daily_budgets)} days, mode: {mode}")
+
+        exclude = {"tour": set(), "culinary": set()}
+        stay = stay_city = None
+        days = []
+        total_cost = 0.0
+
+        for day, (budget, city) in enumerate(zip(daily_budgets, cities), start=1):
+            city_key = city.strip().lower() if city else None
+            budgets = {category: budget * share for category, share in allocation.items()}
+
+            # Change accommodation when the trip moves to another city
+            if city_key != stay_city:
+                stay = None
+
+            if mode == "knapsack":
+                itinerary = knapsack_itinerary(catalog, budget, city_key, budgets, objective, max_tours, max_culinary, exclude, stay)
+            else:
+                itinerary = greedy_itinerary(catalog, budget, city_key, budgets, exclude, stay)
+
+            if "error" in itinerary:
+                days.append({"day": day, "city": city, "budget": budget, "error": itinerary["error"]})
+                continue
+
+            for kind, names in chosen_names(itinerary).items():
+                exclude[kind] |= names
+            stay, stay_city = itinerary["accommodation"]["name"], city_key
+
+            total_cost += itinerary["total_cost"]
+            days.append({"day": day, "city": city, "budget": budget, "itinerary": itinerary})
+
+        if all("error" in entry for entry in days):
+            return {"error": "Not enough options within the given budgets and cities"}
+
+        plan = {"days": days, "total_cost": total_cost, "remaining_budget": sum(daily_budgets) - total_cost}
+        print(f"Planned trip: {len(days)} days, total cost: {total_cost}")
+        return plan
     except Exception as e:
-        print(f"Error during itinerary generation: {str(e)}")
-        return {"error": "Failed to generate itinerary due to internal error."}
\ No newline at end of file
+        print(f"Error during trip planning: {str(e)}")
+        return {"error": "Failed to plan the trip due to internal error."}
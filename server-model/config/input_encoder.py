@@ -0,0 +1,92 @@
+# Import required libraries
+import numpy as np
+
+class InputEncoder:
+
+    """
+    Compiled form of the scaler and encoders fitted on a catalog, used to encode user input.
+
+    `MinMaxScaler.transform` and `OneHotEncoder.transform` validate their input and go through
+    pandas for every call, which costs milliseconds for a single request. This class keeps the
+    fitted min/scale vectors and a value-to-index dictionary per encoder, so encoding is a
+    multiply-add and a dictionary lookup. The output is identical to the sklearn transforms,
+    including all-zero one-hot columns for unknown categories and cities.
+
+    Attributes:
+    - scale (ndarray): Scale of the 'price_wna' and 'rating' columns, from `MinMaxScaler.scale_`
+    - min (ndarray): Offset of the 'price_wna' and 'rating' columns, from `MinMaxScaler.min_`
+    - category_index (dict or None): Category to its one-hot column, None for catalogs without categories
+    - city_index (dict): City to its one-hot column
+    - width (int): Number of features of an encoded input
+    """
+
+    def __init__(self, scaler, encoder_city, encoder_category=None):
+        self.scale = np.array(scaler.scale_, dtype=np.float64)
+        self.min = np.array(scaler.min_, dtype=np.float64)
+        self.scale.flags.writeable = False
+        self.min.flags.writeable = False
+
+        categories = [] if encoder_category is None else encoder_category.categories_[0]
+        self.category_index = None if encoder_category is None else {value: i for i, value in enumerate(categories)}
+        self.city_index = {value: len(categories) + i for i, value in enumerate(encoder_city.categories_[0])}
+        self.width = len(categories) + len(self.city_index) + 2
+
+    def scale_values(self, values):
+
+        """
+        Normalize (price, rating) pairs like the fitted `MinMaxScaler`.
+
+        Args:
+        - values (array-like): One (price, rating) pair or an (n, 2) matrix of pairs
+
+        Returns:
+        - scaled (ndarray): Normalized values, with the same shape as the input
+        """
+
+        return np.asarray(values, dtype=np.float64) * self.scale + self.min
+
+    def scale_price(self, price):
+        # Normalize a price alone, the rating does not affect the scaled price
+        return float(price) * self.scale[0] + self.min[0]
+
+    def encode(self, user_input):
+
+        """
+        Encode one user input into the model feature layout.
+
+        Args:
+        - user_input (dict): User input containing 'max_price', 'min_rating', 'city' and, for
+          catalogs with categories, 'category'
+
+        Returns:
+        - features (ndarray): (1, width) matrix of encoded category, encoded city, scaled price and rating
+        """
+
+        return self.encode_batch([user_input])
+
+    def encode_batch(self, user_inputs):
+
+        """
+        Encode several user inputs into the model feature layout.
+
+        Args:
+        - user_inputs (list): User inputs, see `encode`
+
+        Returns:
+        - features (ndarray): (n, width) matrix, one row per user input
+        """
+
+        features = np.zeros((len(user_inputs), self.width), dtype=np.float64)
+        features[:, -2:] = self.scale_values([[user_input["max_price"], user_input["min_rating"]] for user_input in user_inputs]).reshape(-1, 2)
+
+        for row, user_input in enumerate(user_inputs):
+            if self.category_index is not None:
+                column = self.category_index.get(user_input["category"])
+                if column is not None:
+                    features[row, column] = 1.0
+
+            column = self.city_index.get(user_input["city"])
+            if column is not None:
+                features[row, column] = 1.0
+
+        return features
@@ -0,0 +1,201 @@
+# Import required libraries
+import heapq
+import pandas as pd
+import numpy as np
+import os
+
+from dotenv import load_dotenv
+
+# Load env
+load_dotenv()
+
+# Number of cheaper and better places that make a place useless to the budget packing
+FRONTIER_SIZE = int(os.getenv('ITINERARY_FRONTIER_SIZE', 64))
+
+# Number of steps the budget of a category is divided into by the budget packing
+BUDGET_STEPS = int(os.getenv('ITINERARY_BUDGET_STEPS', 1000))
+
+# Values the budget packing can maximize
+OBJECTIVES = ('rating', 'score')
+
+# Function to drop the places the budget packing never needs
+def dominance_frontier(rows, values, names, size, exclude=()):
+
+    """
+    Keep the rows that are not dominated by `size` cheaper or equal rows with a higher or equal value.
+
+    A packing of at most `size` places never needs a dominated row: one of the rows dominating
+    it is always free to take its place without raising the cost or lowering the value. Rows
+    must be ordered by ascending price, ties by descending value. Since a row is only compared
+    with the rows before it, the frontier of a price prefix is the prefix of the frontier.
+
+    Args:
+    - rows (ndarray): Row indexes ordered by ascending price, ties by descending value
+    - values (ndarray): Value of every catalog row
+    - names (ndarray): Name of every catalog row, only the first row of a name is kept
+    - size (int): Number of dominating rows that drop a row
+    - exclude (set): Names to leave out
+
+    Returns:
+    - frontier (ndarray): Kept row indexes, in the input order
+    """
+
+    best_values = []
+    seen = set(exclude)
+    frontier = []
+
+    for row in rows:
+        name = names[row]
+        if name in seen:
+            continue
+        seen.add(name)
+
+        value = values[row]
+        if len(best_values) < size:
+            heapq.heappush(best_values, value)
+        elif value > best_values[0]:
+            heapq.heapreplace(best_values, value)
+        else:
+            continue
+        frontier.append(row)
+
+    return np.array(frontier, dtype=np.intp)
+
+class ItineraryIndex:
+
+    """
+    Per-city price-sorted arrays of one catalog, used to build itineraries.
+
+    Every city has its rows sorted by price, so the places affordable with a budget are a
+    prefix found by binary search. For every city and objective, the index also keeps the
+    dominance frontier of its rows, a small set of candidates that is enough to pack any budget
+    optimally, so packing does not depend on the size of the catalog.
+
+    Attributes:
+    - name (ndarray): 'name' column
+    - price (ndarray): 'price_wna' column
+    - city (ndarray): 'city' column
+    - values (dict): Objective name mapped to the value of every row ('rating' or the model 'score')
+    - buckets (dict): Lower-cased city (None for every city) mapped to a (rows, prices) tuple sorted by price
+    - frontiers (dict): (city, objective) mapped to a (rows, prices) tuple of the dominance frontier
+    - frontier_size (int): Size the frontiers were built with
+    """
+
+    def __init__(self, snapshot, frontier_size=FRONTIER_SIZE):
+        self.name = snapshot.name
+        self.price = snapshot.price
+        self.city = snapshot.city
+        self.values = {
+            'rating': np.nan_to_num(snapshot.rating),
+            'score': np.asarray(snapshot.scores, dtype=np.float64),
+        }
+        self.frontier_size = frontier_size
+
+        groups = pd.Series(snapshot.city_lower).groupby(snapshot.city_lower, sort=False).indices
+        groups[None] = np.arange(len(snapshot))
+
+        self.buckets = {}
+        self.frontiers = {}
+        for city, rows in groups.items():
+            rows = rows[np.argsort(self.price[rows], kind='stable')]
+            self.buckets[city] = self._freeze(rows)
+
+            for objective, values in self.values.items():
+                ordered = rows[np.lexsort((-values[rows], self.price[rows]))]
+                self.frontiers[(city, objective)] = self._freeze(dominance_frontier(ordered, values, self.name, frontier_size))
+
+    def _freeze(self, rows):
+        # Store the rows with their prices, read-only so request threads can share them
+        bucket = (rows, self.price[rows])
+        for array in bucket:
+            array.flags.writeable = False
+        return bucket
+
+    def _prefix(self, bucket, budget):
+        rows, prices = bucket
+        return rows[:np.searchsorted(prices, budget, side='right')]
+
+    def affordable(self, city, budget):
+
+        """
+        Return the rows of a city with price <= budget.
+
+        Args:
+        - city (str or None): Lower-cased city, None for every city
+        - budget (float): Highest accepted price
+
+        Returns:
+        - rows (ndarray): Matching row indexes, sorted by price
+        """
+
+        bucket = self.buckets.get(city)
+        if bucket is None:
+            return np.empty(0, dtype=np.intp)
+        return self._prefix(bucket, budget)
+
+    def pack(self, city, budget, objective, max_items, exclude=()):
+
+        """
+        Choose at most `max_items` places of a city with the highest total value within a budget.
+
+        This is a 0/1 knapsack with a cardinality limit, solved by dynamic programming over the
+        budget divided into BUDGET_STEPS steps. Prices are rounded up to a whole step, so the
+        chosen places never exceed the budget. Only the dominance frontier is packed.
+
+        Args:
+        - city (str or None): Lower-cased city, None for every city
+        - budget (float): Budget of the whole selection
+        - objective (str): Value to maximize, 'rating' or 'score'
+        - max_items (int): Largest number of places to choose
+        - exclude (set): Names of places that cannot be chosen
+
+        Returns:
+        - rows (ndarray): Chosen row indexes, highest value first
+        """
+
+        values = self.values[objective]
+        if max_items <= 0 or city not in self.buckets:
+            return np.empty(0, dtype=np.intp)
+
+        # The precomputed frontier is enough while the excluded names cannot empty it
+        if max_items + len(exclude) <= self.frontier_size:
+            rows = self._prefix(self.frontiers[(city, objective)], budget)
+        else:
+            rows = self.affordable(city, budget)
+            rows = rows[np.lexsort((-values[rows], self.price[rows]))]
+        rows = dominance_frontier(rows, values, self.name, max_items, exclude)
+        if rows.size == 0:
+            return rows
+
+        # Price of every candidate in budget steps, rounded up
+        steps = BUDGET_STEPS if budget > 0 else 0
+        if steps:
+            costs = np.ceil(self.price[rows] / (budget / steps) - 1e-9).astype(np.intp)
+        else:
+            costs = np.zeros(rows.size, dtype=np.intp)
+        costs = np.clip(costs, 0, steps)
+
+        # best[k, w] is the highest value of k places costing at most w steps
+        best = np.full((max_items + 1, steps + 1), -np.inf)
+        best[0] = 0
+        taken = np.zeros((rows.size, max_items + 1, steps + 1), dtype=bool)
+
+        for i, (cost, value) in enumerate(zip(costs, values[rows])):
+            for k in range(min(i + 1, max_items), 0, -1):
+                with_item = best[k - 1, :steps + 1 - cost] + value
+                better = with_item > best[k, cost:]
+                best[k, cost:] = np.where(better, with_item, best[k, cost:])
+                taken[i, k, cost:] = better
+
+        # Fewest places among the best totals, then walk the choices back
+        k = int(np.argmax(best[:, steps]))
+        w = steps
+        chosen = []
+        for i in range(rows.size - 1, -1, -1):
+            if k > 0 and taken[i, k, w]:
+                chosen.append(rows[i])
+                w -= costs[i]
+                k -= 1
+
+        chosen = np.array(chosen, dtype=np.intp)
+        return chosen[np.lexsort((self.price[chosen], -values[chosen]))]
@@ -0,0 +1,108 @@
+# Import required libraries
+import threading
+import time
+import os
+
+from dotenv import load_dotenv
+
+# Load env
+load_dotenv()
+
+# Delay between retries of a failed component, doubled up to the maximum on every failure
+RETRY_SECONDS = float(os.getenv('LOAD_RETRY_SECONDS', 2))
+MAX_RETRY_SECONDS = float(os.getenv('LOAD_MAX_RETRY_SECONDS', 60))
+
+class ComponentLoader:
+
+    """
+    Load models and catalogs in background threads so the server can bind its port immediately.
+
+    Every component is a function registered under a name. Components load concurrently,
+    are retried with backoff when they fail (for example on a database hiccup at boot),
+    and record their status and load time for the readiness endpoint.
+    """
+
+    def __init__(self):
+        self.components = {}
+        self.lock = threading.Lock()
+
+    def register(self, name, load_function):
+
+        """
+        Register a component to be loaded in the background.
+
+        Args:
+        - name (str): Component name reported by the readiness endpoint
+        - load_function (callable): Function loading the component, raising on failure
+        """
+
+        self.components[name] = {
+            "load": load_function,
+            "ready": threading.Event(),
+            "status": "pending",
+            "attempts": 0,
+            "seconds": None,
+            "error": None,
+        }
+
+    def start(self):
+        # Load every registered component in its own daemon thread
+        for name in self.components:
+            threading.Thread(target=self._load, args=(name,), name=f"load-{name}", daemon=True).start()
+
+    def _load(self, name):
+        component = self.components[name]
+        delay = RETRY_SECONDS
+        started = time.perf_counter()
+
+        while True:
+            with self.lock:
+                component["status"] = "loading"
+                component["attempts"] += 1
+            try:
+                component["load"]()
+            except Exception as e:
+                print(f"Failed to load {name}: {e}, retrying in {delay} seconds")
+                with self.lock:
+                    component["status"] = "retrying"
+                    component["error"] = str(e)
+                time.sleep(delay)
+                delay = min(delay * 2, MAX_RETRY_SECONDS)
+                continue
+
+            with self.lock:
+                component["status"] = "ready"
+                component["error"] = None
+                component["seconds"] = round(time.perf_counter() - started, 3)
+            component["ready"].set()
+            print(f"Loaded {name} in {component['seconds']} seconds")
+            return
+
+    def wait(self, name, timeout=None):
+        # Block until a component is loaded, used by components depending on another one
+        return self.components[name]["ready"].wait(timeout)
+
+    def wait_all(self, timeout=None):
+        return all(self.wait(name, timeout) for name in self.components)
+
+    def is_ready(self, *names):
+        names = names or tuple(self.components)
+        return all(self.components[name]["ready"].is_set() for name in names)
+
+    def status(self):
+
+        """
+        Report the state of every component.
+
+        Returns:
+        - status (dict): Component name mapped to its status, attempts, load time in seconds and last error
+        """
+
+        with self.lock:
+            return {
+                name: {key: component[key] for key in ("status", "attempts", "seconds", "error")}
+                for name, component in self.components.items()
+            }
+
+# Loader shared by the server and the preprocessing modules
+loader = ComponentLoader()
@@ -1,20 +1,30 @@
 # Import required libraries
-import tensorflow as tf
 import pandas as pd
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.preprocessing import MinMaxScaler, OneHotEncoder
 from dotenv import load_dotenv
+from config.catalog import CatalogSnapshot
+from config.catalog_refresh import refresher
+from config.dense_model import DenseModel
+from config.loader import loader
+from config.score_store import compute_scores
 from config.sql_engine import engine
 
 # Load env
 load_dotenv()
 
-# Load the trained TensorFlow model
-accommodation_recommendation = tf.keras.models.load_model("models/accommodation.h5")
+# Columns returned by the recommendation and visited recommendation endpoints
+RECOMMENDATION_COLUMNS = ['name', 'rating', 'price_wna', 'city']
+VISITED_COLUMNS = ['name', 'rating', 'price_wna', 'city']
 
-# Load your dataset
-data_accommodation = pd.read_sql_query("SELECT * FROM accommodations", engine)
+# Trained recommendation model and catalog snapshot, loaded in the background by the loader
+accommodation_recommendation = None
+accommodation_catalog = None
+
+# Load the trained model, exported from Keras to NumPy by export_models.py
+def load_accommodation_model():
+    global accommodation_recommendation
+    accommodation_recommendation = DenseModel.load("models/accommodation.npz")
 
 # Define the preprocessing function
 def preprocess_accommodation_data(data):
@@ -47,17 +57,49 @@ def preprocess_accommodation_data(data):
     # Combine selected features
     X = np.hstack((encoded_city, data[['price_wna', 'rating']].values))
 
-    print("Preprocessed data shape (X):", X.shape)  # Debugging step
     return X, scaler, encoder_city, encoded_city, data
 
-# Preprocess the dataset
-X, scaler, encoder_city, encoded_city, data = preprocess_accommodation_data(data_accommodation)
+# Define the function building the read-only accommodation catalog
+def build_accommodation_snapshot(raw_data):
+    """
+    Preprocess the raw accommodation table and score it once into an immutable catalog snapshot.
+
+    Args:
+    - raw_data (pd.DataFrame): The raw accommodation data.
+
+    Returns:
+    - CatalogSnapshot: Read-only catalog with features, scores, scaler and city encoder.
+    """
+    raw_data = raw_data.reset_index(drop=True)
+
+    # Preprocess a copy so the original scale stays available for responses
+    X, scaler, encoder_city, encoded_city, data = preprocess_accommodation_data(raw_data.copy())
+
+    # Score the whole catalog once, requests only filter and rank this store
+    scores = compute_scores(accommodation_recommendation, X)
+
+    return CatalogSnapshot(raw_data, X, scores, scaler, encoder_city)
+
+# Function to load the accommodation catalog snapshot
+def load_accommodation_catalog():
+    global accommodation_catalog
+
+    # Load your dataset
+    data_accommodation = pd.read_sql_query("SELECT * FROM accommodations", engine)
+
+    # Scoring needs the model, which loads concurrently with the query above
+    loader.wait('accommodation_model')
+    accommodation_catalog = build_accommodation_snapshot(data_accommodation)
 
-# Check the input shape of the model
-print("Model input shape:", accommodation_recommendation.input_shape)  # Debugging step
+# Register the model and the catalog with the background loader
+loader.register('accommodation_model', load_accommodation_model)
+loader.register('accommodation_catalog', load_accommodation_catalog)
+
+# Rebuild the catalog snapshot whenever the accommodations table changes
+refresher.watch('accommodations', ['id', 'name', 'rating', 'price_wna', 'city'], 'accommodation_catalog', load_accommodation_catalog)
 
 # Function to generate top 5 recommendations based on user input
-def accommodation_recommendations(user_input, top_n=5):
+def accommodation_recommendations(user_input, top_n=5, catalog=None):
     """
     Generate accommodation recommendations based on user input.
 
@@ -70,60 +112,31 @@ def accommodation_recommendations(user_input, top_n=5):
     Args:
     - user_input (dict): User input containing 'max_price', 'min_rating', and 'city'.
     - top_n (int): The number of top recommendations to return (default is 5).
+    - catalog (CatalogSnapshot, optional): Snapshot to use instead of the current one.
 
     Returns:
     - pd.DataFrame: The top N recommended accommodations with selected columns.
     """
+    # Use one snapshot for the whole request
+    if catalog is None:
+        catalog = accommodation_catalog
+
     # Normalize user input
-    user_df = pd.DataFrame([{
-        "price_wna": user_input["max_price"],
-        "rating": user_input["min_rating"]
-    }])
-    normalized_input = scaler.transform(user_df)
-    max_price_scaled, min_rating_scaled = normalized_input[0]
-
-    # Predict scores for each data point before filtering
-    scores = accommodation_recommendation.predict(X)
-    data['score'] = scores.flatten()  # Add the scores to the data
-
-    # One-hot encode the city in user input
-    city_input_encoded = encoder_city.transform([[user_input["city"]]])
-
-    # Filter data based on user criteria
-    filtered_data = data[
-        (data['rating'] >= min_rating_scaled) & 
-        (data['price_wna'] <= max_price_scaled)
-    ]
-    
-    # Add the one-hot encoded city column to the filtered data
-    filtered_data['city'] = user_input['city']
-    filtered_data[encoder_city.categories_[0]] = city_input_encoded.flatten()
-
-    # Check available columns after filtering
-    print("Available columns after filtering:", filtered_data.columns)
+    max_price_scaled, min_rating_scaled = catalog.input_encoder.scale_values([user_input["max_price"], user_input["min_rating"]])
+
+    # Filter data based on user criteria using the per-city price index and rank by the precomputed scores
+    top_rows = catalog.top_rows(user_input['city'], None, max_price_scaled, min_rating_scaled, top_n)
 
     # If no accommodations meet the criteria, return an empty DataFrame
-    if filtered_data.empty:
+    if top_rows.size == 0:
         print("No accommodations found based on the given criteria.")
         return pd.DataFrame()  # Return empty DataFrame if no results
 
-    # Get top N recommendations based on score
-    recommendations = filtered_data.nlargest(top_n, 'score')
-
-    # Inverse the scaling for price_wna and rating
-    recommendations[['price_wna', 'rating']] = scaler.inverse_transform(
-        recommendations[['price_wna', 'rating']]
-    )
-
     # Select relevant columns for output
-    selected_columns = ['name', 'rating', 'price_wna', 'city']
-    available_columns = recommendations.columns.tolist()
-    selected_columns = [col for col in selected_columns if col in available_columns]
-
-    return recommendations[selected_columns]
+    return catalog.rows(top_rows, RECOMMENDATION_COLUMNS)
 
 # Function to recommend similar accommodations
-def visited_accommodation_recommendations(accommodation_name, city_filter=None, max_price=None, top_n=5):
+def visited_accommodation_recommendations(accommodation_name, city_filter=None, max_price=None, top_n=5, catalog=None):
     """
     Recommend similar accommodations based on a previously visited accommodation.
 
@@ -137,49 +150,33 @@ def visited_accommodation_recommendations(accommodation_name, city_filter=None,
     - city_filter (str, optional): City filter for recommendations (default is None).
     - max_price (float, optional): Maximum price filter for recommendations (default is None).
     - top_n (int): The number of top recommendations to return (default is 5).
+    - catalog (CatalogSnapshot, optional): Snapshot to use instead of the current one.
 
     Returns:
     - list: The top N recommended accommodations as a list of dictionaries with selected columns.
     """
-    # Ensure the accommodation exists in the data
-    if accommodation_name not in data['name'].values:
-        return {"error": f"Accommodation '{accommodation_name}' not found in data."}, 404
+    # Use one snapshot for the whole request
+    if catalog is None:
+        catalog = accommodation_catalog
 
-    # Feature extraction for similarity calculation
-    # Use the price_wna and rating columns along with encoded city columns
-    features = np.hstack((encoded_city, data[['price_wna', 'rating']].values))
-
-    # Get the index of the accommodation the user has visited
-    accommodation_idx = data[data['name'] == accommodation_name].index[0]
-
-    # Calculate cosine similarity between the selected accommodation and all others
-    similarity_scores = cosine_similarity(features[accommodation_idx].reshape(1, -1), features).flatten()
-    data['similarity'] = similarity_scores
+    # Ensure the accommodation exists in the data and get the index of the one the user has visited
+    accommodation_idx = catalog.name_to_row.get(accommodation_name)
+    if accommodation_idx is None:
+        return {"error": f"Accommodation '{accommodation_name}' not found in data."}, 404
 
     # Apply optional filters for city and max_price
     if max_price is not None:
         max_price = float(max_price)
 
-    filtered_data = data[data['name'] != accommodation_name]  # Exclude the visited accommodation
-    
-    if city_filter:
-        filtered_data = filtered_data[filtered_data['city'].str.lower() == city_filter.lower()]
-    
-    if max_price is not None:
-        filtered_data = filtered_data[filtered_data['price_wna'] <= max_price]
-
-    # Return the price_wna and rating columns to their original scale
-    if not filtered_data.empty:
-        filtered_data[['price_wna', 'rating']] = scaler.inverse_transform(
-            filtered_data[['price_wna', 'rating']]
-        )
-
-    # Sort by similarity and return top N recommendations
-    recommendations = filtered_data.nlargest(top_n, 'similarity') if not filtered_data.empty else pd.DataFrame()
+    def keep(rows):
+        mask = catalog.name[rows] != accommodation_name  # Exclude the visited accommodation
+        if city_filter:
+            mask &= catalog.city_lower[rows] == city_filter.lower()
+        if max_price is not None:
+            mask &= catalog.price[rows] <= max_price
+        return mask
 
-    # Ensure the columns you're trying to return actually exist in filtered_data
-    available_columns = filtered_data.columns.tolist()
-    selected_columns = ['name', 'rating', 'price_wna', 'city']
-    selected_columns = [col for col in selected_columns if col in available_columns]
+    # Sort by similarity and return top N recommendations from the precomputed neighbours
+    top_rows = catalog.neighbours.similar_rows(accommodation_idx, keep, top_n)
 
-    return recommendations[selected_columns].to_dict(orient="records")
+    return catalog.rows(top_rows, VISITED_COLUMNS).to_dict(orient="records")
\ No newline at end of file
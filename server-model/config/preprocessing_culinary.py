@@ -1,21 +1,31 @@
 # Import required libraries
-import tensorflow as tf
 import pandas as pd
 import numpy as np
 
 from dotenv import load_dotenv
-from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.preprocessing import MinMaxScaler, OneHotEncoder
+from config.catalog import CatalogSnapshot
+from config.catalog_refresh import refresher
+from config.dense_model import DenseModel
+from config.loader import loader
+from config.score_store import compute_scores
 from config.sql_engine import engine
 
 # Load env
 load_dotenv()
 
-# Load the trained TensorFlow model
-culinary_recommendation = tf.keras.models.load_model("models/culinary.h5")
+# Columns returned by the recommendation and visited recommendation endpoints
+RECOMMENDATION_COLUMNS = ['name', 'rating', 'price_wna', 'city', 'category', 'address']
+VISITED_COLUMNS = ['name', 'rating', 'price_wna', 'city', 'category', 'address']
 
-# Load your dataset (if still in local development)
-data_culinary = pd.read_sql_query("SELECT * FROM culinaries", engine)
+# Trained recommendation model and catalog snapshot, loaded in the background by the loader
+culinary_recommendation = None
+culinary_catalog = None
+
+# Load the trained model, exported from Keras to NumPy by export_models.py
+def load_culinary_model():
+    global culinary_recommendation
+    culinary_recommendation = DenseModel.load("models/culinary.npz")
 
 # Preprocessing function for culinary data
 def preprocess_culinary_data(data):
@@ -50,11 +60,49 @@ def preprocess_culinary_data(data):
 
     return data, X, scaler, encoder_category, encoder_city, encoded_category, encoded_city
 
-# Preprocess the data
-data, X, scaler, encoder_category, encoder_city, encoded_category, encoded_city = preprocess_culinary_data(data_culinary)
+# Function to build the read-only culinary catalog shared by all requests
+def build_culinary_snapshot(raw_data):
+
+    """
+    Preprocess the raw culinary table and score it once into an immutable catalog snapshot.
+
+    Args:
+        raw_data (pd.DataFrame): The raw culinary data.
+
+    Returns:
+        CatalogSnapshot: Read-only catalog with features, scores, scaler and encoders.
+    """
+
+    raw_data = raw_data.reset_index(drop=True)
+
+    # Preprocess a copy so the original scale stays available for responses
+    data, X, scaler, encoder_category, encoder_city, encoded_category, encoded_city = preprocess_culinary_data(raw_data.copy())
+
+    # Score the whole catalog once, requests only filter and rank this store
+    scores = compute_scores(culinary_recommendation, X)
+
+    return CatalogSnapshot(raw_data, X, scores, scaler, encoder_city, encoder_category)
+
+# Function to load the culinary catalog snapshot
+def load_culinary_catalog():
+    global culinary_catalog
+
+    # Load your dataset (if still in local development)
+    data_culinary = pd.read_sql_query("SELECT * FROM culinaries", engine)
+
+    # Scoring needs the model, which loads concurrently with the query above
+    loader.wait('culinary_model')
+    culinary_catalog = build_culinary_snapshot(data_culinary)
+
+# Register the model and the catalog with the background loader
+loader.register('culinary_model', load_culinary_model)
+loader.register('culinary_catalog', load_culinary_catalog)
+
+# Rebuild the catalog snapshot whenever the culinaries table changes
+refresher.watch('culinaries', ['id', 'name', 'rating', 'category', 'price_wna', 'city', 'address'], 'culinary_catalog', load_culinary_catalog)
 
 # Function to preprocess user input
-def preprocess_user_input(user_input):
+def preprocess_user_input(user_input, catalog):
 
     """
     Preprocess the user's input to match the format required by the recommendation model.
@@ -65,6 +113,7 @@ def preprocess_user_input(user_input):
         - "min_rating" (float): The minimum rating the user is looking for.
         - "category" (str): The category of the culinary (e.g., "Hotel", "Hostel").
         - "city" (str): The city where the user is looking for culinary.
+    - catalog (CatalogSnapshot): Catalog holding the compiled scaler and encoders.
     
     Returns:
     - user_vector (ndarray): A NumPy array representing the preprocessed user input, which includes:
@@ -72,18 +121,11 @@ def preprocess_user_input(user_input):
         - Encoded category and city.
     """
 
-    user_df = pd.DataFrame([{
-        "price_wna": user_input["max_price"],
-        "rating": user_input["min_rating"]
-    }])
-    normalized_input = scaler.transform(user_df)
-    user_category = encoder_category.transform([[user_input['category']]])
-    user_city = encoder_city.transform([[user_input['city']]])
-    user_vector = np.hstack((user_category, user_city, normalized_input))
+    user_vector = catalog.input_encoder.encode(user_input)
     return user_vector
 
 # Function to recommend top 5 culinary options
-def culinary_recommendations(user_input, top_n=5):
+def culinary_recommendations(user_input, top_n=5, catalog=None):
 
     """
     Recommends top N culinary places based on the user's input using a trained model.
@@ -95,6 +137,7 @@ def culinary_recommendations(user_input, top_n=5):
             - 'category' (str): The category of the culinary place.
             - 'city' (str): The city where the culinary place is located.
         top_n (int, optional): The number of top recommendations to return. Defaults to 5.
+        catalog (CatalogSnapshot, optional): Snapshot to use instead of the current one.
 
     Returns:
         pd.DataFrame: A DataFrame containing the top N culinary recommendations with columns:
@@ -106,53 +149,25 @@ def culinary_recommendations(user_input, top_n=5):
             - 'address': The address of the culinary place.
     """
 
-     # Preprocess the user input to match model's input format
-    user_input_vector = preprocess_user_input(user_input)
-
-    # Predict scores for all data
-    scores = culinary_recommendation.predict(X)
-    data['score'] = scores.flatten()
-
-    # Normalize input for filtering
-    user_df = pd.DataFrame([{
-        "price_wna": user_input["max_price"],
-        "rating": user_input["min_rating"]
-    }])
-    normalized_input = scaler.transform(user_df)
-    max_price_scaled, min_rating_scaled = normalized_input[0]
-
-    # Filter data based on user's criteria
-    filtered_data = data[
-        (data['rating'] >= min_rating_scaled) &
-        (data['price_wna'] <= max_price_scaled) &
-        (data['city'] == user_input['city']) &
-        (data['category'] == user_input['category'])
-    ]
-
-    # Debug: Ensure the processed user input is meaningful
-    print("Processed User Input Vector:", user_input_vector)
-
-    # Return original scale for rating and price_wna
-    if not filtered_data.empty:
-        filtered_data[['price_wna', 'rating']] = scaler.inverse_transform(
-            filtered_data[['price_wna', 'rating']]
-        )
-
-    # Get top N recommendations or as many as available
-    if not filtered_data.empty:
-        recommendations = filtered_data.nlargest(min(top_n, len(filtered_data)), 'score')
-    else:
-        recommendations = pd.DataFrame()  # Empty DataFrame if no recommendations
+    # Use one snapshot for the whole request
+    if catalog is None:
+        catalog = culinary_catalog
 
-    # Select relevant columns for output
-    required_columns = ['name', 'rating', 'price_wna', 'city', 'category', 'address']
-    available_columns = recommendations.columns.tolist()
-    selected_columns = [col for col in required_columns if col in available_columns]
+    # Preprocess the user input to match model's input format
+    user_input_vector = preprocess_user_input(user_input, catalog)
 
-    return recommendations[selected_columns]
+    # Normalized price and rating for filtering
+    max_price_scaled, min_rating_scaled = user_input_vector[0, -2], user_input_vector[0, -1]
+
+    # Filter data based on user's criteria using the (city, category) price index, then get
+    # the top N recommendations (or as many as available) from the precomputed scores
+    top_rows = catalog.top_rows(user_input['city'], user_input['category'], max_price_scaled, min_rating_scaled, top_n)
+
+    # Select relevant columns for output
+    return catalog.rows(top_rows, RECOMMENDATION_COLUMNS)
 
 # Function to recommend similar culinary places
-def visited_culinary_recommendations(culinary_name, city_filter=None, max_price=None, top_n=5):
+def visited_culinary_recommendations(culinary_name, city_filter=None, max_price=None, top_n=5, catalog=None):
 
     """
     Recommends culinary places similar to the one the user has visited, based on cosine similarity.
@@ -162,6 +177,7 @@ def visited_culinary_recommendations(culinary_name, city_filter=None, max_price=
         city_filter (str, optional): The city to filter the recommendations by. Defaults to None.
         max_price (float, optional): The maximum price for filtering the recommendations. Defaults to None.
         top_n (int, optional): The number of top recommendations to return. Defaults to 5.
+        catalog (CatalogSnapshot, optional): Snapshot to use instead of the current one.
 
     Returns:
         list: A list of dictionaries containing the top N similar culinary places with the following keys:
@@ -173,41 +189,29 @@ def visited_culinary_recommendations(culinary_name, city_filter=None, max_price=
             - 'address': The address of the culinary place.
     """
 
+    # Use one snapshot for the whole request
+    if catalog is None:
+        catalog = culinary_catalog
+
     # Ensure the culinary place exists in the data
-    if culinary_name not in data['name'].values:
+    culinary_idx = catalog.name_to_row.get(culinary_name)
+    if culinary_idx is None:
         return {"error": f"Place '{culinary_name}' not found in data."}, 404
 
-    # Feature extraction for similarity calculation
-    features = np.hstack((
-        encoded_category,
-        encoded_city,
-        data[['price_wna', 'rating']].values
-    ))
-
-    culinary_idx = data[data['name'] == culinary_name].index[0]
-
-    # Cosine similarity calculation
-    similarity_scores = cosine_similarity(features[culinary_idx].reshape(1, -1), features).flatten()
-    data['similarity'] = similarity_scores
-
     # Handle optional filters for city and max_price
     if max_price is not None:
         max_price = float(max_price)
+        max_price_scaled = catalog.input_encoder.scale_price(max_price)
 
-    filtered_data = data[data['name'] != culinary_name]
-    
-    if city_filter:
-        filtered_data = filtered_data[filtered_data['city'] == city_filter]
-    if max_price is not None:
-        max_price_scaled = scaler.transform([[max_price, 0]])[0][0]
-        filtered_data = filtered_data[filtered_data['price_wna'] <= max_price_scaled]
-
-    # Return original scale for price_wna and rating
-    if not filtered_data.empty:
-        filtered_data[['price_wna', 'rating']] = scaler.inverse_transform(
-            filtered_data[['price_wna', 'rating']]
-        )
+    def keep(rows):
+        mask = catalog.name[rows] != culinary_name
+        if city_filter:
+            mask &= catalog.city[rows] == city_filter
+        if max_price is not None:
+            mask &= catalog.price_scaled[rows] <= max_price_scaled
+        return mask
 
-    recommendations = filtered_data.nlargest(top_n, 'similarity') if not filtered_data.empty else pd.DataFrame()
+    # Most similar places from the precomputed neighbours
+    top_rows = catalog.neighbours.similar_rows(culinary_idx, keep, top_n)
 
-    return recommendations[['name', 'rating', 'price_wna', 'city', 'category', 'address']].to_dict(orient="records")
\ No newline at end of file
+    return catalog.rows(top_rows, VISITED_COLUMNS).to_dict(orient="records")
\ No newline at end of file
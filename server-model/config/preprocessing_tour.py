@@ -1,21 +1,31 @@
 # Import required libraries
-import tensorflow as tf
 import pandas as pd
 import numpy as np
 
 from dotenv import load_dotenv
 from sklearn.preprocessing import MinMaxScaler, OneHotEncoder
-from sklearn.metrics.pairwise import cosine_similarity
+from config.catalog import CatalogSnapshot
+from config.catalog_refresh import refresher
+from config.dense_model import DenseModel
+from config.loader import loader
+from config.score_store import compute_scores
 from config.sql_engine import engine
 
 # Load env
 load_dotenv()
 
-# Load the trained TensorFlow model
-tour_recommendation = tf.keras.models.load_model("models/tour.h5")
+# Columns returned by the recommendation and visited recommendation endpoints
+RECOMMENDATION_COLUMNS = ['name', 'rating', 'price_wna', 'city', 'category', 'google_maps']
+VISITED_COLUMNS = ['name', 'rating', 'price_wna', 'city', 'category', 'address', 'google_maps']
 
-# Load your dataset (if still in local development)
-data_tour = pd.read_sql_query("SELECT * FROM tours", engine)
+# Trained recommendation model and catalog snapshot, loaded in the background by the loader
+tour_recommendation = None
+tour_catalog = None
+
+# Load the trained model, exported from Keras to NumPy by export_models.py
+def load_tour_model():
+    global tour_recommendation
+    tour_recommendation = DenseModel.load("models/tour.npz")
 
 def preprocess_tour_data(data):
 
@@ -48,50 +58,69 @@ def preprocess_tour_data(data):
     # Return the encoded data, scaler, and encoders for use in other parts of the pipeline
     return data, encoded_category, encoded_city, scaler, encoder_category, encoder_city
 
-# Process the dataset using the new function
-data, encoded_category, encoded_city, scaler, encoder_category, encoder_city = preprocess_tour_data(data_tour)
+# Function to build the read-only tour catalog shared by all requests
+def build_tour_snapshot(raw_data):
+
+    """
+    Preprocess the raw tour table and score it once into an immutable catalog snapshot.
+
+    Args:
+    - raw_data (DataFrame): The raw dataset containing tour data
+
+    Returns:
+    - snapshot (CatalogSnapshot): Read-only catalog with features, scores, scaler and encoders
+    """
+
+    raw_data = raw_data.reset_index(drop=True)
+
+    # Process a copy so the original scale stays available for responses
+    data, encoded_category, encoded_city, scaler, encoder_category, encoder_city = preprocess_tour_data(raw_data.copy())
+
+    # Combine the features into the final input matrix (X)
+    X = np.hstack((encoded_category, encoded_city, data[['price_wna', 'rating']].values))
+
+    # Score the whole catalog once, requests only filter and rank this store
+    scores = compute_scores(tour_recommendation, X)
+
+    return CatalogSnapshot(raw_data, X, scores, scaler, encoder_city, encoder_category)
+
+# Function to load the tour catalog snapshot
+def load_tour_catalog():
+    global tour_catalog
+
+    # Load your dataset (if still in local development)
+    data_tour = pd.read_sql_query("SELECT * FROM tours", engine)
+
+    # Scoring needs the model, which loads concurrently with the query above
+    loader.wait('tour_model')
+    tour_catalog = build_tour_snapshot(data_tour)
+
+# Register the model and the catalog with the background loader
+loader.register('tour_model', load_tour_model)
+loader.register('tour_catalog', load_tour_catalog)
 
-# Combine the features into the final input matrix (X)
-X = np.hstack((encoded_category, encoded_city, data[['price_wna', 'rating']].values))
+# Rebuild the catalog snapshot whenever the tours table changes
+refresher.watch('tours', ['id', 'name', 'rating', 'category', 'price_wna', 'city', 'address', 'google_maps'], 'tour_catalog', load_tour_catalog)
 
 # Function to preprocess user input in the same way as training data
-def preprocess_user_input(user_input, scaler, encoder_category, encoder_city):
+def preprocess_user_input(user_input, catalog):
 
     """
     Preprocess user input for making recommendations by normalizing and encoding input values.
     
     Args:
     - user_input (dict): User input containing 'max_price', 'min_rating', 'category', 'city'
-    - scaler (MinMaxScaler): Fitted scaler for normalizing price and rating
-    - encoder_category (OneHotEncoder): Fitted encoder for category
-    - encoder_city (OneHotEncoder): Fitted encoder for city
+    - catalog (CatalogSnapshot): Catalog holding the compiled scaler and encoders
     
     Returns:
     - user_input_processed (ndarray): Processed input ready for recommendation prediction
     """
 
-    # Normalize 'price_wna' and 'rating' values
-    user_input_df = pd.DataFrame([{
-        "price_wna": user_input["max_price"],
-        "rating": user_input["min_rating"],
-        "category": user_input["category"],
-        "city": user_input["city"]
-    }])
-
-    # Normalize 'price_wna' and 'rating' using the same scaler
-    user_input_df[['price_wna', 'rating']] = scaler.transform(user_input_df[['price_wna', 'rating']])
-
-    # One-hot encode 'category' and 'city' using the same encoders
-    encoded_category = encoder_category.transform(user_input_df[['category']])
-    encoded_city = encoder_city.transform(user_input_df[['city']])
-
-    # Combine all features into a single array
-    user_input_processed = np.hstack((encoded_category, encoded_city, user_input_df[['price_wna', 'rating']].values))
-
-    return user_input_processed
+    # Normalize 'price_wna' and 'rating' and one-hot encode 'category' and 'city' in the training layout
+    return catalog.input_encoder.encode(user_input)
 
 # Function for recommendations
-def tour_recommendations(user_input, top_n=5):
+def tour_recommendations(user_input, top_n=5, catalog=None):
 
     """
     Generate top N tour recommendations based on user input.
@@ -99,47 +128,30 @@ def tour_recommendations(user_input, top_n=5):
     Args:
     - user_input (dict): User input containing 'max_price', 'min_rating', 'category', 'city'
     - top_n (int): Number of recommendations to return (default is 5)
+    - catalog (CatalogSnapshot, optional): Snapshot to use instead of the current one
     
     Returns:
     - recommendations (DataFrame): Top N recommended tours with selected columns
     """
 
-    # Preprocess the user input
-    processed_input = preprocess_user_input(user_input, scaler, encoder_category, encoder_city)
-
-    # Predict the scores using the model
-    scores = tour_recommendation.predict(X)  # Use the entire dataset for prediction
+    # Use one snapshot for the whole request
+    if catalog is None:
+        catalog = tour_catalog
 
-    # Add the predicted scores to the dataframe
-    data['score'] = scores.flatten()
+    # Preprocess the user input
+    processed_input = preprocess_user_input(user_input, catalog)
 
     # Normalize user input based on the scaler
     max_price_scaled, min_rating_scaled = processed_input[0, -2], processed_input[0, -1]  # Extract the normalized price and rating
 
-    # Filter data based on user input
-    filtered_data = data[
-        (data['rating'] >= min_rating_scaled) &
-        (data['price_wna'] <= max_price_scaled) &
-        (data['category'] == user_input['category']) &
-        (data['city'] == user_input['city'])
-    ]
-
-    # Inverse transform to get original scale for price and rating
-    if not filtered_data.empty:
-        filtered_data[['price_wna', 'rating']] = scaler.inverse_transform(filtered_data[['price_wna', 'rating']])
-
-    # Get top N recommendations
-    recommendations = filtered_data.nlargest(top_n, 'score')
+    # Filter data based on user input using the (city, category) price index and rank by the precomputed scores
+    top_rows = catalog.top_rows(user_input['city'], user_input['category'], max_price_scaled, min_rating_scaled, top_n)
 
     # Return the recommendations with selected columns
-    required_columns = ['name', 'rating', 'price_wna', 'city', 'category', 'google_maps']
-    available_columns = recommendations.columns.tolist()
-
-    selected_columns = [col for col in required_columns if col in available_columns]
-    return recommendations[selected_columns]
+    return catalog.rows(top_rows, RECOMMENDATION_COLUMNS)
 
 # Function for recommendations based on previously visited places
-def visited_tour_recommendations(tour_name, city_filter=None, max_price=None, top_n=5):
+def visited_tour_recommendations(tour_name, city_filter=None, max_price=None, top_n=5, catalog=None):
 
     """
     Generate recommendations based on a previously visited tour and calculate similarity with other tours.
@@ -149,47 +161,35 @@ def visited_tour_recommendations(tour_name, city_filter=None, max_price=None, to
     - city_filter (str, optional): City filter to narrow down recommendations
     - max_price (float, optional): Maximum price filter for recommendations
     - top_n (int): Number of top recommendations to return (default is 5)
+    - catalog (CatalogSnapshot, optional): Snapshot to use instead of the current one
     
     Returns:
     - recommendations (list): List of top N recommended tours based on similarity
     """
 
-    # Ensure the tour_name exists in the data
-    if tour_name not in data['name'].values:
-        return {"error": f"Tour place '{tour_name}' is is not found."}
-
-    # Choose features for similarity calculation
-    features = np.hstack((
-        encoded_category,
-        encoded_city,
-        data[['price_wna', 'rating']].values
-    ))
-
-    # Get the index of the input destination
-    tour_idx = data[data['name'] == tour_name].index[0]
+    # Use one snapshot for the whole request
+    if catalog is None:
+        catalog = tour_catalog
 
-    # Calculate cosine similarity between the input destination and all others
-    similarity_scores = cosine_similarity(features[tour_idx].reshape(1, -1), features).flatten()
-
-    # Add similarity scores to the data
-    data['similarity'] = similarity_scores
+    # Ensure the tour_name exists in the data and get the index of the input destination
+    tour_idx = catalog.name_to_row.get(tour_name)
+    if tour_idx is None:
+        return {"error": f"Tour place '{tour_name}' is is not found."}
 
-    # Filter data based on max_price or city_filter
-    filtered_data = data[data['name'] != tour_name]
-    if city_filter:
-        filtered_data = filtered_data[filtered_data['city'] == city_filter]
     if max_price is not None:
-        max_price_scaled = scaler.transform([[max_price, 0]])[0][0]
-        filtered_data = filtered_data[filtered_data['price_wna'] <= max_price_scaled]
+        max_price_scaled = catalog.input_encoder.scale_price(max_price)
 
-    # Inverse transform the price and rating to their original scale
-    if not filtered_data.empty:
-        filtered_data.loc[:, ['price_wna', 'rating']] = scaler.inverse_transform(
-            filtered_data[['price_wna', 'rating']]
-        )
+    # Filter candidates based on max_price or city_filter
+    def keep(rows):
+        mask = catalog.name[rows] != tour_name
+        if city_filter:
+            mask &= catalog.city[rows] == city_filter
+        if max_price is not None:
+            mask &= catalog.price_scaled[rows] <= max_price_scaled
+        return mask
 
-    # Sort by similarity and select top N
-    recommendations = filtered_data.nlargest(top_n, 'similarity') if not filtered_data.empty else pd.DataFrame()
+    # Select the top N most similar tours from the precomputed neighbours
+    top_rows = catalog.neighbours.similar_rows(tour_idx, keep, top_n)
 
     # Return the recommendations with selected columns
-    return recommendations[['name', 'rating', 'price_wna', 'city', 'category', 'address', 'google_maps']].to_dict(orient='records')
\ No newline at end of file
+    return catalog.rows(top_rows, VISITED_COLUMNS).to_dict(orient='records')
@@ -0,0 +1,87 @@
+# Import required libraries
+import threading
+import time
+
+from collections import OrderedDict
+
+class ResultCache:
+
+    """
+    Thread-safe LRU cache with a time to live, for results that only depend on their key.
+
+    Keys must include the version of the catalog a result was computed from, so a catalog
+    refresh never serves stale results; `clear` also drops the old entries right away.
+
+    Attributes:
+    - max_size (int): Largest number of entries, the least recently used entry is evicted first
+    - ttl (float): Seconds an entry stays valid, 0 keeps entries until they are evicted
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "clears": 0}
+
+    def get(self, key):
+
+        """
+        Look a result up.
+
+        Args:
+        - key (tuple): Hashable key of the result
+
+        Returns:
+        - value (object or None): Cached result, None on a miss
+        """
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and self.ttl and time.monotonic() - entry[1] > self.ttl:
+                del self.entries[key]
+                self.counters["expirations"] += 1
+                entry = None
+
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.counters["hits"] += 1
+            return entry[0]
+
+    def put(self, key, value):
+        if self.max_size <= 0:
+            return
+
+        with self.lock:
+            self.entries[key] = (value, time.monotonic())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.counters["clears"] += 1
+
+    def stats(self):
+
+        """
+        Report the cache counters.
+
+        Returns:
+        - stats (dict): Size, limits, hit and miss counts, hit rate, evictions, expirations and clears
+        """
+
+        with self.lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                **self.counters,
+                "hit_rate": round(self.counters["hits"] / lookups, 4) if lookups else None,
+            }
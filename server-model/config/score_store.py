@@ -0,0 +1,60 @@
+# Import required libraries
+import numpy as np
+
+# Function to score the whole catalog once with a recommendation model
+def compute_scores(model, X):
+
+    """
+    Run the recommendation model over the full catalog feature matrix.
+
+    The model score of a place only depends on the features of that place, so the
+    result can be computed once (at startup or after a catalog refresh) and reused
+    by every request instead of calling `predict` per request.
+
+    Args:
+    - model (DenseModel): Trained recommendation model
+    - X (ndarray): Catalog feature matrix, one row per place
+
+    Returns:
+    - scores (ndarray): Read-only float32 array of scores aligned to the catalog rows
+    """
+
+    scores = np.asarray(model.predict(X, verbose=0), dtype=np.float32).ravel()
+
+    # Freeze the array so request handlers cannot modify the shared store
+    scores.flags.writeable = False
+    return scores
+
+# Function to pick the best scored rows from a set of candidate rows
+def top_k_rows(scores, rows, k):
+
+    """
+    Select the top K candidate rows by score, highest first.
+
+    Ties keep catalog order, matching `DataFrame.nlargest(k, 'score')`.
+
+    Args:
+    - scores (ndarray): Score store aligned to the catalog rows
+    - rows (ndarray): Positional row indexes of the candidates
+    - k (int): Number of rows to return
+
+    Returns:
+    - rows (ndarray): At most K row indexes sorted by descending score
+    """
+
+    rows = np.asarray(rows, dtype=np.intp)
+    if k <= 0 or rows.size == 0:
+        return rows[:0]
+
+    candidate_scores = scores[rows]
+
+    # Partially sort first so the cost stays linear in the number of candidates
+    if rows.size > k:
+        kth_score = np.partition(candidate_scores, rows.size - k)[rows.size - k]
+        best = np.flatnonzero(candidate_scores >= kth_score)
+    else:
+        best = np.arange(rows.size)
+
+    # Order by descending score, then by catalog position for equal scores
+    best = best[np.lexsort((rows[best], -candidate_scores[best]))][:k]
+    return rows[best]
@@ -0,0 +1,102 @@
+# Import required libraries
+import numpy as np
+import os
+
+from dotenv import load_dotenv
+from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
+from config.score_store import top_k_rows
+
+# Load env
+load_dotenv()
+
+# Number of cached neighbours per place
+NEIGHBOURS = int(os.getenv('SIMILARITY_NEIGHBOURS', 50))
+
+# Memory budget of one block of rows compared while building, in bytes, and the number of
+# block-sized arrays alive at once: the similarities and the copies made while ranking them
+BLOCK_BYTES = int(os.getenv('SIMILARITY_BLOCK_BYTES', 256 * 1024 * 1024))
+BLOCK_COPIES = 4
+
+class NeighbourIndex:
+
+    """
+    Top-K cosine similarity neighbours for every row of a catalog feature matrix.
+
+    The index is built once per catalog snapshot. Neighbours of a row are stored by
+    descending similarity, with ties in catalog order, which is the order a full
+    `cosine_similarity` scan followed by `nlargest` would produce.
+
+    Attributes:
+    - features (ndarray): Feature matrix the index was built from
+    - neighbours (ndarray): (rows, K) matrix of neighbour row indexes
+    - similarities (ndarray): (rows, K) matrix of the matching similarity scores
+    """
+
+    def __init__(self, features, k=NEIGHBOURS):
+        self.features = features
+        rows = features.shape[0]
+        k = min(k, rows)
+
+        neighbours = np.empty((rows, k), dtype=np.int32)
+        similarities = np.empty((rows, k), dtype=np.float32)
+        normalized = normalize(features)
+
+        all_rows = np.arange(rows)
+
+        # Compare a block of rows against the whole catalog at a time, as many rows as fit in the budget
+        block_size = max(1, BLOCK_BYTES // (BLOCK_COPIES * max(rows, 1) * normalized.dtype.itemsize))
+        for start in range(0, rows if k > 0 else 0, block_size):
+            block = normalized[start:start + block_size] @ normalized.T
+
+            # Take the K best of every row, then order them by similarity and catalog position
+            top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(block, top, axis=1)
+            top = np.take_along_axis(top, np.lexsort((top, -top_scores), axis=-1), axis=1)
+
+            # Rows with ties across the K-th place need the exact tie order of a full scan
+            kth_scores = np.partition(block, rows - k, axis=1)[:, rows - k]
+            for offset in np.flatnonzero((block >= kth_scores[:, None]).sum(axis=1) > k):
+                top[offset] = top_k_rows(block[offset], all_rows, k)
+
+            neighbours[start:start + len(block)] = top
+            similarities[start:start + len(block)] = np.take_along_axis(block, top, axis=1)
+
+        # Freeze the index so request threads can share it
+        neighbours.flags.writeable = False
+        similarities.flags.writeable = False
+        self.neighbours = neighbours
+        self.similarities = similarities
+
+    def is_complete(self):
+        # Every row is cached, a full scan would not find anything new
+        return self.neighbours.shape[1] == self.features.shape[0]
+
+    def similar_rows(self, row, keep, top_n):
+
+        """
+        Return the most similar rows to `row` that pass the request filters.
+
+        Cached neighbours are filtered first. The vectorized full scan only runs when
+        the filters leave fewer than `top_n` cached neighbours and the cache does not
+        already cover the whole catalog.
+
+        Args:
+        - row (int): Row index of the anchor place
+        - keep (callable): Function mapping an array of row indexes to a boolean mask of rows to keep
+        - top_n (int): Number of rows to return
+
+        Returns:
+        - rows (ndarray): At most `top_n` row indexes sorted by descending similarity
+        """
+
+        candidates = self.neighbours[row]
+        kept = candidates[keep(candidates)]
+
+        if kept.size >= top_n or self.is_complete():
+            return kept[:top_n]
+
+        # Fall back to scanning the whole catalog for this anchor
+        similarity_scores = cosine_similarity(self.features[row].reshape(1, -1), self.features).flatten()
+        all_rows = np.arange(self.features.shape[0])
+        return top_k_rows(similarity_scores, all_rows[keep(all_rows)], top_n)
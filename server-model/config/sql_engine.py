@@ -22,9 +22,10 @@ engineURL = f"mysql+mysqlconnector://{username}:{password}@{host}:{port}/{databa
 engine = sa.create_engine(engineURL)
 
 # Test the connection to the MySQL database
-try:
-    with engine.connect() as connection:
-        print("Connected to MySQL database successfully!")
-except Exception as e:
-    # If there is an error, print the error message
-    print("Connection failed:", e)
\ No newline at end of file
+def test_connection():
+    try:
+        with engine.connect() as connection:
+            print("Connected to MySQL database successfully!")
+    except Exception as e:
+        # If there is an error, print the error message
+        print("Connection failed:", e)
\ No newline at end of file
@@ -0,0 +1,106 @@
+# Import required libraries
+import numpy as np
+import sys
+
+from config.dense_model import DenseModel
+
+# Models to export, from the Keras `.h5` file to the NumPy `.npz` file served by the server
+MODELS = {
+    "tour": ("models/tour.h5", "models/tour.npz"),
+    "culinary": ("models/culinary.h5", "models/culinary.npz"),
+    "accommodation": ("models/accommodation.h5", "models/accommodation.npz"),
+}
+
+# Largest accepted difference between the Keras and NumPy predictions
+TOLERANCE = 1e-5
+
+# Number of random samples used by the parity check
+PARITY_SAMPLES = 10000
+
+# Function to convert a Keras model to a DenseModel
+def convert_model(keras_model):
+
+    """
+    Copy the weights and activations of every Dense layer of a Keras model.
+
+    Args:
+    - keras_model (keras.Model): Trained Sequential model made of Dense and Dropout layers
+
+    Returns:
+    - model (DenseModel): Equivalent NumPy model
+    """
+
+    layers = []
+    for layer in keras_model.layers:
+        layer_type = type(layer).__name__
+
+        # Dropout only applies during training
+        if layer_type in ("InputLayer", "Dropout"):
+            continue
+        if layer_type != "Dense":
+            raise ValueError(f"Unsupported layer '{layer.name}' of type {layer_type}.")
+
+        kernel, bias = layer.get_weights()
+        layers.append((kernel, bias, layer.get_config()["activation"]))
+
+    return DenseModel(layers)
+
+# Function to compare the predictions of both models
+def check_parity(keras_model, model, samples=PARITY_SAMPLES):
+
+    """
+    Compare the Keras and NumPy predictions on random inputs.
+
+    Half of the samples are uniform in [0, 1] like the scaled price and rating, the other
+    half are binary like the one-hot encoded city and category columns.
+
+    Args:
+    - keras_model (keras.Model): Original model
+    - model (DenseModel): Exported model
+    - samples (int): Number of random samples
+
+    Returns:
+    - max_difference (float): Largest absolute difference between both predictions
+    """
+
+    rng = np.random.default_rng(0)
+    features = keras_model.input_shape[-1]
+    X = np.vstack([
+        rng.random((samples // 2, features)),
+        rng.integers(0, 2, (samples - samples // 2, features)),
+    ]).astype(np.float32)
+
+    expected = keras_model.predict(X, verbose=0)
+    actual = model.predict(X)
+    return float(np.max(np.abs(expected - actual)))
+
+# Function to export every model
+def export_models():
+
+    """
+    Export every model to `.npz` and check it against the original Keras model.
+
+    Returns:
+    - passed (bool): True if every exported model is within the tolerance
+    """
+
+    # TensorFlow is only needed to export the models, not to serve them
+    import tensorflow as tf
+
+    passed = True
+    for name, (keras_path, numpy_path) in MODELS.items():
+        keras_model = tf.keras.models.load_model(keras_path)
+        model = convert_model(keras_model)
+        model.save(numpy_path)
+
+        # Check the saved file, which is what the server loads
+        max_difference = check_parity(keras_model, DenseModel.load(numpy_path))
+        status = "OK" if max_difference <= TOLERANCE else "FAILED"
+        print(f"{name}: exported {numpy_path}, max difference {max_difference:.2e} {status}")
+        passed = passed and max_difference <= TOLERANCE
+
+    return passed
+
+# Export the models
+if __name__ == '__main__':
+    sys.exit(0 if export_models() else 1)
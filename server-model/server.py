@@ -1,14 +1,19 @@
 # Import required libraries for model preprocessing, logging, and server setup
+import config.batch_recommendations
 import config.preprocessing_accommodation
 import config.preprocessing_culinary
 import config.generate_itinerary
 import config.preprocessing_tour
 
+import functools
 import json
 import os
 
+from config.catalog_refresh import refresher
+from config.loader import loader
 from dotenv import load_dotenv
 from flask import Flask, request, jsonify
+from waitress import serve
 
 # Load environment variables from .env file
 load_dotenv()
@@ -16,6 +21,21 @@ load_dotenv()
 # Initialize Flask app
 app = Flask(__name__)
 
+# Load the models and catalogs in background threads, the server binds its port right away
+refresher.start()
+loader.start()
+
+# Decorator answering 503 until the components an endpoint depends on are loaded
+def requires(*components):
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not loader.is_ready(*components):
+                return jsonify({"error": "Server is still loading, please try again shortly."}), 503
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
 # API endpoint for the home route
 @app.route('/', methods=['GET'])
 def home():
@@ -27,8 +47,81 @@ def home():
     """
     return jsonify({"message": "EzTrip ML-Model Server is Active"}), 200
 
+# API endpoint for liveness checks
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """
+    Liveness endpoint, answers as soon as the server is accepting requests.
+
+    Returns:
+        JSON: A message indicating that the process is alive.
+    """
+    return jsonify({"status": "alive"}), 200
+
+# API endpoint for readiness checks
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """
+    Readiness endpoint, answers 200 once every model and catalog is loaded and 503 before.
+
+    Returns:
+        JSON: The overall readiness and the status and load time of each component.
+    """
+    ready = loader.is_ready()
+    return jsonify({"ready": ready, "components": loader.status()}), 200 if ready else 503
+
+# API endpoint for cache metrics
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Metrics endpoint, reports the size and hit rate of the itinerary cache.
+
+    Returns:
+        JSON: The counters of the itinerary cache.
+    """
+    return jsonify({"itinerary_cache": config.generate_itinerary.itinerary_cache.stats()}), 200
+
+# API endpoint for inspecting the loaded catalogs
+@app.route('/catalog', methods=['GET'])
+def get_catalog():
+    """
+    Catalog endpoint, reports the version of every loaded catalog and the state of the refresher.
+
+    Returns:
+        JSON: The version and build time of each catalog and the refresh statistics.
+    """
+    snapshots = {
+        "tour_catalog": config.preprocessing_tour.tour_catalog,
+        "culinary_catalog": config.preprocessing_culinary.culinary_catalog,
+        "accommodation_catalog": config.preprocessing_accommodation.accommodation_catalog,
+    }
+    catalogs = {
+        name: None if snapshot is None else {"version": snapshot.version, "built_at": snapshot.built_at, "rows": len(snapshot)}
+        for name, snapshot in snapshots.items()
+    }
+
+    itinerary_catalog = config.generate_itinerary.itinerary_catalog
+    catalogs["itinerary_catalog"] = None if itinerary_catalog is None else {"version": itinerary_catalog.version}
+
+    return jsonify({"catalogs": catalogs, "refresh": refresher.status()}), 200
+
+# API endpoint for refreshing the catalogs without a restart
+@app.route('/catalog/refresh', methods=['POST'])
+def refresh_catalog():
+    """
+    Ask the refresher to rebuild every catalog from the database in the background.
+
+    Requests keep being served from the current catalogs until the new ones are swapped in.
+
+    Returns:
+        JSON: A message confirming that the refresh was scheduled.
+    """
+    refresher.request_refresh()
+    return jsonify({"message": "Catalog refresh scheduled."}), 202
+
 # API endpoint for getting tour recommendations
 @app.route('/tours', methods=['POST'])
+@requires('tour_catalog')
 def get_tours():
     """
     API endpoint to get top 5 tour recommendations based on user input.
@@ -60,6 +153,7 @@ def get_tours():
 
 # API endpoint for getting visited tour recommendations
 @app.route('/tours/visited', methods=['POST'])
+@requires('tour_catalog')
 def get_visited_recommendations():
     """
     API endpoint to get tour recommendations based on a previously visited tour.
@@ -93,6 +187,7 @@ def get_visited_recommendations():
 
 # API endpoint for getting accommodation recommendations
 @app.route('/accommodations', methods=['POST'])
+@requires('accommodation_catalog')
 def get_accomodations():
     """
     API endpoint to get top 5 accommodation recommendations based on user input.
@@ -123,6 +218,7 @@ def get_accomodations():
 
 # API endpoint for accommodation recommendations based on previously visited accommodation
 @app.route('/accommodations/visited', methods=['POST'])
+@requires('accommodation_catalog')
 def get_visited_accommodation_recommendations():
 
     """
@@ -162,6 +258,7 @@ def get_visited_accommodation_recommendations():
 
 # API endpoint for getting culinary recommendations
 @app.route('/culinaries', methods=['POST'])
+@requires('culinary_catalog')
 def get_culinaries():
     """
     API endpoint to get culinary recommendations based on user input.
@@ -195,6 +292,7 @@ def get_culinaries():
     
 # API Endpoint for getting similar culinary recommendations
 @app.route('/culinaries/visited', methods=['POST'])
+@requires('culinary_catalog')
 def get_similar_culinary_recommendations():
 
     """
@@ -230,13 +328,15 @@ def get_similar_culinary_recommendations():
     
 # API endpoint for generating itineraries based on user budget
 @app.route('/itineraries', methods=['POST'])
+@requires('itinerary_catalog')
 def get_itineraries():
     """
     API endpoint to generate an itinerary based on the user's budget.
 
     The user provides their budget and optionally a city. The server generates 
     an itinerary with a combination of tours, accommodations, and culinary 
-    experiences based on the budget.
+    experiences based on the budget. Optional 'mode', 'objective', 'allocation',
+    'max_tours' and 'max_culinary' fields choose how the budget is packed.
 
     Returns:
         JSON: A generated itinerary or error message.
@@ -260,9 +360,14 @@ def get_itineraries():
         if not isinstance(user_budget, (int, float)):
             return jsonify({"error": "'budget' must be a number."}), 400
 
+        # Validate the optional mode, objective, allocation and item limits
+        options, error = config.generate_itinerary.parse_itinerary_options(user_input)
+        if error:
+            return jsonify({"error": error}), 400
+
         # Generate the itinerary
         try:
-            itinerary = config.generate_itinerary.generate_itineraries(user_budget, city)
+            itinerary = config.generate_itinerary.generate_itineraries(user_budget, city, **options)
 
         except Exception as e:
             return jsonify({"error": "Failed to generate itinerary due to internal error."}), 500
@@ -277,6 +382,81 @@ def get_itineraries():
     except Exception as e:
         return jsonify({"error": "An unexpected error occurred."}), 500
 
+# API endpoint for planning a trip over several days
+@app.route('/itineraries/plan', methods=['POST'])
+@requires('itinerary_catalog')
+def get_trip_plan():
+    """
+    API endpoint to plan a trip day by day.
+
+    The user provides the number of 'days', either a total 'budget' or 'daily_budgets', and
+    optionally a 'city' or one city per day in 'cities'. The optional 'mode', 'objective',
+    'allocation', 'max_tours' and 'max_culinary' fields work like in /itineraries. Tours and
+    culinary places are not repeated between days.
+
+    Returns:
+        JSON: The itinerary of every day, or an error message.
+    """
+    try:
+        user_input = request.get_json(silent=True)
+
+        if not isinstance(user_input, dict):
+            return jsonify({"error": "Invalid JSON in request."}), 400
+
+        # Validate the trip length, budgets, cities and itinerary options
+        plan_options, error = config.generate_itinerary.parse_plan_request(user_input)
+        if error:
+            return jsonify({"error": error}), 400
+
+        plan = config.generate_itinerary.plan_trip(**plan_options)
+        if "error" in plan:
+            return jsonify({"error": plan["error"]}), 400
+
+        return jsonify({"plan": plan}), 200
+    except Exception as e:
+        return jsonify({"error": "An unexpected error occurred."}), 500
+
+# API endpoint for answering several recommendation queries in one request
+@app.route('/recommendations/batch', methods=['POST'])
+@requires('tour_catalog', 'culinary_catalog', 'accommodation_catalog')
+def get_batch_recommendations():
+    """
+    API endpoint to answer several tour, culinary and accommodation queries in one request.
+
+    The user provides a JSON object with a 'queries' list. Each query has an 'id', a 'domain'
+    ('tours', 'culinaries' or 'accommodations'), an optional 'top_n' and either 'filters'
+    (the body of the matching single query endpoint) or a 'visited' place name with optional
+    'city_filter' and 'max_price'. All queries are answered from the same catalogs.
+
+    Returns:
+        JSON: The result of every query keyed by query id, each with its own status code.
+    """
+    try:
+        user_input = request.get_json(silent=True)
+
+        if not isinstance(user_input, dict) or not isinstance(user_input.get("queries"), list):
+            return jsonify({"error": "Request must be a JSON object with a 'queries' list."}), 400
+
+        queries = user_input["queries"]
+        max_queries = config.batch_recommendations.MAX_BATCH_QUERIES
+        if not 1 <= len(queries) <= max_queries:
+            return jsonify({"error": f"'queries' must contain between 1 and {max_queries} queries."}), 400
+
+        # Query ids key the response, so they must be unique
+        ids = config.batch_recommendations.query_ids(queries)
+        if len(set(ids)) != len(ids):
+            return jsonify({"error": "Query ids must be unique."}), 400
+
+        results = config.batch_recommendations.recommend_batch(queries)
+        return jsonify({"results": results}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 # Run the Flask app
 if __name__ == '__main__':
-    app.run(host=os.getenv('MODEL_HOST'), port=os.getenv('MODEL_PORT'), debug=True)
\ No newline at end of file
+    # Optionally wait for every component before accepting traffic
+    if os.getenv('MODEL_BACKGROUND_LOAD', 'true').lower() == 'false':
+        loader.wait_all()
+
+    # Serve with a threaded WSGI server, every worker thread shares the same models and catalog snapshots
+    serve(app, host=os.getenv('MODEL_HOST'), port=os.getenv('MODEL_PORT'), threads=int(os.getenv('MODEL_THREADS', 8)))
\ No newline at end of file
@@ -0,0 +1,225 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+import mysql.connector
+from migrate import Config, connect, migrate, split_statements
+
+# Schema of a new database
+TABLES_SQL = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tables.sql')
+
+# Sample values of the seeded data
+CITIES = ['Badung', 'Denpasar', 'Gianyar', 'Tabanan', 'Bangli', 'Karangasem', 'Buleleng', 'Jembrana', 'Klungkung', 'Yogyakarta', 'Bandung', 'Jakarta']
+CATEGORIES = ['Nature', 'Culture', 'Food', 'Adventure', 'Beach', 'Museum', 'Cafe', 'Restaurant']
+EXPENSE_CATEGORIES = ['food', 'transport', 'lodging', 'tickets', 'shopping']
+SENTIMENTS = ['positive', 'negative', 'neutral']
+
+# Prefix of the generated place ids, so ids of different place tables never collide
+PLACE_PREFIX = {'accommodations': 1, 'tours': 2, 'culinaries': 3}
+
+# Function to generate the id of the n-th place of a table
+def place_uuid(table, n):
+    return str(uuid.UUID(int=PLACE_PREFIX[table] << 64 | n))
+
+# Queries of the data server handlers, with a function picking their parameters from the seeded ids
+QUERIES = [
+    ('POST /user/account/login', "SELECT * FROM users WHERE username = %s", lambda s: (s.username(),)),
+    ('POST /user/account/register', "SELECT * FROM users WHERE username = %s OR email = %s", lambda s: (s.username(), s.email())),
+    ('PUT /user/account/update (email)', "SELECT * FROM users WHERE email = %s", lambda s: (s.email(),)),
+    ('PUT /user/account/update (phone)', "SELECT * FROM users WHERE phone_number = %s", lambda s: (s.phone(),)),
+    ('GET /features/itineraries/user', "SELECT id, itinerary_data, total_cost, remaining_budget, budget, created_at FROM itineraries WHERE user_id = %s", lambda s: (s.user_id(),)),
+    ('GET /user/expenses', "SELECT * FROM expenses WHERE user_id = %s", lambda s: (s.user_id(),)),
+    ('GET /user/expenses/total', "SELECT category, SUM(amount) as total_amount FROM expenses WHERE user_id = %s GROUP BY category", lambda s: (s.user_id(),)),
+    ('GET /places/reviews (recent)', """
+        SELECT r.id, u.username, r.rating, r.reviews, r.sentiment, r.created_at
+        FROM tours_reviews r JOIN users u ON r.user_id = u.id
+        WHERE r.tours_id = %s ORDER BY r.created_at DESC, r.id DESC LIMIT 20 OFFSET 0
+    """, lambda s: (s.place_id('tours'),)),
+    ('review pipeline recover', "SELECT id, reviews FROM tours_reviews WHERE sentiment = 'pending'", lambda s: ()),
+    ('GET /places/tours/all?city=', "SELECT id, name, city FROM tours WHERE city = %s ORDER BY id LIMIT 500", lambda s: (random.choice(CITIES),)),
+    ('GET /places/culinaries/all?category=', "SELECT id, name, category FROM culinaries WHERE category = %s ORDER BY id LIMIT 500", lambda s: (random.choice(CATEGORIES),))
+]
+
+# Seeded ids, to query existing rows
+class Sample:
+    def __init__(self, users, places):
+        self.users = users
+        self.places = places
+
+    def username(self):
+        return f'user_{random.randrange(self.users)}'
+
+    def email(self):
+        return f'user_{random.randrange(self.users)}@example.com'
+
+    def phone(self):
+        return f'08{random.randrange(self.users):010d}'
+
+    def user_id(self):
+        return f'u{random.randrange(self.users):035d}'
+
+    def place_id(self, table):
+        return place_uuid(table, random.randrange(self.places))
+
+# Function to insert generated rows in batches
+def insert_rows(conn, table, columns, rows, total, batch_size):
+    cursor = conn.cursor()
+    query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    started = time.perf_counter()
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            cursor.executemany(query, batch)
+            conn.commit()
+            batch = []
+    if batch:
+        cursor.executemany(query, batch)
+        conn.commit()
+    print(f"Seeded {total} rows into {table} in {time.perf_counter() - started:.1f} s")
+
+# Function to create and seed the benchmark database
+def seed(conn, args):
+    """
+    Creates the tables of sql/tables.sql and fills them with generated rows.
+    """
+    cursor = conn.cursor()
+    with open(TABLES_SQL, encoding='utf-8') as f:
+        for statement in split_statements(f.read()):
+            cursor.execute(statement)
+
+    # Constraints are checked by the generator, not row by row
+    cursor.execute("SET foreign_key_checks = 0, unique_checks = 0")
+    rng = random.Random(args.seed)
+    sample = Sample(args.users, args.places)
+
+    def places(table, with_category):
+        for i in range(args.places):
+            place_id = place_uuid(table, i)
+            row = (place_id, f'{table} {i}', round(rng.uniform(3, 5), 1), rng.randrange(0, 1000000, 5000), rng.choice(CITIES))
+            yield row + ((rng.choice(CATEGORIES),) if with_category else ())
+
+    insert_rows(conn, 'accommodations', ('id', 'name', 'rating', 'price_wna', 'city'), places('accommodations', False), args.places, args.batch_size)
+    insert_rows(conn, 'tours', ('id', 'name', 'rating', 'price_wna', 'city', 'category'), places('tours', True), args.places, args.batch_size)
+    insert_rows(conn, 'culinaries', ('id', 'name', 'rating', 'price_wna', 'city', 'category'), places('culinaries', True), args.places, args.batch_size)
+
+    users = ((f'u{i:035d}', f'user_{i}@example.com', f'user_{i}', 'password', f'08{i:010d}') for i in range(args.users))
+    insert_rows(conn, 'users', ('id', 'email', 'username', 'password', 'phone_number'), users, args.users, args.batch_size)
+
+    def created_at():
+        return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(1700000000 + rng.randrange(30000000)))
+
+    itineraries = (
+        (str(uuid.uuid4()), sample.user_id(), json.dumps({'days': rng.randint(1, 5)}), 100000, 0, 100000, created_at())
+        for _ in range(args.itineraries)
+    )
+    insert_rows(conn, 'itineraries', ('id', 'user_id', 'itinerary_data', 'total_cost', 'remaining_budget', 'budget', 'created_at'), itineraries, args.itineraries, args.batch_size)
+
+    expenses = (
+        (str(uuid.uuid4()), sample.user_id(), rng.choice(EXPENSE_CATEGORIES), rng.randrange(1000, 1000000), 'expense', created_at())
+        for _ in range(args.expenses)
+    )
+    insert_rows(conn, 'expenses', ('expense_id', 'user_id', 'category', 'amount', 'description', 'created_at'), expenses, args.expenses, args.batch_size)
+
+    # One pending review in a thousand, like a pipeline that keeps up
+    for table, column, place_type in (('accommodations_reviews', 'accommodations_id', 'accommodations'), ('tours_reviews', 'tours_id', 'tours'), ('culinary_reviews', 'culinaries_id', 'culinaries')):
+        reviews = (
+            (str(uuid.uuid4()), sample.user_id(), sample.place_id(place_type), rng.randint(1, 5), 'review text',
+             'pending' if rng.random() < 0.001 else rng.choice(SENTIMENTS), created_at())
+            for _ in range(args.reviews)
+        )
+        insert_rows(conn, table, ('id', 'user_id', column, 'rating', 'reviews', 'sentiment', 'created_at'), reviews, args.reviews, args.batch_size)
+
+    cursor.execute("SET foreign_key_checks = 1, unique_checks = 1")
+    return sample
+
+# Function to explain and time every query
+def measure(conn, sample, repeat):
+    """
+    Reports the plan and the latency of every handler query.
+
+    Returns:
+        dict: (plan, median ms, p95 ms) by endpoint, the plan lists the table, access type, key and estimated rows.
+    """
+    cursor = conn.cursor()
+    results = {}
+    for endpoint, query, params in QUERIES:
+        cursor.execute("EXPLAIN " + query, params(sample))
+        columns = [column[0] for column in cursor.description]
+        plan = ', '.join(
+            f"{row['table']}:{row['type']}/{row['key'] or '-'}/{row['rows']}"
+            for row in (dict(zip(columns, values)) for values in cursor.fetchall())
+        )
+
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            cursor.execute(query, params(sample))
+            cursor.fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        results[endpoint] = (plan, statistics.median(timings), timings[min(len(timings) - 1, int(len(timings) * 0.95))])
+    return results
+
+# Function to print the comparison of two measurements
+def report(before, after):
+    width = max(len(endpoint) for endpoint in before)
+    print(f"\n{'endpoint'.ljust(width)}  {'before p50/p95 ms':>19}  {'after p50/p95 ms':>19}  speedup")
+    for endpoint in before:
+        plan_before, p50_before, p95_before = before[endpoint]
+        plan_after, p50_after, p95_after = after[endpoint]
+        speedup = p50_before / p50_after if p50_after else float('inf')
+        print(f"{endpoint.ljust(width)}  {p50_before:9.2f}/{p95_before:9.2f}  {p50_after:9.2f}/{p95_after:9.2f}  {speedup:6.1f}x")
+        print(f"{''.ljust(width)}  before: {plan_before}")
+        print(f"{''.ljust(width)}  after:  {plan_after}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Seed a scratch MySQL/MariaDB database and compare the data server queries before and after the migrations.")
+    parser.add_argument('--database', default='eztrip_benchmark', help="scratch database, dropped and created again")
+    parser.add_argument('--users', type=int, default=1000000)
+    parser.add_argument('--places', type=int, default=100000, help="places per place table")
+    parser.add_argument('--reviews', type=int, default=1000000, help="reviews per review table")
+    parser.add_argument('--expenses', type=int, default=2000000)
+    parser.add_argument('--itineraries', type=int, default=500000)
+    parser.add_argument('--repeat', type=int, default=20, help="runs of every query")
+    parser.add_argument('--batch-size', type=int, default=5000, help="rows per insert")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--keep', action='store_true', help="keep the database after the benchmark")
+    args = parser.parse_args()
+
+    # The benchmark drops its database, so it never runs on the database of the data server
+    if args.database == os.getenv('DB_NAME'):
+        print("Refusing to use DB_NAME as the benchmark database, pass another --database")
+        sys.exit(1)
+
+    random.seed(args.seed)
+    server = mysql.connector.connect(**Config)
+    cursor = server.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS `{args.database}`")
+    cursor.execute(f"CREATE DATABASE `{args.database}`")
+    server.close()
+
+    conn = connect(database=args.database)
+    try:
+        sample = seed(conn, args)
+        cursor = conn.cursor()
+        cursor.execute("ANALYZE TABLE users, itineraries, expenses, tours_reviews, tours, culinaries")
+        cursor.fetchall()
+        before = measure(conn, sample, args.repeat)
+
+        started = time.perf_counter()
+        migrate(conn)
+        print(f"Migrations applied in {time.perf_counter() - started:.1f} s")
+        cursor.execute("ANALYZE TABLE users, itineraries, expenses, tours_reviews, tours, culinaries")
+        cursor.fetchall()
+        after = measure(conn, sample, args.repeat)
+
+        report(before, after)
+    finally:
+        if not args.keep:
+            conn.cursor().execute(f"DROP DATABASE IF EXISTS `{args.database}`")
+        conn.close()
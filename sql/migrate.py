@@ -0,0 +1,177 @@
+import argparse
+import hashlib
+import os
+import re
+import sys
+import mysql.connector
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Directory of the versioned migrations, named like 0001_description.sql and applied in name order
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+MIGRATION_FILE = re.compile(r'^(\d+)_[\w-]+\.sql$')
+
+# MySQL errors raised when an index or a column already exists, e.g. after a migration that failed
+# halfway or on a database created from a sql/tables.sql that already has it
+DUPLICATE_KEY_NAME = 1061
+DUPLICATE_COLUMN_NAME = 1060
+SKIPPED_ERRORS = {DUPLICATE_KEY_NAME: 'index', DUPLICATE_COLUMN_NAME: 'column'}
+
+# Database credentials of the data server, without the database name
+Config = {
+    'host': os.getenv('DB_HOST'),
+    'port': int(os.getenv('DB_PORT') or 3306),
+    'user': os.getenv('DB_USER'),
+    'password': os.getenv('DB_PASS')
+}
+
+# Function to connect to the database of the data server
+def connect(database=None):
+    """
+    Opens a MySQL connection with the DB_* settings of the data server.
+
+    Args:
+        database (str, optional): Database to use, DB_NAME by default.
+
+    Returns:
+        Connection: A mysql.connector connection.
+    """
+    return mysql.connector.connect(**Config, database=database or os.getenv('DB_NAME'))
+
+# Function to list the migration files
+def list_migrations(directory=MIGRATIONS_DIR):
+    """
+    Lists the migrations in version order.
+
+    Returns:
+        list: (version, name, path, checksum) tuples, the checksum is the SHA-256 of the file.
+    """
+    migrations = []
+    for name in sorted(os.listdir(directory)):
+        match = MIGRATION_FILE.match(name)
+        if not match:
+            continue
+        path = os.path.join(directory, name)
+        with open(path, 'rb') as f:
+            checksum = hashlib.sha256(f.read()).hexdigest()
+        migrations.append((match.group(1), name, path, checksum))
+    return migrations
+
+# Function to split a migration into statements
+def split_statements(sql):
+    """
+    Splits a migration into statements on ';', after removing '--' comment lines.
+
+    Migrations hold plain DDL, so semicolons never appear inside strings.
+    """
+    lines = [line for line in sql.splitlines() if not line.strip().startswith('--')]
+    return [statement.strip() for statement in '\n'.join(lines).split(';') if statement.strip()]
+
+# Function to read the applied migrations
+def applied_migrations(conn):
+    """
+    Reads the applied migrations, creating the bookkeeping table on first use.
+
+    Returns:
+        dict: Checksum of every applied migration, by version.
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version VARCHAR(32) PRIMARY KEY,        -- Version prefix of the migration file
+            name VARCHAR(255) NOT NULL,             -- File name of the migration
+            checksum CHAR(64) NOT NULL,             -- SHA-256 of the file when it was applied
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("SELECT version, checksum FROM schema_migrations")
+    applied = dict(cursor.fetchall())
+    conn.commit()
+    return applied
+
+# Function to apply the pending migrations
+def migrate(conn, dry_run=False, log=print):
+    """
+    Applies the migrations that are not in schema_migrations yet, in version order.
+
+    MySQL commits every DDL statement on its own, so a migration that fails halfway keeps the
+    statements that ran. Indexes and columns that already exist are skipped, so the migration can
+    be run again once the failing statement is fixed.
+
+    Args:
+        conn: A mysql.connector connection.
+        dry_run (bool, optional): Only report the pending migrations.
+        log (callable, optional): Receives the progress messages.
+
+    Returns:
+        list: The versions applied, or pending on a dry run.
+
+    Raises:
+        RuntimeError: If an applied migration file was changed since it was applied.
+    """
+    applied = applied_migrations(conn)
+    pending = []
+    for version, name, path, checksum in list_migrations():
+        if version in applied:
+            if applied[version] != checksum:
+                raise RuntimeError(f"Migration {name} was changed after it was applied, add a new migration instead")
+            continue
+        pending.append((version, name, path, checksum))
+
+    if dry_run:
+        for _, name, _, _ in pending:
+            log(f"Pending {name}")
+        return [version for version, _, _, _ in pending]
+
+    cursor = conn.cursor()
+    for version, name, path, checksum in pending:
+        log(f"Applying {name}")
+        with open(path, encoding='utf-8') as f:
+            statements = split_statements(f.read())
+
+        for statement in statements:
+            try:
+                cursor.execute(statement)
+            except mysql.connector.Error as e:
+                if e.errno not in SKIPPED_ERRORS:
+                    raise
+                log(f"  Skipped, the {SKIPPED_ERRORS[e.errno]} already exists: {statement.splitlines()[0]}")
+
+        cursor.execute("INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)", (version, name, checksum))
+        conn.commit()
+
+    return [version for version, _, _, _ in pending]
+
+# Function to report the state of every migration
+def status(conn, log=print):
+    applied = applied_migrations(conn)
+    for version, name, _, checksum in list_migrations():
+        if version not in applied:
+            state = 'pending'
+        elif applied[version] != checksum:
+            state = 'changed since applied'
+        else:
+            state = 'applied'
+        log(f"{name}: {state}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Apply the versioned migrations of sql/migrations to the DB_* database.")
+    parser.add_argument('--status', action='store_true', help="list the migrations and whether they are applied")
+    parser.add_argument('--dry-run', action='store_true', help="list the pending migrations without applying them")
+    args = parser.parse_args()
+
+    conn = connect()
+    try:
+        if args.status:
+            status(conn)
+        else:
+            versions = migrate(conn, dry_run=args.dry_run)
+            if not versions:
+                print("Database is up to date")
+    except (RuntimeError, mysql.connector.Error) as e:
+        print("Migration failed:", e)
+        sys.exit(1)
+    finally:
+        conn.close()
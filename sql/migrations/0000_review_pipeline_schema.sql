@@ -0,0 +1,49 @@
+-- Review columns and stats of the review pipeline, for databases created before them
+-- Apply with: python sql/migrate.py
+-- Runs before 0001, whose review indexes need created_at. Databases created from the current
+-- sql/tables.sql already have everything: the columns are skipped and the stats are rebuilt.
+
+-- Reviews are stored as pending until the pipeline has analyzed their sentiment
+ALTER TABLE accommodations_reviews MODIFY sentiment ENUM('positive', 'negative', 'neutral', 'pending') DEFAULT 'neutral';
+ALTER TABLE tours_reviews MODIFY sentiment ENUM('positive', 'negative', 'neutral', 'pending') DEFAULT 'neutral';
+ALTER TABLE culinary_reviews MODIFY sentiment ENUM('positive', 'negative', 'neutral', 'pending') DEFAULT 'neutral';
+
+-- Submission time, used to sort reviews by recency, existing reviews get the time of the migration
+ALTER TABLE accommodations_reviews ADD COLUMN created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE tours_reviews ADD COLUMN created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE culinary_reviews ADD COLUMN created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+
+-- Review count, rating sum and sentiment counts of every place
+CREATE TABLE IF NOT EXISTS place_stats (
+    place_id CHAR(36) PRIMARY KEY,            -- Id of the accommodation, tour or culinary experience
+    place_type VARCHAR(20) NOT NULL,          -- 'accommodations', 'tours' or 'culinaries'
+    review_count INT NOT NULL DEFAULT 0,      -- Number of reviews
+    rating_sum DECIMAL(12, 2) NOT NULL DEFAULT 0, -- Sum of the review ratings
+    rated_count INT NOT NULL DEFAULT 0,       -- Number of reviews with a rating
+    positive_count INT NOT NULL DEFAULT 0,    -- Number of reviews per sentiment
+    negative_count INT NOT NULL DEFAULT 0,
+    neutral_count INT NOT NULL DEFAULT 0,
+    pending_count INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP -- Timestamp for when the stats last changed
+);
+
+-- Initial stats of the existing reviews, the same rebuild as /places/stats/reconcile
+DELETE FROM place_stats;
+INSERT INTO place_stats (place_id, place_type, review_count, rating_sum, rated_count, positive_count, negative_count, neutral_count, pending_count)
+SELECT accommodations_id, 'accommodations', COUNT(*), COALESCE(SUM(rating), 0), COUNT(rating),
+    SUM(CASE WHEN sentiment = 'positive' THEN 1 ELSE 0 END), SUM(CASE WHEN sentiment = 'negative' THEN 1 ELSE 0 END),
+    SUM(CASE WHEN sentiment = 'neutral' THEN 1 ELSE 0 END), SUM(CASE WHEN sentiment = 'pending' THEN 1 ELSE 0 END)
+FROM accommodations_reviews
+GROUP BY accommodations_id;
+INSERT INTO place_stats (place_id, place_type, review_count, rating_sum, rated_count, positive_count, negative_count, neutral_count, pending_count)
+SELECT tours_id, 'tours', COUNT(*), COALESCE(SUM(rating), 0), COUNT(rating),
+    SUM(CASE WHEN sentiment = 'positive' THEN 1 ELSE 0 END), SUM(CASE WHEN sentiment = 'negative' THEN 1 ELSE 0 END),
+    SUM(CASE WHEN sentiment = 'neutral' THEN 1 ELSE 0 END), SUM(CASE WHEN sentiment = 'pending' THEN 1 ELSE 0 END)
+FROM tours_reviews
+GROUP BY tours_id;
+INSERT INTO place_stats (place_id, place_type, review_count, rating_sum, rated_count, positive_count, negative_count, neutral_count, pending_count)
+SELECT culinaries_id, 'culinaries', COUNT(*), COALESCE(SUM(rating), 0), COUNT(rating),
+    SUM(CASE WHEN sentiment = 'positive' THEN 1 ELSE 0 END), SUM(CASE WHEN sentiment = 'negative' THEN 1 ELSE 0 END),
+    SUM(CASE WHEN sentiment = 'neutral' THEN 1 ELSE 0 END), SUM(CASE WHEN sentiment = 'pending' THEN 1 ELSE 0 END)
+FROM culinary_reviews
+GROUP BY culinaries_id;
@@ -0,0 +1,27 @@
+-- Secondary and unique indexes for the lookups of the data server
+-- Apply with: python sql/migrate.py
+
+-- Login, registration and account updates look users up by username, email and phone number
+-- The unique indexes fail on existing duplicates, which must be merged first
+CREATE UNIQUE INDEX uq_users_username ON users (username);
+CREATE UNIQUE INDEX uq_users_email ON users (email);
+CREATE INDEX idx_users_phone_number ON users (phone_number);
+
+-- Itineraries and expenses of a user, the expense index also covers the totals by category
+CREATE INDEX idx_itineraries_user_created ON itineraries (user_id, created_at);
+CREATE INDEX idx_expenses_user_category ON expenses (user_id, category, amount);
+
+-- Reviews of a place, newest first, and the reviews left pending by a restart
+CREATE INDEX idx_accommodations_reviews_place_created ON accommodations_reviews (accommodations_id, created_at);
+CREATE INDEX idx_tours_reviews_place_created ON tours_reviews (tours_id, created_at);
+CREATE INDEX idx_culinary_reviews_place_created ON culinary_reviews (culinaries_id, created_at);
+CREATE INDEX idx_accommodations_reviews_sentiment ON accommodations_reviews (sentiment);
+CREATE INDEX idx_tours_reviews_sentiment ON tours_reviews (sentiment);
+CREATE INDEX idx_culinary_reviews_sentiment ON culinary_reviews (sentiment);
+
+-- Places by city and category, the primary key is part of every secondary index so listings stay in id order
+CREATE INDEX idx_accommodations_city ON accommodations (city);
+CREATE INDEX idx_tours_city ON tours (city);
+CREATE INDEX idx_tours_category ON tours (category);
+CREATE INDEX idx_culinaries_city ON culinaries (city);
+CREATE INDEX idx_culinaries_category ON culinaries (category);
@@ -56,7 +56,8 @@ CREATE TABLE accommodations_reviews (
     accommodations_id CHAR(36) NOT NULL,             -- Change INT to CHAR(36) to match accommodations(id)
     rating DECIMAL(3, 2),
     reviews TEXT,
-    sentiment ENUM('positive', 'negative', 'neutral') DEFAULT 'neutral',
+    sentiment ENUM('positive', 'negative', 'neutral', 'pending') DEFAULT 'neutral',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, -- Timestamp for when the review is submitted
     FOREIGN KEY (user_id) REFERENCES users(id),
     FOREIGN KEY (accommodations_id) REFERENCES accommodations(id)
 );
@@ -68,7 +69,8 @@ CREATE TABLE tours_reviews (
     tours_id CHAR(36) NOT NULL,
     rating DECIMAL(3, 2),
     reviews TEXT,
-    sentiment ENUM('positive', 'negative', 'neutral') DEFAULT 'neutral',
+    sentiment ENUM('positive', 'negative', 'neutral', 'pending') DEFAULT 'neutral',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, -- Timestamp for when the review is submitted
     FOREIGN KEY (user_id) REFERENCES users(id),
     FOREIGN KEY (tours_id) REFERENCES tours(id)
 );
@@ -79,7 +81,8 @@ CREATE TABLE culinary_reviews (
     culinaries_id CHAR(36) NOT NULL,
     rating FLOAT CHECK (rating >= 0 AND rating <= 5),
     reviews TEXT,
-    sentiment ENUM('positive', 'negative', 'neutral') DEFAULT 'neutral',
+    sentiment ENUM('positive', 'negative', 'neutral', 'pending') DEFAULT 'neutral',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, -- Timestamp for when the review is submitted
     FOREIGN KEY (user_id) REFERENCES users(id),
     FOREIGN KEY (culinaries_id) REFERENCES culinaries(id)
 );
@@ -94,4 +97,16 @@ CREATE TABLE expenses (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, -- Timestamp for when the itinerary is last updated
     FOREIGN KEY (user_id) REFERENCES users(id)  -- Foreign key referencing user table
     
-);
\ No newline at end of file
+);
+CREATE TABLE place_stats (
+    place_id CHAR(36) PRIMARY KEY,            -- Id of the accommodation, tour or culinary experience
+    place_type VARCHAR(20) NOT NULL,          -- 'accommodations', 'tours' or 'culinaries'
+    review_count INT NOT NULL DEFAULT 0,      -- Number of reviews
+    rating_sum DECIMAL(12, 2) NOT NULL DEFAULT 0, -- Sum of the review ratings
+    rated_count INT NOT NULL DEFAULT 0,       -- Number of reviews with a rating
+    positive_count INT NOT NULL DEFAULT 0,    -- Number of reviews per sentiment
+    negative_count INT NOT NULL DEFAULT 0,
+    neutral_count INT NOT NULL DEFAULT 0,
+    pending_count INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP -- Timestamp for when the stats last changed
+);